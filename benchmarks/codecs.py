@@ -0,0 +1,65 @@
+"""
+Benchmark encode/decode time and bytes per record of each value codec on a
+rotation history with a long event list.
+
+Run from the repository root:
+    PYTHONPATH=src python benchmarks/codecs.py --events 18
+"""
+import argparse
+import timeit
+
+import libnacl
+
+from didery.db import dbing
+from didery.help import helping as h
+
+DID = "did:dad:NOf6ZghvGNbFc_wr3CC0tKZHz1qWAR4lD5aM-i0zSjw="
+
+
+def genRecord(events):
+    """
+    Returns a stored rotation history value with events signed rotations
+
+    :param events: int number of rotation events
+    :return: list
+    """
+    signers = [h.bytesToStr64u(libnacl.randombytes(32)) for i in range(0, events + 2)]
+
+    return [
+        [
+            {
+                "event": {"id": DID, "changed": "2000-01-01T00:00:00+00:00", "signer": i, "signers": signers[:i + 2]},
+                "signatures": {"signer": h.bytesToStr64u(libnacl.randombytes(64)),
+                               "rotation": h.bytesToStr64u(libnacl.randombytes(64))}
+            }
+            for i in range(0, events)
+        ]
+    ]
+
+
+def main():
+    p = argparse.ArgumentParser(description="Value codec benchmark.")
+    p.add_argument('--events', type=int, default=18, help="Rotation events in the record.")
+    p.add_argument('--number', type=int, default=200, help="Encodes and decodes timed per run.")
+    args = p.parse_args()
+
+    record = genRecord(args.events)
+
+    print("codec       bytes  encode us  decode us")
+    for name, codec in sorted(dbing.CODECS.items()):
+        try:
+            dbing.getCodec(name)
+        except ValueError as ex:
+            print("{0:<8}  skipped, {1}".format(name, ex))
+            continue
+
+        raw = codec.encode(record)
+
+        encode = min(timeit.repeat(lambda: codec.encode(record), number=args.number, repeat=3)) / args.number
+        decode = min(timeit.repeat(lambda: codec.decode(raw), number=args.number, repeat=3)) / args.number
+
+        print("{0:<8}  {1:>8}  {2:>9.1f}  {3:>9.1f}".format(name, len(raw), encode * 1e6, decode * 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""
+Benchmark the did parsing done while serving a history rotation (PUT)
+with and without the memoized parser.
+
+Run from the repository root:
+    PYTHONPATH=src python benchmarks/did_parse.py --requests 2000
+"""
+import argparse
+import timeit
+
+import falcon
+from falcon import testing
+
+try:
+    import simplejson as json
+except ImportError:
+    import json
+
+from didery import routing
+from didery.crypto import eddsa
+from didery.db import dbing
+from didery.did import didering
+from didery.help import helping
+
+DID_RE_MATCH = didering.DID_RE.match
+
+
+def uncachedParse(did_reference):
+    """
+    Parsing as it was done before, matching DID_RE on every call and
+    formatting the canonical did on every access
+    """
+    if not did_reference.startswith("did"):
+        raise ValueError("Invalid Scheme Value.")
+
+    matches = DID_RE_MATCH(did_reference)
+    if not matches:
+        raise ValueError("Could not parse DID.")
+
+    did, scheme, method, idString, path, query, fragment = matches.groups()
+
+    return "{}:{}:{}".format(scheme, method, idString)
+
+
+def parsesPerPut():
+    """
+    Returns the did references parsed while serving one PUT request
+    """
+    dbPath = helping.setupTmpBaseDir()
+    dbing.setupDbEnv(dbPath)
+
+    try:
+        app = falcon.API()
+        routing.loadEndPoints(app, store=None, mode="method")
+        client = testing.TestClient(app)
+
+        vk, sk, did, body = eddsa.genDidHistory(signer=0, numSigners=2)
+        headers = {"Signature": 'signer="{0}"'.format(eddsa.signResource(body, sk))}
+        client.simulate_post(routing.HISTORY_BASE_PATH, body=body, headers=headers)
+
+        body = json.loads(body)
+        body['changed'] = "2000-01-01T00:00:01+00:00"
+        body['signer'] = 1
+        body['signers'].append(body['signers'][0])
+        body = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        headers = {"Signature": 'signer="{0}"; rotation="{0}"'.format(eddsa.signResource(body, sk))}
+
+        didering.parseDid.cache_clear()
+        response = client.simulate_put("{0}/{1}".format(routing.HISTORY_BASE_PATH, did), body=body, headers=headers)
+        assert response.status == falcon.HTTP_200
+
+        info = didering.parseDid.cache_info()
+    finally:
+        helping.cleanupTmpBaseDir(dbPath)
+
+    return did, info.hits + info.misses
+
+
+def main():
+    p = argparse.ArgumentParser(description="Did parsing benchmark.")
+    p.add_argument('--requests', type=int, default=2000, help="Requests simulated per run.")
+    args = p.parse_args()
+
+    did, parses = parsesPerPut()
+    references = [did] * parses
+
+    def before():
+        for reference in references:
+            uncachedParse(reference)
+
+    def after():
+        for reference in references:
+            didering.parseDid(reference).did
+
+    before = timeit.timeit(before, number=args.requests) / args.requests * 1e6
+    after = timeit.timeit(after, number=args.requests) / args.requests * 1e6
+
+    print("did parses per PUT: {0}".format(parses))
+    print("uncached: {0:.2f} us per request".format(before))
+    print("memoized: {0:.2f} us per request".format(after))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+"""
+Benchmark Ed25519 verification of request sized messages with combined
+(crypto_sign_open) and detached (crypto_sign_verify_detached) verification.
+
+Run from the repository root:
+    PYTHONPATH=src python benchmarks/eddsa_verify.py --rounds 2000
+"""
+import argparse
+import timeit
+
+import libnacl
+
+from didery.crypto import eddsa
+
+SIZES = (200, 1024, 4096, 16384, 65536)  # message bytes, 200 B to 64 KiB
+
+
+def combined(sig, msg, vk):
+    """
+    Verification as it was done before, copying the signature and message
+    into one buffer and getting a copy of the message back
+    """
+    try:
+        result = libnacl.crypto_sign_open(sig + msg, vk)
+    except Exception as ex:
+        return False
+    return True if result else False
+
+
+def main():
+    p = argparse.ArgumentParser(description="Ed25519 verification benchmark.")
+    p.add_argument('--rounds', type=int, default=2000, help="Verifications timed per message size.")
+    args = p.parse_args()
+
+    vk, sk = eddsa.generateByteKeys()
+
+    print("   bytes  combined us  detached us  speedup")
+    for size in SIZES:
+        msg = libnacl.randombytes(size)
+        sig = libnacl.crypto_sign_detached(msg, sk)
+
+        assert combined(sig, msg, vk) and eddsa.verify(sig, msg, vk)
+
+        before = timeit.timeit(lambda: combined(sig, msg, vk), number=args.rounds) / args.rounds * 1e6
+        after = timeit.timeit(lambda: eddsa.verify(sig, msg, vk), number=args.rounds) / args.rounds * 1e6
+
+        print("{0:>8}  {1:>11.1f}  {2:>11.1f}  {3:>6.2f}x".format(size, before, after, before / after))
+
+
+if __name__ == '__main__':
+    main()
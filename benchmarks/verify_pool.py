@@ -0,0 +1,87 @@
+"""
+Benchmark signature verification throughput with and without the verifier
+process pool for mixed ECDSA and EdDSA traffic.
+
+Run from the repository root:
+    PYTHONPATH=src python benchmarks/verify_pool.py --requests 2000 --ecdsa 0.5
+"""
+import argparse
+import os
+import random
+import time
+
+from didery.crypto import ecdsa
+from didery.crypto import eddsa
+from didery.crypto import pooling
+
+
+def genTraffic(count, ecdsaShare):
+    """
+    Returns count signed resources, ecdsaShare of them signed with secp256k1
+
+    :param count: int number of resources
+    :param ecdsaShare: float fraction of ECDSA signatures
+    :return: list of (kind, signature, resource, verkey) tuples
+    """
+    edVk, edSk = eddsa.generate64uKeys()
+    ecVk, ecSk = ecdsa.generate64uKeys()
+
+    traffic = []
+    for index in range(count):
+        resource = '{{"id": "did:dad:{0}", "changed": "2000-01-01T00:00:00+00:00"}}'.format(index)
+
+        if random.random() < ecdsaShare:
+            traffic.append(("secp256k1", ecdsa.signResource64u(resource, ecSk), resource, ecVk))
+        else:
+            traffic.append((None, eddsa.signResource64u(resource, edSk), resource, edVk))
+
+    return traffic
+
+
+def run(traffic, size):
+    """
+    Returns verifications per second for a pool of size workers, 0 verifies inline
+
+    :param traffic: list of (kind, signature, resource, verkey) tuples
+    :param size: int number of worker processes
+    :return: float
+    """
+    pool = pooling.setupVerifierPool(size)
+
+    try:
+        start = time.perf_counter()
+
+        if pool is None:
+            results = [pooling.verifySignature(*item) for item in traffic]
+        else:
+            futures = [pool.submit(*item) for item in traffic]
+            results = [future.result() for future in futures]
+
+        elapsed = time.perf_counter() - start
+    finally:
+        pooling.closeVerifierPool()
+
+    assert all(result is None for result in results)
+
+    return len(traffic) / elapsed
+
+
+def main():
+    p = argparse.ArgumentParser(description="Verifier pool throughput benchmark.")
+    p.add_argument('--requests', type=int, default=2000, help="Signatures verified per run.")
+    p.add_argument('--ecdsa', type=float, default=0.5, help="Fraction of ECDSA signatures.")
+    p.add_argument('--max-workers', type=int, default=os.cpu_count(), help="Largest pool size tried.")
+    args = p.parse_args()
+
+    traffic = genTraffic(args.requests, args.ecdsa)
+    baseline = None
+
+    print("workers  verifies/s  speedup")
+    for size in range(0, args.max_workers + 1):
+        rate = run(traffic, size)
+        baseline = baseline or rate
+        print("{0:>7}  {1:>10.0f}  {2:>6.2f}x".format(size, rate, rate / baseline))
+
+
+if __name__ == '__main__':
+    main()
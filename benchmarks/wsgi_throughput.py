@@ -0,0 +1,177 @@
+"""
+Benchmark GET throughput of the app served by ioflo's Valet, the way the
+flo script serves it, against the same app from didery.wsgi.createApp under
+a threaded stdlib WSGI server and the asyncio server.
+
+Run from the repository root:
+    PYTHONPATH=src python benchmarks/wsgi_throughput.py --requests 2000 --clients 8
+"""
+import argparse
+import http.client
+import multiprocessing
+import shutil
+import socket
+import tempfile
+import threading
+import time
+
+from socketserver import ThreadingMixIn
+from wsgiref.simple_server import make_server, WSGIServer, WSGIRequestHandler
+
+from ioflo.aid import getConsole
+from ioflo.aio.http import Valet
+from ioflo.base import storing
+
+try:
+    import simplejson as json
+except ImportError:
+    import json
+
+from didery import wsgi
+from didery.core import aioserving
+from didery.crypto import eddsa
+from didery.db import dbing
+
+
+class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def seed(path, count):
+    """
+    Store count rotation histories in the database at path
+
+    :param path: string database directory
+    :param count: int number of histories
+    :return: list of the dids stored
+    """
+    dbing.setupDbEnv(path)
+    dids = []
+
+    for index in range(count):
+        vk, sk, did, body = eddsa.genDidHistory(signer=0, numSigners=2)
+        dbing.historyDB.saveHistory(did, json.loads(body), {"signer": eddsa.signResource(body, sk)})
+        dids.append(did)
+
+    return dids
+
+
+def serveValet(path, port):
+    getConsole().reinit(verbosity=getConsole().Wordage.mute)  # Valet logs every request otherwise
+    store = storing.Store(stamp=0.0)
+    app = wsgi.createApp(path, streamWait=0, store=store)
+    valet = Valet(port=port, bufsize=131072, wlog=None, store=store, app=app, timeout=0.5)
+    valet.servant.reopen()
+
+    while True:
+        valet.serviceAll()
+
+
+def serveWsgiref(path, port):
+    app = wsgi.createApp(path)
+    make_server("127.0.0.1", port, app, server_class=ThreadingWSGIServer, handler_class=QuietHandler).serve_forever()
+
+
+def serveAsyncio(path, port):
+    getConsole().reinit(verbosity=getConsole().Wordage.mute)
+    app = wsgi.createApp(path, streamWait=0, streamGenerator=aioserving.historyEvents)
+    aioserving.runServer(app, host="127.0.0.1", port=port)
+
+
+SERVERS = {"valet": serveValet, "wsgiref": serveWsgiref, "asyncio": serveAsyncio}
+
+
+def freePort():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def waitForServer(port, timeout=10):
+    end = time.monotonic() + timeout
+
+    while time.monotonic() < end:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.05)
+
+    raise RuntimeError("Server on port {} did not start".format(port))
+
+
+def run(name, path, dids, requests, clients):
+    """
+    Returns requests per second served by server name
+
+    :param name: string key of SERVERS
+    :param path: string database directory
+    :param dids: list of stored dids to request
+    :param requests: int total number of requests
+    :param clients: int number of concurrent client threads
+    :return: float
+    """
+    port = freePort()
+    server = multiprocessing.get_context("fork").Process(target=SERVERS[name], args=(path, port), daemon=True)
+    server.start()
+
+    try:
+        waitForServer(port)
+        failures = []
+
+        def client(number):
+            for index in range(number, requests, clients):
+                connection = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+                connection.request("GET", "/history/{}".format(dids[index % len(dids)]))
+                response = connection.getresponse()
+                response.read()
+                connection.close()
+
+                if response.status != 200:
+                    failures.append(response.status)
+
+        threads = [threading.Thread(target=client, args=(number,)) for number in range(clients)]
+
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+    finally:
+        server.terminate()
+        server.join()
+
+    assert not failures, failures
+
+    return requests / elapsed
+
+
+def main():
+    p = argparse.ArgumentParser(description="WSGI server throughput benchmark.")
+    p.add_argument('--requests', type=int, default=2000, help="GET requests sent per server.")
+    p.add_argument('--clients', type=int, default=8, help="Concurrent client threads.")
+    p.add_argument('--histories', type=int, default=100, help="Rotation histories stored.")
+    args = p.parse_args()
+
+    path = tempfile.mkdtemp(prefix="didery", suffix="bench")
+
+    try:
+        dids = seed(path, args.histories)
+        dbing.dideryDB.close()  # every server opens the database after forking
+
+        print("server   requests/s")
+        for name in SERVERS:
+            print("{0:<7}  {1:>10.0f}".format(name, run(name, path, dids, args.requests, args.clients)))
+    finally:
+        shutil.rmtree(path)
+
+
+if __name__ == '__main__':
+    main()
@@ -129,6 +129,7 @@ setup(
         # eg:
         #   'rst': ['docutils>=0.11'],
         #   ':python_version=="2.6"': ['argparse'],
+        'msgpack': ['msgpack>=0.6.0'],
     },
     setup_requires=[
         'cython',
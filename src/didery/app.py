@@ -4,9 +4,14 @@ import ioflo.app.run
 
 from ioflo.aid import odict
 from ioflo.aid import consoling
+from ioflo.aid import getConsole
 
 from didery import __version__
-from didery.db.dbing import DATABASE_DIR_PATH
+from didery import wsgi
+from didery.db.dbing import DATABASE_DIR_PATH, DEFAULT_MAP_SIZE, DEFAULT_MAX_READERS, CODECS
+from didery.crypto.caching import DEFAULT_CACHE_SIZE, DEFAULT_CACHE_TTL
+from didery.crypto.pooling import DEFAULT_POOL_SIZE
+from didery.core.supervising import Supervisor
 
 
 def parseArgs(version=__version__):
@@ -29,6 +34,79 @@ def parseArgs(version=__version__):
                    action='store',
                    default=8080,
                    help="Port number the server should listen on. Default is 8080.")
+    p.add_argument('-m', '--mode',
+                   action='store',
+                   default='method',
+                   choices=['method', 'promiscuous', 'race'],
+                   help="Didery's operating mode, the same for every server. Default is method.")
+    p.add_argument('--map-size',
+                   action='store',
+                   type=int,
+                   default=DEFAULT_MAP_SIZE // (1024 * 1024),
+                   help="Initial size of the database memory map in MiB. "
+                        "The map grows automatically when it fills up. Default is {}.".format(DEFAULT_MAP_SIZE // (1024 * 1024)))
+    p.add_argument('--max-map-size',
+                   action='store',
+                   type=int,
+                   default=0,
+                   help="Largest size in MiB the database memory map may grow to. Default is 0 for no limit.")
+    p.add_argument('--writemap',
+                   action='store_true',
+                   help="Use a writeable memory map for the database.")
+    p.add_argument('--map-async',
+                   action='store_true',
+                   help="Flush the writeable memory map asynchronously. Only used with --writemap.")
+    p.add_argument('--no-readahead',
+                   dest='readahead',
+                   action='store_false',
+                   help="Stop the OS reading ahead in the database file. Useful for databases larger than RAM.")
+    p.add_argument('--max-readers',
+                   action='store',
+                   type=int,
+                   default=DEFAULT_MAX_READERS,
+                   help="Maximum number of simultaneous database read transactions. Default is {}.".format(DEFAULT_MAX_READERS))
+    p.add_argument('--no-sync',
+                   dest='sync',
+                   action='store_false',
+                   help="Do not flush the database to disk on every commit.")
+    p.add_argument('--no-metasync',
+                   dest='metasync',
+                   action='store_false',
+                   help="Do not flush the database meta page to disk on every commit.")
+    p.add_argument('--codec',
+                   action='store',
+                   default='json',
+                   choices=sorted(CODECS),
+                   help="Encoding used to store new database values. Existing values stay readable. Default is json.")
+    p.add_argument('--sig-cache-size',
+                   action='store',
+                   type=int,
+                   default=DEFAULT_CACHE_SIZE,
+                   help="Number of verified signatures to remember so retried requests skip verification. "
+                        "0 disables the cache. Default is {}.".format(DEFAULT_CACHE_SIZE))
+    p.add_argument('--sig-cache-ttl',
+                   action='store',
+                   type=int,
+                   default=DEFAULT_CACHE_TTL,
+                   help="Seconds a verified signature is remembered. 0 means until evicted. Default is {}.".format(DEFAULT_CACHE_TTL))
+    p.add_argument('--verify-workers',
+                   action='store',
+                   type=int,
+                   default=DEFAULT_POOL_SIZE,
+                   help="Number of processes verifying signatures while the server keeps serving other connections. "
+                        "0 verifies in the server process. Default is {}.".format(DEFAULT_POOL_SIZE))
+    p.add_argument('-w', '--workers',
+                   action='store',
+                   type=int,
+                   default=1,
+                   help="Number of server processes sharing the port and database. "
+                        "Workers that die are restarted. Default is 1.")
+    p.add_argument('--server',
+                   action='store',
+                   default='ioflo',
+                   choices=['ioflo', 'asyncio'],
+                   help="Server running the app. ioflo services connections on the flo scheduler tick, "
+                        "asyncio as soon as they are ready. Default is ioflo.")
 
     args = p.parse_args()
 
@@ -53,22 +131,64 @@ def main():
     )
     floScriptpath = os.path.join(projectDirpath, "didery/flo/main.flo")
 
-    ioflo.app.run.run(name="skedder",
-                      period=100,
-                      real=True,
-                      retro=True,
-                      filepath=floScriptpath,
-                      behaviors=['didery.core'],
-                      mode='',
-                      username='',
-                      password='',
-                      verbose=args.verbose,
-                      consolepath='',
-                      statistics=False,
-                      preloads=[
-                          ('.main.server.port', odict(value=args.port)),
-                          ('.main.server.db', odict(value=args.path))
-                      ])
+    lmdbOptions = odict(
+        mapSize=args.map_size * 1024 * 1024,
+        maxMapSize=args.max_map_size * 1024 * 1024,
+        writemap=args.writemap,
+        mapAsync=args.map_async,
+        readahead=args.readahead,
+        maxReaders=args.max_readers,
+        sync=args.sync,
+        metasync=args.metasync,
+        codec=args.codec,
+    )
+
+    def runServer(worker=0):
+        ioflo.app.run.run(name="skedder",
+                          period=100,
+                          real=True,
+                          retro=True,
+                          filepath=floScriptpath,
+                          behaviors=['didery.core'],
+                          mode='',
+                          username='',
+                          password='',
+                          verbose=args.verbose,
+                          consolepath='',
+                          statistics=False,
+                          preloads=[
+                              ('.main.server.port', odict(value=args.port)),
+                              ('.main.server.db', odict(value=args.path)),
+                              ('.main.server.mode', odict(value=args.mode)),
+                              ('.main.server.lmdb', odict(value=lmdbOptions)),
+                              ('.main.server.sigCache', odict(value=odict(size=args.sig_cache_size, ttl=args.sig_cache_ttl))),
+                              ('.main.server.verifyWorkers', odict(value=args.verify_workers)),
+                              ('.main.server.workers', odict(value=args.workers)),
+                          ])
+
+    def runAsyncServer(worker=0):
+        from didery.core import aioserving  # async generators need python 3.6
+
+        getConsole().reinit(verbosity=args.verbose)
+        app = wsgi.createApp(args.path,
+                             args.mode,
+                             port=int(args.port),
+                             lmdb=lmdbOptions,
+                             sigCache=odict(size=args.sig_cache_size, ttl=args.sig_cache_ttl),
+                             verifyWorkers=args.verify_workers,
+                             shared=args.workers > 1,
+                             streamWait=0,
+                             streamGenerator=aioserving.historyEvents)
+        aioserving.runServer(app, port=int(args.port), reusePort=args.workers > 1)
+
+    if args.server == 'asyncio':
+        runServer = runAsyncServer
+
+    if args.workers > 1:
+        # each worker opens the database itself, lmdb environments must not cross a fork
+        Supervisor(args.workers, runServer).run()
+    else:
+        runServer()
 
 
 if __name__ == '__main__':
@@ -19,10 +19,15 @@ import click
 import ioflo.app.run
 
 from ioflo.aid import odict
+from ioflo.aid import getConsole
 from ioflo.aid.consoling import VERBIAGE_NAMES
 
 from didery import __version__
-from didery.db.dbing import DATABASE_DIR_PATH
+from didery import wsgi
+from didery.db.dbing import DATABASE_DIR_PATH, DEFAULT_MAP_SIZE, DEFAULT_MAX_READERS, CODECS
+from didery.crypto.caching import DEFAULT_CACHE_SIZE, DEFAULT_CACHE_TTL
+from didery.crypto.pooling import DEFAULT_POOL_SIZE
+from didery.core.supervising import Supervisor
 
 
 @click.command()
@@ -77,7 +82,100 @@ from didery.db.dbing import DATABASE_DIR_PATH
     flag_value='race',
     help="Run Didery in race mode."
 )
-def main(port, version, verbose, path, mode):
+@click.option(
+    '--map-size',
+    multiple=False,
+    default=DEFAULT_MAP_SIZE // (1024 * 1024),
+    type=click.IntRange(1, None),
+    help='Initial size of the database memory map in MiB. '
+         'The map grows automatically when it fills up. Default is {}.'.format(DEFAULT_MAP_SIZE // (1024 * 1024))
+)
+@click.option(
+    '--max-map-size',
+    multiple=False,
+    default=0,
+    type=click.IntRange(0, None),
+    help='Largest size in MiB the database memory map may grow to. Default is 0 for no limit.'
+)
+@click.option(
+    '--writemap/--no-writemap',
+    default=False,
+    help='Use a writeable memory map for the database. Default is off.'
+)
+@click.option(
+    '--map-async/--no-map-async',
+    default=False,
+    help='Flush the writeable memory map asynchronously. Only used with --writemap. Default is off.'
+)
+@click.option(
+    '--readahead/--no-readahead',
+    default=True,
+    help='Let the OS read ahead in the database file. Turn off for databases larger than RAM. Default is on.'
+)
+@click.option(
+    '--max-readers',
+    multiple=False,
+    default=DEFAULT_MAX_READERS,
+    type=click.IntRange(1, None),
+    help='Maximum number of simultaneous database read transactions. Default is {}.'.format(DEFAULT_MAX_READERS)
+)
+@click.option(
+    '--sync/--no-sync',
+    default=True,
+    help='Flush the database to disk on every commit. Default is on.'
+)
+@click.option(
+    '--metasync/--no-metasync',
+    default=True,
+    help='Flush the database meta page to disk on every commit. Default is on.'
+)
+@click.option(
+    '--codec',
+    type=click.Choice(sorted(CODECS)),
+    default='json',
+    help='Encoding used to store new database values. Existing values stay readable. Default is json.'
+)
+@click.option(
+    '--sig-cache-size',
+    multiple=False,
+    default=DEFAULT_CACHE_SIZE,
+    type=click.IntRange(0, None),
+    help='Number of verified signatures to remember so retried requests skip verification. '
+         '0 disables the cache. Default is {}.'.format(DEFAULT_CACHE_SIZE)
+)
+@click.option(
+    '--sig-cache-ttl',
+    multiple=False,
+    default=DEFAULT_CACHE_TTL,
+    type=click.IntRange(0, None),
+    help='Seconds a verified signature is remembered. 0 means until evicted. Default is {}.'.format(DEFAULT_CACHE_TTL)
+)
+@click.option(
+    '--verify-workers',
+    multiple=False,
+    default=DEFAULT_POOL_SIZE,
+    type=click.IntRange(0, None),
+    help='Number of processes verifying signatures while the server keeps serving other connections. '
+         '0 verifies in the server process. Default is {}.'.format(DEFAULT_POOL_SIZE)
+)
+@click.option(
+    '--workers',
+    '-w',
+    multiple=False,
+    default=1,
+    type=click.IntRange(1, None),
+    help='Number of server processes sharing the port and database. '
+         'Workers that die are restarted. Default is 1.'
+)
+@click.option(
+    '--server',
+    type=click.Choice(['ioflo', 'asyncio']),
+    default='ioflo',
+    help='Server running the app. ioflo services connections on the flo scheduler tick, '
+         'asyncio as soon as they are ready. Default is ioflo.'
+)
+def main(port, version, verbose, path, mode, map_size, max_map_size, writemap, map_async, readahead, max_readers,
+         sync, metasync, codec, sig_cache_size, sig_cache_ttl, verify_workers, workers, server):
     if version:
         click.echo(__version__)
         return
@@ -96,20 +194,61 @@ def main(port, version, verbose, path, mode):
 
     verbose = VERBIAGE_NAMES.index(verbose)
 
-    ioflo.app.run.run(name="skedder",
-                      period=100,
-                      real=True,
-                      retro=True,
-                      filepath=floScriptpath,
-                      behaviors=['didery.core'],
-                      mode='',
-                      username='',
-                      password='',
-                      verbose=verbose,
-                      consolepath='',
-                      statistics=False,
-                      preloads=[
-                          ('.main.server.port', odict(value=port)),
-                          ('.main.server.db', odict(value=path)),
-                          ('.main.server.mode', odict(value=mode)),
-                      ])
+    lmdbOptions = odict(
+        mapSize=map_size * 1024 * 1024,
+        maxMapSize=max_map_size * 1024 * 1024,
+        writemap=writemap,
+        mapAsync=map_async,
+        readahead=readahead,
+        maxReaders=max_readers,
+        sync=sync,
+        metasync=metasync,
+        codec=codec,
+    )
+
+    def runServer(worker=0):
+        ioflo.app.run.run(name="skedder",
+                          period=100,
+                          real=True,
+                          retro=True,
+                          filepath=floScriptpath,
+                          behaviors=['didery.core'],
+                          mode='',
+                          username='',
+                          password='',
+                          verbose=verbose,
+                          consolepath='',
+                          statistics=False,
+                          preloads=[
+                              ('.main.server.port', odict(value=port)),
+                              ('.main.server.db', odict(value=path)),
+                              ('.main.server.mode', odict(value=mode)),
+                              ('.main.server.lmdb', odict(value=lmdbOptions)),
+                              ('.main.server.sigCache', odict(value=odict(size=sig_cache_size, ttl=sig_cache_ttl))),
+                              ('.main.server.verifyWorkers', odict(value=verify_workers)),
+                              ('.main.server.workers', odict(value=workers)),
+                          ])
+
+    def runAsyncServer(worker=0):
+        from didery.core import aioserving  # async generators need python 3.6
+
+        getConsole().reinit(verbosity=verbose)
+        app = wsgi.createApp(path,
+                             mode,
+                             port=port,
+                             lmdb=lmdbOptions,
+                             sigCache=odict(size=sig_cache_size, ttl=sig_cache_ttl),
+                             verifyWorkers=verify_workers,
+                             shared=workers > 1,
+                             streamWait=0,
+                             streamGenerator=aioserving.historyEvents)
+        aioserving.runServer(app, port=port, reusePort=workers > 1)
+
+    if server == 'asyncio':
+        runServer = runAsyncServer
+
+    if workers > 1:
+        # each worker opens the database itself, lmdb environments must not cross a fork
+        Supervisor(workers, runServer).run()
+    else:
+        runServer()
@@ -20,7 +20,7 @@ class Event:
         """
         self.store = store
 
-    # @falcon.before(helping.parseQString)
+    @falcon.before(helping.parseQString)
     def on_get(self, req, resp, did=None):
         """
         Handle and respond to incoming GET request.
@@ -29,25 +29,22 @@ class Event:
         :param did: string
             URL parameter specifying a rotation history
         """
-        # offset = req.offset
-        # limit = req.limit
-
-        count = db.eventsDB.eventCount()
+        offset = req.offset
+        limit = req.limit
 
         if did is not None:
-            body = db.eventsDB.getEvent(did)
+            body = db.eventsDB.getEventJson(did)
 
             if body is None:
                 raise falcon.HTTPError(falcon.HTTP_404)
 
-            body = body.to_list()
+            resp.data = body  # already json, send as stored
         else:
-            # if offset >= count:
-                # resp.body = json.dumps({}, ensure_ascii=False)
-                # return
+            count = db.eventsDB.eventCount()
 
-            body = db.eventsDB.getAllEvents(limit=count)
+            if offset >= count:
+                resp.body = json.dumps({}, ensure_ascii=False)
+                return
 
             resp.append_header('X-Total-Count', count)
-
-        resp.body = json.dumps(body, ensure_ascii=False)
+            resp.stream = db.eventsDB.streamAllEvents(offset, limit, req.cursor)
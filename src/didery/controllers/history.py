@@ -8,11 +8,14 @@ except ImportError:
     import json
 
 from ..help import helping
-from ..did.didering import Did, getDIDModel
+from ..did.didering import Did, getDIDModel, parseDid
 from ..db import dbing as db
+from ..db import publishing
 from ..controllers.validation import factory
 from ..models.models import BasicHistoryModel
 
+HEARTBEAT_INTERVAL = 15  # seconds between keep alive comments on idle history streams
+
 
 def validate(req, resp, resource, params):
     """
@@ -24,8 +27,8 @@ def validate(req, resp, resource, params):
     :param resource: History controller object
     :param params: (dict) URI Template field names
     """
-    validator = factory.historyFactory(resource.mode, req, params)
-    validator.validate()
+    factory.prepareHistoryRequest(req, params)
+    resource.validators[req.method.upper()].validate(req, params)
 
 
 class History:
@@ -36,6 +39,7 @@ class History:
         """
         self.store = store
         self.mode = mode
+        self.validators = factory.historyPipelines(mode)  # built once, shared by every request
 
     @falcon.before(helping.parseQString)
     def on_get(self, req, resp, did=None):
@@ -49,23 +53,22 @@ class History:
         offset = req.offset
         limit = req.limit
 
-        count = db.historyDB.historyCount()
-
         if did is not None:
-            body = db.historyDB.getHistory(did)
+            body = db.historyDB.getHistoryJson(did)
             if body is None:
                 raise falcon.HTTPError(falcon.HTTP_404)
-            body = body.data
+
+            resp.data = body  # already json, send as stored
+            return
         else:
+            count = db.historyDB.historyCount()
+
             if offset >= count:
                 resp.body = json.dumps({}, ensure_ascii=False)
                 return
 
-            body = db.historyDB.getAllHistories(offset, limit)
-
             resp.append_header('X-Total-Count', count)
-
-        resp.body = json.dumps(body, ensure_ascii=False)
+            resp.stream = db.historyDB.streamAllHistories(offset, limit, req.cursor)
 
     @falcon.before(validate)
     def on_post(self, req, resp):
@@ -78,9 +81,16 @@ class History:
         sigs = req.signatures
         did = request_json.id
 
+        def save():
+            # concurrent requests for the did may have been validated too, the write transaction serializes them
+            factory.recheckHistoryRequest(self.validators["POST"], req, {})
+            response_json = db.historyDB.saveHistory(did, request_json.data, sigs)
+            db.eventsDB.saveEvent(did, request_json.data, sigs)
+
+            return response_json
+
         # TODO: review signature validation for any holes
-        response_json = db.historyDB.saveHistory(did, request_json.data, sigs)
-        db.eventsDB.saveEvent(did, request_json.data, sigs)
+        response_json = db.atomic(save)
 
         resp.body = json.dumps(response_json, ensure_ascii=False)
         resp.status = falcon.HTTP_201
@@ -96,9 +106,15 @@ class History:
         request_data = BasicHistoryModel(req.body)
         sigs = req.signatures
 
+        def save():
+            factory.recheckHistoryRequest(self.validators["PUT"], req, {"did": did})
+            response_json = db.historyDB.saveHistory(did, request_data.data, sigs, req.historyContext.record)
+            db.eventsDB.saveEvent(did, request_data.data, sigs)
+
+            return response_json
+
         # TODO: review signature validation for any holes
-        response_json = db.historyDB.saveHistory(did, request_data.data, sigs)
-        db.eventsDB.saveEvent(did, request_data.data, sigs)
+        response_json = db.atomic(save)
 
         resp.body = json.dumps(response_json, ensure_ascii=False)
 
@@ -120,61 +136,172 @@ class History:
                 if did_obj.match_vk(vk):
                     vk = None  # Delete all data
 
-        success = db.historyDB.deleteHistory(did, vk)
-        db.eventsDB.deleteEvent(did, vk)
+        def delete():
+            factory.recheckHistoryRequest(self.validators["DELETE"], req, {"did": did})
+            success = db.historyDB.deleteHistory(did, vk)
+            db.eventsDB.deleteEvent(did, vk)
 
-        if success is None:
-            raise falcon.HTTPError(falcon.HTTP_409,
-                                   'Deletion Error',
-                                   'Error while attempting to delete the resource.')
+            if success is None:  # abort so the event history is left untouched too
+                raise falcon.HTTPError(falcon.HTTP_409,
+                                       'Deletion Error',
+                                       'Error while attempting to delete the resource.')
+
+            return success
+
+        success = db.atomic(delete)
 
         success = success if isinstance(success, list) else [success]
 
         resp.body = json.dumps({"deleted": success}, ensure_ascii=False)
 
 
+class HistoryBatch:
+    def __init__(self, store=None, mode=None):
+        """
+        :param store: Store
+            store is reference to ioflo data store
+        :param mode: (string) mode that didery is operating in
+        """
+        self.store = store
+        self.mode = mode
+        self.validator = factory.historyFactory(mode, "POST")
+        self.unique = mode != "promiscuous"  # promiscuous mode keeps every version of a did
+
+    def on_post(self, req, resp):
+        """
+        Handle and respond to incoming batch POST request. Every record is
+        validated like a single POST and all accepted records are stored in
+        one transaction.
+        :param req: Request object
+        :param resp: Response object
+        """
+        items = factory.parseBatch(req)
+        errors = factory.validateBatch(self.validator, factory.prepareHistoryRequest, items, self.unique)
+
+        def save():
+            for index, item in enumerate(items):
+                if errors[index] is not None:
+                    continue
+
+                try:
+                    factory.recheckHistoryRequest(self.validator, item, {})
+                except falcon.HTTPError as ex:
+                    errors[index] = ex
+                    continue
+
+                request_json = BasicHistoryModel(item.body)
+                db.historyDB.saveHistory(request_json.id, request_json.data, item.signatures)
+                db.eventsDB.saveEvent(request_json.id, request_json.data, item.signatures)
+
+        db.atomic(save)
+
+        statuses = [factory.batchStatus(error, item.did) for item, error in zip(items, errors)]
+
+        resp.body = json.dumps({"data": statuses}, ensure_ascii=False)
+
+
 class HistoryStream:
-    def __init__(self, store=None):
+    def __init__(self, store=None, wait=0, generator=None):
         """
         :param store: Store
             store is reference to ioflo data store
+        :param wait: float
+            seconds to wait for changes before yielding an empty chunk. 0
+            never blocks, for servers like ioflo's Valet that service every
+            connection from one thread
+        :param generator: function
+            taking the subscription and the missed events and returning the
+            response stream, historyGenerator if None. didery.core.aioserving
+            passes its async generator.
         """
         self.store = store
-        self.id = 0
-        self.history = None
+        self.wait = wait
+        self.generator = generator if generator is not None else self.historyGenerator
 
-    def historyGenerator(self, did=None):
-        if did is None:
-            count = db.historyDB.historyCount()
-            if self.history == count:
-                time.sleep(2)
-            else:
-                self.history = count
-                history = db.historyDB.getAllHistories(limit=self.history)
-                temp = []
-                for entry in history['data']:
-                    temp.append(json.loads(entry.decode('utf-8')))
-
-                history = {"data": temp}
-                yield bytes("\nid:" + str(self.id) + "\nevent:message\ndata:" + str(history) + "\n\n", "ascii")
-                self.id += 1
-                time.sleep(2)
+    def historyGenerator(self, subscription, missed=b''):
+        """
+        Yields server-sent events for the changes subscription receives. Yields
+        empty chunks while there is nothing to send so the server can service
+        other connections. Unless self.wait is set it never waits for changes itself.
 
-        else:
-            value = db.historyDB.getHistory(did)
-            if value is None:
-                raise falcon.HTTPError(falcon.HTTP_404)
+        :param subscription: publishing.Subscription
+        :param missed: bytes server-sent events to send before the live changes
+        """
+        try:
+            if missed:
+                yield missed
+
+            heartbeat = time.monotonic() + HEARTBEAT_INTERVAL
+
+            while True:
+                if self.wait:
+                    # changes of other processes only show up in the log
+                    publishing.historyChanges.catchUp()
+                    subscription.wait(self.wait)
+
+                events = subscription.drain()
 
-            if self.history == value:
-                time.sleep(2)
-            else:
-                self.history = value
-                print(self.history)
-                yield bytes("\nid:" + str(self.id) + "\nevent:message\ndata:" + str(self.history) + "\n\n", "ascii")
-                self.id += 1
-                time.sleep(2)
+                if not events and time.monotonic() >= heartbeat:
+                    events = b":\n\n"  # comment line, fails the write if the subscriber went away
+
+                if events:
+                    heartbeat = time.monotonic() + HEARTBEAT_INTERVAL
+
+                yield events
+        finally:
+            subscription.close()
 
     def on_get(self, req, resp, did=None):
+        """
+        Handle and respond to incoming GET request by streaming rotation
+        history changes as server-sent events. A client reconnecting with a
+        Last-Event-ID header is sent the changes it missed first.
+        :param req: Request object
+        :param resp: Response object
+        :param did: string
+            URL parameter limiting the stream to one rotation history
+        """
+        lastEventId = req.get_header("Last-Event-ID")
+
+        if lastEventId is not None:
+            try:
+                lastEventId = int(lastEventId)
+            except ValueError:
+                raise falcon.HTTPError(falcon.HTTP_400,
+                                       'Malformed Header',
+                                       'Last-Event-ID must be an integer.')
+
+        if did is not None:
+            try:
+                did = parseDid(did).did
+            except ValueError as ex:
+                raise falcon.HTTPError(falcon.HTTP_400,
+                                       'Validation Error',
+                                       "Invalid did format. {}".format(str(ex)))
+
+        # subscribe before reading so no change between the two is missed
+        subscription = publishing.historyChanges.subscribe(did)
+        changes = db.historyDB.changes
+        latest = changes.latest()
+        oldest = changes.oldest()
+        subscription.after = latest  # later changes are delivered live
+        missed = b''
+
+        if lastEventId is not None and (oldest is None or oldest <= lastEventId + 1):
+            # everything the client missed is still in the change log
+            missed = b''.join(publishing.formatEvent(sequence, data)
+                              for sequence, data in changes.since(lastEventId, did) if sequence <= latest)
+        elif did is not None:
+            body = db.historyDB.getHistoryJson(did)
+            if body is None:
+                subscription.close()
+                raise falcon.HTTPError(falcon.HTTP_404)
+
+            missed = publishing.formatEvent(latest, b'{"id": ' + json.dumps(did).encode() + b', "history": ' + body + b'}')
+        elif lastEventId is not None:
+            # changes were dropped from the log, the client has to reload everything
+            missed = publishing.formatEvent(latest, json.dumps({"oldest": oldest}).encode(), b"reset")
+
         resp.status = falcon.HTTP_200
         resp.content_type = "text/event-stream"
-        resp.stream = self.historyGenerator(did)
+        resp.stream = self.generator(subscription, missed)
@@ -19,8 +19,8 @@ def validate(req, resp, resource, params):
     :param resource: OtpBlob object
     :param params: dict of url params
     """
-    validator = factory.blobFactory(resource.mode, req, params)
-    validator.validate()
+    factory.prepareBlobRequest(req, params)
+    resource.validators[req.method.upper()].validate(req, params)
 
 
 class OtpBlob:
@@ -31,6 +31,7 @@ class OtpBlob:
         """
         self.store = store
         self.mode = mode
+        self.validators = factory.blobPipelines(mode)  # built once, shared by every request
 
     @falcon.before(helping.parseQString)
     def on_get(self, req, resp, did=None):
@@ -44,22 +45,22 @@ class OtpBlob:
         offset = req.offset
         limit = req.limit
 
-        count = db.otpDB.otpBlobCount()
-
         if did is not None:
-            body = db.otpDB.getOtpBlob(did)
+            body = db.otpDB.getOtpBlobJson(did)
             if body is None:
                 raise falcon.HTTPError(falcon.HTTP_404)
+
+            resp.data = body  # already json, send as stored
+            return
         else:
+            count = db.otpDB.otpBlobCount()
+
             if offset >= count:
                 resp.body = json.dumps({}, ensure_ascii=False)
                 return
 
-            body = db.otpDB.getAllOtpBlobs(offset, limit)
-
             resp.append_header('X-Total-Count', count)
-
-        resp.body = json.dumps(body, ensure_ascii=False)
+            resp.stream = db.otpDB.streamAllOtpBlobs(offset, limit, req.cursor)
 
     @falcon.before(validate)
     def on_post(self, req, resp):
@@ -72,13 +73,14 @@ class OtpBlob:
         sigs = req.signatures
         did = result_json['id']
 
-        if db.otpDB.getOtpBlob(did) is not None:
-            raise falcon.HTTPError(falcon.HTTP_400,
-                                   'Resource Already Exists',
-                                   'Resource with did "{}" already exists. Use PUT request.'.format(result_json['id']))
+        def save():
+            # concurrent requests for the did may have been validated too, the write transaction serializes them
+            self.validators["POST"].recheck(req, {})
+
+            return db.otpDB.saveOtpBlob(did, result_json, sigs)
 
         # TODO: review signature validation for any holes
-        response_json = db.otpDB.saveOtpBlob(did, result_json, sigs)
+        response_json = db.atomic(save)
 
         resp.body = json.dumps(response_json, ensure_ascii=False)
         resp.status = falcon.HTTP_201
@@ -94,20 +96,23 @@ class OtpBlob:
         result_json = req.body
         sigs = req.signatures
 
-        resource = db.otpDB.getOtpBlob(did)
+        def save():
+            resource = db.otpDB.getOtpBlob(did)
+
+            if resource is None:
+                raise falcon.HTTPError(falcon.HTTP_404)
 
-        if resource is None:
-            raise falcon.HTTPError(falcon.HTTP_404)
+            current = arrow.get(resource['otp_data']['changed'])
+            update = arrow.get(result_json['changed'])
+            if current >= update:
+                raise falcon.HTTPError(falcon.HTTP_400,
+                                       'Validation Error',
+                                       '"changed" field not later than previous update.')
 
-        current = arrow.get(resource['otp_data']['changed'])
-        update = arrow.get(result_json['changed'])
-        if current >= update:
-            raise falcon.HTTPError(falcon.HTTP_400,
-                                   'Validation Error',
-                                   '"changed" field not later than previous update.')
+            return db.otpDB.saveOtpBlob(did, result_json, sigs)
 
         # TODO: review signature validation for any holes
-        response_json = db.otpDB.saveOtpBlob(did, result_json, sigs)
+        response_json = db.atomic(save)
 
         resp.body = json.dumps(response_json, ensure_ascii=False)
 
@@ -119,13 +124,58 @@ class OtpBlob:
             :param resp: Response object
             :param did: decentralized identifier
         """
-        resource = req.otp
+        def delete():
+            self.validators["DELETE"].recheck(req, {"did": did})
 
-        success = db.otpDB.deleteOtpBlob(did)
+            if not db.otpDB.deleteOtpBlob(did):
+                raise falcon.HTTPError(falcon.HTTP_409,
+                                       'Deletion Error',
+                                       'Error while attempting to delete the resource.')
 
-        if not success:
-            raise falcon.HTTPError(falcon.HTTP_409,
-                                   'Deletion Error',
-                                   'Error while attempting to delete the resource.')
+            return req.otp
+
+        resource = db.atomic(delete)
 
         resp.body = json.dumps({"deleted": resource}, ensure_ascii=False)
+
+
+class OtpBlobBatch:
+    def __init__(self, store=None, mode=None):
+        """
+        :param store: Store
+            store is reference to ioflo data store
+        :param mode: (string) mode that didery is operating in
+        """
+        self.store = store
+        self.mode = mode
+        self.validator = factory.blobFactory(mode, "POST")
+
+    def on_post(self, req, resp):
+        """
+        Handle and respond to incoming batch POST request. Every blob is
+        validated like a single POST and all accepted blobs are stored in
+        one transaction.
+        :param req: Request object
+        :param resp: Response object
+        """
+        items = factory.parseBatch(req)
+        errors = factory.validateBatch(self.validator, factory.prepareBlobRequest, items)
+
+        def save():
+            for index, item in enumerate(items):
+                if errors[index] is not None:
+                    continue
+
+                try:
+                    self.validator.recheck(item, {})
+                except falcon.HTTPError as ex:
+                    errors[index] = ex
+                    continue
+
+                db.otpDB.saveOtpBlob(item.did, item.body, item.signatures)
+
+        db.atomic(save)
+
+        statuses = [factory.batchStatus(error, item.did) for item, error in zip(items, errors)]
+
+        resp.body = json.dumps({"data": statuses}, ensure_ascii=False)
@@ -0,0 +1,37 @@
+import falcon
+
+try:
+    import simplejson as json
+except ImportError:
+    import json
+
+from didery.crypto import caching
+
+
+class Status:
+    def __init__(self, store=None):
+        """
+        :param store: Store
+            store is reference to ioflo data store
+        """
+        self.store = store
+
+    """
+    For manual testing of the endpoint:
+        http localhost:8080/status
+    """
+    def on_get(self, req, resp):
+        """
+        Handle and respond to incoming GET request with the counters of the
+        serving process, like the hits and misses of the verified signature
+        cache, so the cache size and ttl can be tuned while it runs.
+        :param req: Request object
+        :param resp: Response object
+        """
+        cache = caching.verifiedSignatures
+
+        body = {
+            "verifiedSignatures": cache.stats() if cache is not None else None
+        }
+
+        resp.body = json.dumps(body, ensure_ascii=False)
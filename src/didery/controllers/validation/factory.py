@@ -1,16 +1,67 @@
+import io
+import falcon
+
 from didery.controllers.validation import validating as validation
+from didery.did.didering import parseDid
 from didery.help import helping
 
+METHODS = ("POST", "PUT", "DELETE")
+MAX_BATCH_SIZE = 1000  # most records accepted by one batch request
+
 
-def historyFactory(mode, req, params):
+class BatchItem:
     """
-    Build Request Validators
+    Stands in for the falcon.Request of one record in a batch so it can go
+    through the same validator pipeline as a single request.
+    """
+    def __init__(self, method, raw, signature, error=None):
+        """
+        :param method: (string) HTTP method the record is validated for
+        :param raw: (bytes) json encoded record exactly as it was signed
+        :param signature: (string) Signature header value for the record
+        :param error: falcon.HTTPError the record is rejected with before validation
+        """
+        self.method = method
+        self.stream = io.BytesIO(raw)
+        self.signature = signature
+        self.error = error
+        self.did = None  # set by prepare, stays None if the record is rejected first
+
+    def get_header(self, name, required=False):
+        if name.lower() == "signature" and self.signature:
+            return self.signature
+
+        if required:
+            raise falcon.HTTPMissingHeader(name)
+
+        return None
+
+
+def parseRecordBody(req):
+    """
+    Parse the json body of req into req.body and return the raw bytes
+
+    :param req: falcon.Request object
+    :return: bytes
+    """
+    raw = helping.parseReqBody(req)
+
+    if not isinstance(req.body, dict):
+        raise falcon.HTTPError(falcon.HTTP_400,
+                               'Malformed JSON',
+                               'Request body must be a JSON object.')
+
+    return raw
+
+
+def prepareHistoryRequest(req, params):
+    """
+    Attach the per request state the history validators work on to req
 
-    :param mode: (string) mode that didery is operating in
     :param req: falcon.Request object
     :param params: (dict) URI Template field names
     """
-    req.raw = helping.parseReqBody(req)
+    req.raw = parseRecordBody(req)
 
     did = None
     if "id" in req.body:
@@ -18,134 +69,309 @@ def historyFactory(mode, req, params):
     elif "did" in params:
         did = params["did"]
 
-    validators = []
+    req.did = did
 
-    if req.method == "POST" or req.method == "post":
+    # stored history of the did in the url, loaded at most once per request
+    req.historyContext = validation.HistoryContext(params.get("did"))
+
+
+def prepareBlobRequest(req, params):
+    """
+    Attach the per request state the blob validators work on to req
+
+    :param req: falcon.Request object
+    :param params: (dict) URI Template field names
+    """
+    req.raw = parseRecordBody(req)
+
+    did = None
+    if "id" in req.body:
+        did = req.body["id"]
+
+    req.did = did
+
+
+def recheckHistoryRequest(pipeline, req, params):
+    """
+    Run the validators of pipeline that depend on stored records again with
+    the stored history read afresh. Called inside the unit of work saving
+    req, see CompositeValidator.recheck.
+
+    :param pipeline: CompositeValidator req was validated with
+    :param req: falcon.Request object
+    :param params: (dict) URI Template field names
+    """
+    req.historyContext.reload()
+    pipeline.recheck(req, params)
+
+
+def historyFactory(mode, method):
+    """
+    Build Request Validators
+
+    :param mode: (string) mode that didery is operating in
+    :param method: (string) HTTP method of the requests to validate
+    :return: CompositeValidator or None if method is not supported
+    """
+    method = method.upper()
+
+    if method == "POST":
         validators = [
-            validation.RequiredFieldsValidator(req, params, ["id", "changed", "signer", "signers"]),
-            validation.HasSignatureHeaderValidator(req, params),
-            validation.ParamsNotAllowedValidator(req, params),
-            validation.SignersIsListOrArrayValidator(req, params),
-            validation.FieldNotEmptyValidator(req, params, "id"),
-            validation.FieldNotEmptyValidator(req, params, "changed"),
-            validation.SignerIsIntValidator(req, params),
-            validation.ChangedIsISODatetimeValidator(req, params),
-            validation.NoEmptyKeysValidator(req, params),
-            validation.DIDFormatValidator(req, params, did),
-            validation.FieldNotEmptyValidator(req, params, "signers"),
-            validation.ContainsPreRotationValidator(req, params),
-            validation.SignersKeysNotNoneValidator(req, params),
-            validation.SignerIsZeroValidator(req, params),
-            validation.InceptionSigValidator(req, params),
+            validation.RequiredFieldsValidator(["id", "changed", "signer", "signers"]),
+            validation.HasSignatureHeaderValidator(),
+            validation.ParamsNotAllowedValidator(),
+            validation.SignersIsListOrArrayValidator(),
+            validation.FieldNotEmptyValidator("id"),
+            validation.FieldNotEmptyValidator("changed"),
+            validation.SignerIsIntValidator(),
+            validation.ChangedIsISODatetimeValidator(),
+            validation.NoEmptyKeysValidator(),
+            validation.DIDFormatValidator(),
+            validation.FieldNotEmptyValidator("signers"),
+            validation.ContainsPreRotationValidator(),
+            validation.SignersKeysNotNoneValidator(),
+            validation.SignerIsZeroValidator(),
+            validation.InceptionSigValidator(),
         ]
-    elif req.method == "PUT" or req.method == "put":
+    elif method == "PUT":
         validators = [
-            validation.RequiredFieldsValidator(req, params, ["id", "changed", "signer", "signers"]),
-            validation.HasSignatureHeaderValidator(req, params),
-            validation.SignersIsListOrArrayValidator(req, params),
-            validation.FieldNotEmptyValidator(req, params, "id"),
-            validation.FieldNotEmptyValidator(req, params, "changed"),
-            validation.SignerIsIntValidator(req, params),
-            validation.ChangedIsISODatetimeValidator(req, params),
-            validation.NoEmptyKeysValidator(req, params),
-            validation.DidInURLValidator(req, params),
-            validation.MinSignersLengthValidator(req, params, 3),
-            validation.SignerValueValidator(req, params),
-            validation.ContainsPreRotationOrRevokedValidator(req, params),
-            validation.URLDidMatchesIdValidator(req, params),
-            validation.SignersNotNoneValidator(req, params),
-            validation.DIDFormatValidator(req, params, did),
-            validation.RotationSigValidator(req, params),
-            validation.ChangedLaterThanPreviousValidator(req, params),
-            validation.SignersNotChangedValidator(req, params),
-            validation.SignerIncrementValidator(req, params),  # Patches Security Exploit
+            validation.RequiredFieldsValidator(["id", "changed", "signer", "signers"]),
+            validation.HasSignatureHeaderValidator(),
+            validation.SignersIsListOrArrayValidator(),
+            validation.FieldNotEmptyValidator("id"),
+            validation.FieldNotEmptyValidator("changed"),
+            validation.SignerIsIntValidator(),
+            validation.ChangedIsISODatetimeValidator(),
+            validation.NoEmptyKeysValidator(),
+            validation.DidInURLValidator(),
+            validation.MinSignersLengthValidator(3),
+            validation.SignerValueValidator(),
+            validation.ContainsPreRotationOrRevokedValidator(),
+            validation.URLDidMatchesIdValidator(),
+            validation.SignersNotNoneValidator(),
+            validation.DIDFormatValidator(),
+            validation.RotationSigValidator(),
+            validation.ChangedLaterThanPreviousValidator(),
+            validation.SignersNotChangedValidator(),
+            validation.SignerIncrementValidator(),  # Patches Security Exploit
         ]
-    elif req.method == "DELETE" or req.method == "delete":
+    elif method == "DELETE":
         validators = [
-            validation.RequiredFieldsValidator(req, params, ["vk"]),
-            validation.HasSignatureHeaderValidator(req, params),
-            validation.DidInURLValidator(req, params),
-            validation.DIDFormatValidator(req, params, did),
-            validation.FieldNotEmptyValidator(req, params, "vk"),
-            validation.DeletionSigValidator(req, params),
+            validation.RequiredFieldsValidator(["vk"]),
+            validation.HasSignatureHeaderValidator(),
+            validation.DidInURLValidator(),
+            validation.DIDFormatValidator(),
+            validation.FieldNotEmptyValidator("vk"),
+            validation.DeletionSigValidator(),
         ]
     else:
         # TODO add error logging here
         return None
 
     if mode == "race":
-        if req.method == "POST" or req.method == "post":
-            validators.append(validation.CascadingValidationValidator(req, params, did))
-            validators.append(validation.HistoryDoesntExistValidator(req, params))
+        if method == "POST":
+            validators.append(validation.CascadingValidationValidator())
+            validators.append(validation.HistoryDoesntExistValidator())
     elif mode == "promiscuous":
-        if req.method == "POST" or req.method == "post":
-            validators.append(validation.CascadingValidationValidator(req, params, did))
+        if method == "POST":
+            validators.append(validation.CascadingValidationValidator())
     elif mode == "method":
-        if req.method == "POST" or req.method == "post":
-            validators.append(validation.DidMethodExistsValidator(req, params, did))
-            validators.append(validation.DidHijackingValidator(req, params, did))
-            validators.append(validation.HistoryDoesntExistValidator(req, params))
+        if method == "POST":
+            validators.append(validation.DidMethodExistsValidator())
+            validators.append(validation.DidHijackingValidator())
+            validators.append(validation.HistoryDoesntExistValidator())
 
-    return validation.CompositeValidator(req, params, validators)
+    return validation.CompositeValidator(validation.ordered(validators))
 
 
-def blobFactory(mode, req, params):
+def blobFactory(mode, method):
     """
     Build Request Validators
 
     :param mode: (string) mode that didery is operating in
-    :param req: falcon.Request object
-    :param params: (dict) URI Template field names
+    :param method: (string) HTTP method of the requests to validate
+    :return: CompositeValidator or None if method is not supported
     """
-    req.raw = helping.parseReqBody(req)
+    method = method.upper()
 
-    did = None
-    if "id" in req.body:
-        did = req.body["id"]
-
-    validators = []
-
-    if req.method == "POST" or req.method == "post":
+    if method == "POST":
         validators = [
-            validation.RequiredFieldsValidator(req, params, ["id", "blob", "changed"]),
-            validation.HasSignatureHeaderValidator(req, params),
-            validation.ParamsNotAllowedValidator(req, params),
-            validation.FieldNotEmptyValidator(req, params, "id"),
-            validation.FieldNotEmptyValidator(req, params, "blob"),
-            validation.FieldNotEmptyValidator(req, params, "changed"),
-            validation.ChangedIsISODatetimeValidator(req, params),
-            validation.DIDFormatValidator(req, params, did),
-            validation.DADValidator(req, params),
-            validation.BlobSigValidator(req, params),
-            validation.BlobDoesntExistValidator(req, params)
+            validation.RequiredFieldsValidator(["id", "blob", "changed"]),
+            validation.HasSignatureHeaderValidator(),
+            validation.ParamsNotAllowedValidator(),
+            validation.FieldNotEmptyValidator("id"),
+            validation.FieldNotEmptyValidator("blob"),
+            validation.FieldNotEmptyValidator("changed"),
+            validation.ChangedIsISODatetimeValidator(),
+            validation.DIDFormatValidator(),
+            validation.DADValidator(),
+            validation.BlobSigValidator(),
+            validation.BlobDoesntExistValidator()
         ]
-    elif req.method == "PUT" or req.method == "put":
+    elif method == "PUT":
         validators = [
-            validation.RequiredFieldsValidator(req, params, ["id", "blob", "changed"]),
-            validation.HasSignatureHeaderValidator(req, params),
-            validation.FieldNotEmptyValidator(req, params, "id"),
-            validation.FieldNotEmptyValidator(req, params, "blob"),
-            validation.FieldNotEmptyValidator(req, params, "changed"),
-            validation.ChangedIsISODatetimeValidator(req, params),
-            validation.DIDFormatValidator(req, params, did),
-            validation.DADValidator(req, params),
-            validation.DidInURLValidator(req, params),
-            validation.URLDidMatchesIdValidator(req, params),
-            validation.BlobSigValidator(req, params)
+            validation.RequiredFieldsValidator(["id", "blob", "changed"]),
+            validation.HasSignatureHeaderValidator(),
+            validation.FieldNotEmptyValidator("id"),
+            validation.FieldNotEmptyValidator("blob"),
+            validation.FieldNotEmptyValidator("changed"),
+            validation.ChangedIsISODatetimeValidator(),
+            validation.DIDFormatValidator(),
+            validation.DADValidator(),
+            validation.DidInURLValidator(),
+            validation.URLDidMatchesIdValidator(),
+            validation.BlobSigValidator()
         ]
-    elif req.method == "DELETE" or req.method == "delete":
+    elif method == "DELETE":
         validators = [
-            validation.RequiredFieldsValidator(req, params, ["id"]),
-            validation.HasSignatureHeaderValidator(req, params),
-            validation.DidInURLValidator(req, params),
-            validation.FieldNotEmptyValidator(req, params, "id"),
-            validation.URLDidMatchesIdValidator(req, params),
-            validation.DIDFormatValidator(req, params, did),
-            validation.DeleteBlobSigValidator(req, params),
-            validation.OTPDeleteIdenticalSigsValidator(req, params)
+            validation.RequiredFieldsValidator(["id"]),
+            validation.HasSignatureHeaderValidator(),
+            validation.DidInURLValidator(),
+            validation.FieldNotEmptyValidator("id"),
+            validation.URLDidMatchesIdValidator(),
+            validation.DIDFormatValidator(),
+            validation.DeleteBlobSigValidator(),
+            validation.OTPDeleteIdenticalSigsValidator()
         ]
     else:
         # TODO add error logging here
         return None
 
-    return validation.CompositeValidator(req, params, validators)
+    return validation.CompositeValidator(validation.ordered(validators))
+
+
+def historyPipelines(mode):
+    """
+    Build the history validator pipeline of every supported HTTP method once
+
+    :param mode: (string) mode that didery is operating in
+    :return: dict mapping HTTP method to CompositeValidator
+    """
+    return {method: historyFactory(mode, method) for method in METHODS}
+
+
+def blobPipelines(mode):
+    """
+    Build the blob validator pipeline of every supported HTTP method once
+
+    :param mode: (string) mode that didery is operating in
+    :return: dict mapping HTTP method to CompositeValidator
+    """
+    return {method: blobFactory(mode, method) for method in METHODS}
+
+
+def parseBatch(req):
+    """
+    Returns the records of a batch request as a list of BatchItem
+
+    A batch body is a json array of objects with a "body" field holding the
+    json encoded record as a string, so the exact signed bytes survive, and
+    a "signature" field holding what would be the Signature header of a
+    single request.
+
+    :param req: falcon.Request object
+    :return: list
+    """
+    helping.parseReqBody(req)
+
+    if not isinstance(req.body, list):
+        raise falcon.HTTPError(falcon.HTTP_400,
+                               'Malformed JSON',
+                               'Batch request body must be an array.')
+
+    if len(req.body) > MAX_BATCH_SIZE:
+        raise falcon.HTTPError(falcon.HTTP_413,
+                               'Batch Too Large',
+                               'Batch requests can contain at most {} records.'.format(MAX_BATCH_SIZE))
+
+    items = []
+    for entry in req.body:
+        if not isinstance(entry, dict) or not isinstance(entry.get("body"), str):
+            raise falcon.HTTPError(falcon.HTTP_400,
+                                   'Malformed JSON',
+                                   'Each batch record must have a body field holding the json encoded record.')
+
+        signature = entry.get("signature")
+        error = None
+
+        if signature is not None and not isinstance(signature, str):
+            signature = None
+            error = falcon.HTTPError(falcon.HTTP_400,
+                                     'Validation Error',
+                                     'signature field must be a string.')
+
+        items.append(BatchItem(req.method, entry["body"].encode('utf-8'), signature, error))
+
+    return items
+
+
+def validateBatch(pipeline, prepare, items, unique=True):
+    """
+    Run every item of a batch through pipeline. Structural and database
+    checks run for all items before any signature is verified, then the
+    signatures of the items that are left are verified together.
+
+    :param pipeline: CompositeValidator built by historyFactory or blobFactory
+    :param prepare: function preparing an item, prepareHistoryRequest or prepareBlobRequest
+    :param items: (list) BatchItem
+    :param unique: (boolean) reject records whose did appeared earlier in the batch
+    :return: list of falcon.HTTPError or None, one per item
+    """
+    cheap = [validator for validator in pipeline.validators if validator.cost < validation.COST_CRYPTO]
+    crypto = [validator for validator in pipeline.validators if validator.cost >= validation.COST_CRYPTO]
+
+    errors = [None] * len(items)
+    seen = set()
+
+    for index, item in enumerate(items):
+        try:
+            if item.error is not None:
+                raise item.error
+
+            prepare(item, {})
+
+            for validator in cheap:
+                validator.validate(item, {})
+
+            if unique:
+                did = parseDid(item.body["id"]).did
+                if did in seen:
+                    raise falcon.HTTPError(falcon.HTTP_400,
+                                           'Resource Already Exists',
+                                           'Resource with did "{}" appears more than once in the batch.'.format(did))
+                seen.add(did)
+        except falcon.HTTPError as ex:
+            errors[index] = ex
+
+    for index, item in enumerate(items):
+        if errors[index] is not None:
+            continue
+
+        try:
+            for validator in crypto:
+                validator.validate(item, {})
+        except falcon.HTTPError as ex:
+            errors[index] = ex
+
+    return errors
+
+
+def batchStatus(error, did=None):
+    """
+    Returns the per record status reported for a batch item
+
+    :param error: falcon.HTTPError or None if the record was stored
+    :param did: (string) did of the stored record
+    :return: dict
+    """
+    if error is None:
+        return {"id": did, "status": falcon.HTTP_201}
+
+    status = {"status": error.status}
+
+    if error.title is not None:
+        status["title"] = error.title
+    if error.description is not None:
+        status["description"] = error.description
+
+    return status
@@ -7,108 +7,182 @@ try:
 except ImportError:
     import json
 
-from didery.crypto import factory as cryptoFactory
+from didery.crypto import caching
+from didery.crypto import pooling
 from didery import didering
 from didery.did.methods.dad import Dad
-from didery.did.didering import Did
+from didery.did.didering import parseDid
 from didery.help import helping
 from didery.db import dbing as db
 from didery.models.models import BasicHistoryModel
 
+# Validator cost classes, pipelines run cheaper classes first
+COST_STRUCTURAL = 0  # only looks at the request
+COST_DB = 1          # reads the database
+COST_CRYPTO = 2      # verifies signatures
 
-class Validator:
-    def __init__(self, req, params):
+
+class HistoryContext:
+    """
+    Request scoped, load once access to the stored rotation history of a did.
+    Validators and the save path share one so a request decodes the stored
+    history at most once.
+    """
+    def __init__(self, did):
         """
-        :param req: (falcon.Request) Request object
-        :param params: (dict) URI Template field names
+        :param did: (string) W3C did of the history
         """
-        self.req = req
-        self.raw = req.raw
-        self.body = req.body
-        self.params = params
+        self.did = did
+        self.record = db.StoredRecord()
+        self.loaded = False
+        self._history = None
 
-    def validate(self):
+    @property
+    def history(self):
+        """
+        ValidatedHistoryModel of the stored history or None if it does not exist
+        """
+        if not self.loaded:
+            self._history = db.historyDB.getHistory(self.did, self.record)
+            self.loaded = True
+
+        return self._history
+
+    def reload(self):
+        """
+        Read the stored history again on the next access. It is only decoded
+        again if it changed since it was last read.
+        """
+        self.loaded = False
+
+
+class Validator:
+    """
+    Validators hold no per request state. They are built once and the request
+    is handed to validate so the same instance can check every request.
+    """
+    cost = COST_STRUCTURAL
+    stored = False  # outcome depends on stored records, checked again when the request is saved
+
+    def validate(self, req, params):
         """
         Validates request body, raises Falcon.HTTPError if validation fails.
+
+        :param req: (falcon.Request) Request object
+        :param params: (dict) URI Template field names
         """
         pass
 
+    def __repr__(self):
+        args = ", ".join(repr(value) for value in vars(self).values())
+
+        return "{}({})".format(self.__class__.__name__, args)
+
 
 class CompositeValidator(Validator):
-    def __init__(self, req, params, validators):
-        Validator.__init__(self, req, params)
+    def __init__(self, validators):
+        """
+        :param validators: (list) validators run in order
+        """
+        self.validators = tuple(validators)
+
+    @property
+    def cost(self):
+        return max([validator.cost for validator in self.validators], default=COST_STRUCTURAL)
 
-        self.validators = validators
+    @property
+    def stored(self):
+        return any(validator.stored for validator in self.validators)
 
-    def validate(self):
+    def validate(self, req, params):
         for validator in self.validators:
-            validator.validate()
+            validator.validate(req, params)
 
+    def recheck(self, req, params):
+        """
+        Run the validators whose outcome depends on stored records again.
+        Called inside the unit of work saving the request, so they see its
+        write transaction and a concurrent request that changed the record
+        after this one was validated is caught instead of overwritten.
 
-class RequiredFieldsValidator(Validator):
-    def __init__(self, req, params, required):
-        Validator.__init__(self, req, params)
+        :param req: (falcon.Request) Request object
+        :param params: (dict) URI Template field names
+        """
+        for validator in self.validators:
+            if validator.stored:
+                validator.validate(req, params)
 
+
+def ordered(validators):
+    """
+    Returns validators with nested CompositeValidators flattened, sorted so
+    structural checks run first, then database checks and signature
+    verification last. Validators of the same cost keep their order.
+
+    :param validators: (list) validators
+    :return: list
+    """
+    flat = []
+    for validator in validators:
+        if isinstance(validator, CompositeValidator):
+            flat.extend(ordered(validator.validators))
+        else:
+            flat.append(validator)
+
+    return sorted(flat, key=lambda validator: validator.cost)
+
+
+class RequiredFieldsValidator(Validator):
+    def __init__(self, required):
         self.requiredFields = required
 
-    def validate(self):
+    def validate(self, req, params):
         for required in self.requiredFields:
-            if required not in self.body:
+            if required not in req.body:
                 raise falcon.HTTPError(falcon.HTTP_400,
                                        'Missing Required Field',
                                        'Request must contain {} field.'.format(required))
 
 
 class HasSignatureHeaderValidator(Validator):
-    def __init__(self, req, params):
-        Validator.__init__(self, req, params)
-    
-    def validate(self):
-        header = self.req.get_header("Signature", required=True)
-        self.req.signatures = helping.parseSignatureHeader(header)
+    def validate(self, req, params):
+        header = req.get_header("Signature", required=True)
+        req.signatures = helping.parseSignatureHeader(header)
 
 
 class ParamsNotAllowedValidator(Validator):
-    def __init__(self, req, params):
-        Validator.__init__(self, req, params)
-
-    def validate(self):
+    def validate(self, req, params):
         # server crashes without this if someone adds anything after /history on POST requests
-        if self.params:
+        if params:
             raise falcon.HTTPError(falcon.HTTP_404)
 
 
 class HasSignatureValidator(Validator):
-    def __init__(self, req, params, sigs):
-        Validator.__init__(self, req, params)
-
-        self.sigs = sigs
-
-    def validate(self):
-        if len(self.sigs) == 0:
+    def validate(self, req, params):
+        if len(req.signatures) == 0:
             raise falcon.HTTPError(falcon.HTTP_401,
                                    'Authorization Error',
                                    'Empty Signature header.')
 
 
 class HistoryExistsValidator(Validator):
-    def __init__(self, req, params):
-        Validator.__init__(self, req, params)
+    cost = COST_DB
+    stored = True
 
-    def validate(self):
-        self.req.history = db.historyDB.getHistory(self.params['did'])
+    def validate(self, req, params):
+        req.history = req.historyContext.history
 
-        if self.req.history is None:
+        if req.history is None:
             raise falcon.HTTPError(falcon.HTTP_404)
 
 
 class VKExistsValidator(Validator):
-    def __init__(self, req, params):
-        Validator.__init__(self, req, params)
+    cost = COST_DB
+    stored = True
 
-    def validate(self):
-        vk = self.req.body["vk"]
-        history = db.historyDB.getHistory(did)
+    def validate(self, req, params):
+        vk = req.body["vk"]
+        history = db.historyDB.getHistory(params['did'])
         index = history.find(vk)
         if index is None:
             raise falcon.HTTPError(falcon.HTTP_400,
@@ -120,27 +194,27 @@ class OTPDeleteIdenticalSigsValidator(Validator):
     # Signatures cannot match the existing data
     # A Hacker can simply do a GET and then resend the data as a DELETE request.
     # If this happened everything would validate and the hacker would delete someones keys
-    def __init__(self, req, params):
-        Validator.__init__(self, req, params)
+    cost = COST_DB
+    stored = True
 
-    def validate(self):
-        sigs = self.req.signatures
-        otp = db.otpDB.getOtpBlob(self.params['did'])
+    def validate(self, req, params):
+        sigs = req.signatures
+        otp = db.otpDB.getOtpBlob(params['did'])
 
         if otp is not None:
             if otp['signatures'] == sigs:
                 raise falcon.HTTPError(falcon.HTTP_401,
                                        'Authorization Error',
                                        'Request signatures match existing signatures for {}. '
-                                       'Please choose different data to sign.'.format(self.params['did']))
+                                       'Please choose different data to sign.'.format(params['did']))
 
 
 class HistoryDoesntExistValidator(Validator):
-    def __init__(self, req, params):
-        Validator.__init__(self, req, params)
+    cost = COST_DB
+    stored = True
 
-    def validate(self):
-        did = self.body["id"]
+    def validate(self, req, params):
+        did = req.body["id"]
         if db.historyDB.getHistory(did) is not None:
             raise falcon.HTTPError(falcon.HTTP_400,
                                    'Resource Already Exists',
@@ -148,22 +222,22 @@ class HistoryDoesntExistValidator(Validator):
 
 
 class BlobExistsValidator(Validator):
-    def __init__(self, req, params):
-        Validator.__init__(self, req, params)
+    cost = COST_DB
+    stored = True
 
-    def validate(self):
-        self.req.otp = db.otpDB.getOtpBlob(self.params['did'])
+    def validate(self, req, params):
+        req.otp = db.otpDB.getOtpBlob(params['did'])
 
-        if self.req.otp is None:
+        if req.otp is None:
             raise falcon.HTTPError(falcon.HTTP_404)
 
 
 class BlobDoesntExistValidator(Validator):
-    def __init__(self, req, params):
-        Validator.__init__(self, req, params)
+    cost = COST_DB
+    stored = True
 
-    def validate(self):
-        did = self.body['id']
+    def validate(self, req, params):
+        did = req.body['id']
 
         if db.otpDB.getOtpBlob(did) is not None:
             raise falcon.HTTPError(falcon.HTTP_400,
@@ -172,14 +246,11 @@ class BlobDoesntExistValidator(Validator):
 
 
 class SignersIsListOrArrayValidator(Validator):
-    def __init__(self, req, params):
-        Validator.__init__(self, req, params)
-
-    def validate(self):
+    def validate(self, req, params):
         try:
-            if not isinstance(self.body['signers'], list):
-                self.body['signers'] = json.loads(
-                    self.body['signers'].replace("'", '"')
+            if not isinstance(req.body['signers'], list):
+                req.body['signers'] = json.loads(
+                    req.body['signers'].replace("'", '"')
                 )
         except ValueError:
             raise falcon.HTTPError(falcon.HTTP_400,
@@ -188,25 +259,20 @@ class SignersIsListOrArrayValidator(Validator):
 
 
 class FieldNotEmptyValidator(Validator):
-    def __init__(self, req, params, field):
-        Validator.__init__(self, req, params)
-
+    def __init__(self, field):
         self.field = field
 
-    def validate(self):
-        if len(self.body[self.field]) == 0:
+    def validate(self, req, params):
+        if len(req.body[self.field]) == 0:
             raise falcon.HTTPError(falcon.HTTP_400,
                                    'Validation Error',
                                    '{} field cannot be empty.'.format(self.field))
 
 
 class SignerIsIntValidator(Validator):
-    def __init__(self, req, params):
-        Validator.__init__(self, req, params)
-
-    def validate(self):
+    def validate(self, req, params):
         try:
-            int(self.body['signer'])
+            int(req.body['signer'])
         except ValueError:
             raise falcon.HTTPError(falcon.HTTP_400,
                                    'Validation Error',
@@ -214,12 +280,9 @@ class SignerIsIntValidator(Validator):
 
 
 class ChangedIsISODatetimeValidator(Validator):
-    def __init__(self, req, params):
-        Validator.__init__(self, req, params)
-
-    def validate(self):
+    def validate(self, req, params):
         try:
-            arrow.get(self.body["changed"])
+            arrow.get(req.body["changed"])
         except arrow.parser.ParserError as ex:
             raise falcon.HTTPError(falcon.HTTP_400,
                                    'Validation Error',
@@ -231,17 +294,15 @@ class ChangedIsISODatetimeValidator(Validator):
 
 
 class ChangedLaterThanPreviousValidator(Validator):
-    def __init__(self, req, params):
-        Validator.__init__(self, req, params)
+    cost = COST_DB
+    stored = True
 
-        self.request_data = BasicHistoryModel(req.body)
-        self.db_data = None
-
-    def validate(self):
-        self.db_data = db.historyDB.getHistory(self.params['did'])
-        self.db_data.selected = self.request_data.signers[0]
-        last_changed = self.db_data.parsedChanged
-        new_change = self.request_data.parsedChanged
+    def validate(self, req, params):
+        request_data = BasicHistoryModel(req.body)
+        db_data = req.historyContext.history
+        db_data.selected = request_data.signers[0]
+        last_changed = db_data.parsedChanged
+        new_change = request_data.parsedChanged
 
         if last_changed >= new_change:
             raise falcon.HTTPError(falcon.HTTP_400,
@@ -250,11 +311,8 @@ class ChangedLaterThanPreviousValidator(Validator):
 
 
 class NoEmptyKeysValidator(Validator):
-    def __init__(self, req, params):
-        Validator.__init__(self, req, params)
-
-    def validate(self):
-        for value in self.body['signers']:
+    def validate(self, req, params):
+        for value in req.body['signers']:
             if value == "":
                 raise falcon.HTTPError(falcon.HTTP_400,
                                        'Validation Error',
@@ -262,31 +320,26 @@ class NoEmptyKeysValidator(Validator):
 
 
 class SignersNotNoneValidator(Validator):
-    def __init__(self, req, params):
-        Validator.__init__(self, req, params)
-
-    def validate(self):
-        for key, value in enumerate(self.body['signers']):
-            if value is None and self.body['signer'] != key:
+    def validate(self, req, params):
+        for key, value in enumerate(req.body['signers']):
+            if value is None and req.body['signer'] != key:
                 raise falcon.HTTPError(falcon.HTTP_400,
                                        'Validation Error',
                                        'signers keys cannot be null unless revoking a key.')
 
 
 class SignersNotChangedValidator(Validator):
-    def __init__(self, req, params):
-        Validator.__init__(self, req, params)
-
-        self.request_data = BasicHistoryModel(req.body)
-        self.db_data = None
+    cost = COST_DB
+    stored = True
 
-    def validate(self):
-        self.db_data = db.historyDB.getHistory(self.params['did'])
-        self.db_data.selected = self.request_data.signers[0]
+    def validate(self, req, params):
+        request_data = BasicHistoryModel(req.body)
+        db_data = req.historyContext.history
+        db_data.selected = request_data.signers[0]
 
         # validate that previously rotated keys are not changed with this request
-        current = self.db_data.signers
-        update = self.request_data.signers
+        current = db_data.signers
+        update = request_data.signers
 
         if len(update) <= len(current):
             raise falcon.HTTPError(falcon.HTTP_400,
@@ -301,28 +354,20 @@ class SignersNotChangedValidator(Validator):
 
 
 class SigExistsValidator(Validator):
-    def __init__(self, req, params, sigs, sig_name):
-        Validator.__init__(self, req, params)
-
-        self.sig_name = sig_name
-        self.sig = sigs.get(sig_name)  # str not bytes
+    def __init__(self, sigName):
+        self.sigName = sigName
 
-    def validate(self):
-        if not self.sig:
+    def validate(self, req, params):
+        if not req.signatures.get(self.sigName):  # str not bytes
             raise falcon.HTTPError(falcon.HTTP_401,
                                    'Authorization Error',
-                                   'Signature header missing signature for "' + self.sig_name + '".')
+                                   'Signature header missing signature for "' + self.sigName + '".')
 
 
 class DIDFormatValidator(Validator):
-    def __init__(self, req, params, did):
-        Validator.__init__(self, req, params)
-
-        self.did = did
-
-    def validate(self):
+    def validate(self, req, params):
         try:
-            didery.did.didering.Did(self.did)
+            didery.did.didering.parseDid(req.did)
         except ValueError as ex:
             raise falcon.HTTPError(falcon.HTTP_400,
                                    'Validation Error',
@@ -330,11 +375,8 @@ class DIDFormatValidator(Validator):
 
 
 class DADValidator(Validator):
-    def __init__(self, req, params):
-        Validator.__init__(self, req, params)
-
-    def validate(self):
-        did = Dad(self.body['id'])
+    def validate(self, req, params):
+        did = Dad(req.body['id'])
 
         if did.method != 'dad':
             raise falcon.HTTPError(falcon.HTTP_400,
@@ -343,49 +385,40 @@ class DADValidator(Validator):
 
 
 class MinSignersLengthValidator(Validator):
-    def __init__(self, req, params, minLength):
-        Validator.__init__(self, req, params)
+    def __init__(self, minLength):
         self.minLength = minLength
 
-    def validate(self):
-        if len(self.body['signers']) < self.minLength:
+    def validate(self, req, params):
+        if len(req.body['signers']) < self.minLength:
             raise falcon.HTTPError(falcon.HTTP_400,
                                    'Validation Error',
                                    'signers field missing keys.')
 
 
 class ContainsPreRotationValidator(Validator):
-    def __init__(self, req, params):
-        Validator.__init__(self, req, params)
-
-    def validate(self):
-        if self.body['signer'] + 1 == len(self.body['signers']):
+    def validate(self, req, params):
+        if req.body['signer'] + 1 == len(req.body['signers']):
             raise falcon.HTTPError(falcon.HTTP_400,
                                    'Validation Error',
                                    'Missing pre rotated key in "signers" field.')
 
 
 class ContainsPreRotationOrRevokedValidator(Validator):
-    def __init__(self, req, params):
-        Validator.__init__(self, req, params)
-
-        self.preRotationValidator = ContainsPreRotationValidator(req, params)
+    def __init__(self):
+        self.preRotationValidator = ContainsPreRotationValidator()
 
-    def validate(self):
+    def validate(self, req, params):
         # Key revoked no pre-rotation necessary
-        if self.body['signers'][self.body["signer"]] is None:
+        if req.body['signers'][req.body["signer"]] is None:
             return
 
         # Must contain pre-rotation
-        self.preRotationValidator.validate()
+        self.preRotationValidator.validate(req, params)
 
 
 class SignersKeysNotNoneValidator(Validator):
-    def __init__(self, req, params):
-        Validator.__init__(self, req, params)
-
-    def validate(self):
-        for value in self.body['signers']:
+    def validate(self, req, params):
+        for value in req.body['signers']:
             if value is None:
                 raise falcon.HTTPError(falcon.HTTP_400,
                                        'Validation Error',
@@ -393,55 +426,141 @@ class SignersKeysNotNoneValidator(Validator):
 
 
 class SignerIsZeroValidator(Validator):
-    def __init__(self, req, params):
-        Validator.__init__(self, req, params)
-
-    def validate(self):
-        if int(self.body['signer']) != 0:
+    def validate(self, req, params):
+        if int(req.body['signer']) != 0:
             raise falcon.HTTPError(falcon.HTTP_400,
                                    'Validation Error',
                                    'signer field must equal 0 on creation of new rotation history.')
 
 
 class SignerValueValidator(Validator):
-    def __init__(self, req, params):
-        Validator.__init__(self, req, params)
-
-    def validate(self):
-        if self.body['signer'] < 1 or self.body['signer'] >= len(self.body['signers']):
+    def validate(self, req, params):
+        if req.body['signer'] < 1 or req.body['signer'] >= len(req.body['signers']):
             raise falcon.HTTPError(falcon.HTTP_400,
                                    'Validation Error',
                                    '"signer" cannot reference the first or last key in the "signers" '
                                    'field on PUT requests.')
 
 
+def inceptionKey(req):
+    """
+    Returns the key that signed an inception request.
+    """
+    return req.body["signers"][int(req.body["signer"])]
+
+
+def rotationIndex(req):
+    """
+    Returns the index of the new signing key in a rotation request.
+    """
+    if req.body["signers"][int(req.body["signer"])] is None:
+        return req.body['signer'] - 1  # key was revoked
+
+    return req.body['signer']
+
+
+def rotationSignerKey(req):
+    """
+    Returns the previous signing key of a rotation request.
+    """
+    return req.body["signers"][rotationIndex(req) - 1]
+
+
+def rotationKey(req):
+    """
+    Returns the new signing key of a rotation request.
+    """
+    return req.body["signers"][rotationIndex(req)]
+
+
+def storedSignerKey(req):
+    """
+    Returns the current signing key of the stored history.
+    """
+    history = req.historyContext.history
+
+    return history.signers[history.signer]
+
+
+def storedRotationKey(req):
+    """
+    Returns the pre-rotated key of the stored history.
+    """
+    history = req.historyContext.history
+
+    return history.signers[history.signer + 1]
+
+
+def deletionKey(req):
+    """
+    Returns the key that signs deletion requests for the stored history.
+    """
+    history = req.history
+    history.selected = req.body["vk"]
+
+    index = int(history.signer)
+    vk = history.signers[index]
+    if vk is None:  # Key was revoked use old key
+        vk = history.signers[index - 1]
+
+    return vk
+
+
+def dadKey(req):
+    """
+    Returns the key embedded in the dad did of the request body.
+    """
+    return Dad(req.body['id']).vk
+
+
 class SignatureValidator(Validator):
-    def __init__(self, req, params, vk, sigs, signature, sigName):
-        Validator.__init__(self, req, params)
-        self.vk = vk
-        self.cryptoValidator = cryptoFactory.signatureValidationFactory(sigs)
-        self.signature = signature
+    cost = COST_CRYPTO
+
+    def __init__(self, sigName, key, stored=False):
+        """
+        :param sigName: (string) name of the signature in the Signature header
+        :param key: (function) returns the verification key for a request
+        :param stored: (boolean) key is read from the stored record
+        """
         self.sigName = sigName
+        self.key = key
+        self.stored = stored
 
-    def validate(self):
-        try:
-            self.cryptoValidator(self.signature, self.raw.decode(), self.vk)
-        except didering.ValidationError as ex:
+    def validate(self, req, params):
+        sigs = req.signatures
+        signature = sigs.get(self.sigName)
+        vk = self.key(req)
+
+        cache = caching.verifiedSignatures
+        if cache is not None and cache.verified(sigs.get("name"), vk, signature, req.raw):
+            return
+
+        # req.body is already parsed and req.raw holds the signed bytes, so verify without parsing or copying again
+        pool = pooling.verifiers
+        if pool is not None:
+            error = pool.verify(sigs.get("name"), signature, req.raw, vk, req.body)
+        else:
+            error = pooling.verifySignature(sigs.get("name"), signature, req.raw, vk, req.body)
+
+        if error is not None:
             raise falcon.HTTPError(falcon.HTTP_401,
                                    'Authorization Error',
-                                   'Could not validate the request signature for ' + self.sigName + ' field. {}.'.format(ex))
+                                   'Could not validate the request signature for ' + self.sigName + ' field. {}.'.format(error))
 
+        if cache is not None:
+            cache.add(sigs.get("name"), vk, signature, req.raw)
 
-class DidMethodExistsValidator(Validator):
-    def __init__(self, req, params, did):
-        Validator.__init__(self, req, params)
+    def __repr__(self):
+        return "{}({!r}, {})".format(self.__class__.__name__, self.sigName, self.key.__name__)
 
-        self.didFormatValidator = DIDFormatValidator(req, params, did)
-        self.did = did
 
-    def validate(self):
-        self.didFormatValidator.validate()
-        did_class = didery.did.didering.getDIDModel(self.did)
+class DidMethodExistsValidator(Validator):
+    def __init__(self):
+        self.didFormatValidator = DIDFormatValidator()
+
+    def validate(self, req, params):
+        self.didFormatValidator.validate(req, params)
+        did_class = didery.did.didering.getDIDModel(req.did)
 
         if did_class is None:
             raise falcon.HTTPError(falcon.HTTP_400,
@@ -450,30 +569,24 @@ class DidMethodExistsValidator(Validator):
 
 
 class DidHijackingValidator(Validator):
-    def __init__(self, req, params, did):
-        Validator.__init__(self, req, params)
+    def __init__(self):
+        self.didFormatValidator = DIDFormatValidator()
 
-        self.didFormatValidator = DIDFormatValidator(req, params, did)
-        self.did = did
-
-    def validate(self):
-        self.didFormatValidator.validate()
-        did_class = didery.did.didering.getDIDModel(self.did)
+    def validate(self, req, params):
+        self.didFormatValidator.validate(req, params)
+        did_class = didery.did.didering.getDIDModel(req.did)
 
-        did = did_class(self.did)
+        did = did_class(req.did)
 
-        if not did.match_vk(self.body['signers'][0]):
+        if not did.match_vk(req.body['signers'][0]):
             raise falcon.HTTPError(falcon.HTTP_400,
                                    'Validation Error',
                                    'The first key in the signers field does not belong to this DID.')
 
 
 class DidInURLValidator(Validator):
-    def __init__(self, req, params):
-        Validator.__init__(self, req, params)
-
-    def validate(self):
-        if 'did' not in self.params:
+    def validate(self, req, params):
+        if 'did' not in params:
             raise falcon.HTTPError(falcon.HTTP_400,
                                    'Validation Error',
                                    'DID value missing from url.')
@@ -486,213 +599,104 @@ class URLDidMatchesIdValidator(Validator):
     request url.  Only the Scheme, Method, and Idstring are
     needed to verify the DID's match.
     """
-    def __init__(self, req, params):
-        Validator.__init__(self, req, params)
-
-    def validate(self):
+    def validate(self, req, params):
         # Prevent did data from being clobbered
-        if Did(self.params['did']).did != Did(self.body['id']).did:
+        if parseDid(params['did']).did != parseDid(req.body['id']).did:
             raise falcon.HTTPError(falcon.HTTP_400,
                                    'Validation Error',
                                    'Url did must match id field did.')
 
 
 class CascadingValidationValidator(Validator):
-    def __init__(self, req, params, did):
-        Validator.__init__(self, req, params)
+    def __init__(self):
+        self.didFormatValidator = DIDFormatValidator()
+        self.Hijacked = DidHijackingValidator()
 
-        self.didFormatValidator = DIDFormatValidator(req, params, did)
-        self.Hijacked = DidHijackingValidator(req, params, did)
-        self.did = did
-
-    def validate(self):
-        self.didFormatValidator.validate()
-        did_class = didery.did.didering.getDIDModel(self.did)
+    def validate(self, req, params):
+        self.didFormatValidator.validate(req, params)
+        did_class = didery.did.didering.getDIDModel(req.did)
 
         if did_class is None:
             return
 
-        self.Hijacked.validate()
+        self.Hijacked.validate(req, params)
 
 
-class InceptionSigValidator(Validator):
-    def __init__(self, req, params):
-        Validator.__init__(self, req, params)
+class SigValidator(CompositeValidator):
+    """
+    Checks that the Signature header holds a valid signature named sigName
+    made with the key returned by key.
+    """
+    def __init__(self, sigName, key, stored=False):
+        """
+        :param sigName: (string) name of the signature in the Signature header
+        :param key: (function) returns the verification key for a request
+        :param stored: (boolean) key is read from the stored record
+        """
+        CompositeValidator.__init__(self, [
+            HasSignatureValidator(),
+            SigExistsValidator(sigName),
+            SignatureValidator(sigName, key, stored)
+        ])
 
-    def validate(self):
-        sigs = self.req.signatures
-        hasSignature = HasSignatureValidator(self.req, self.params, sigs)
-        sigExists = SigExistsValidator(self.req, self.params, sigs, "signer")
-        sigIsValid = SignatureValidator(
-            self.req,
-            self.params,
-            self.body["signers"][int(self.body["signer"])],
-            sigs,
-            sigs.get("signer"),
-            "signer"
-        )
 
-        hasSignature.validate()
-        sigExists.validate()
-        sigIsValid.validate()
+class InceptionSigValidator(SigValidator):
+    def __init__(self):
+        SigValidator.__init__(self, "signer", inceptionKey)
 
 
 class SignerIncrementValidator(Validator):
-    def __init__(self, req, params):
-        Validator.__init__(self, req, params)
+    cost = COST_CRYPTO
+    stored = True
 
-        self.request_data = BasicHistoryModel(req.body)
-        self.db_data = None
+    def __init__(self):
+        self.signerIsValid = SignatureValidator("signer", storedSignerKey, stored=True)
+        self.rotationIsValid = SignatureValidator("rotation", storedRotationKey, stored=True)
 
-    def validate(self):
-        self.db_data = db.historyDB.getHistory(self.params['did'])
-        self.db_data.selected = self.request_data.signers[0]
+    def validate(self, req, params):
+        request_data = BasicHistoryModel(req.body)
+        db_data = req.historyContext.history
+        db_data.selected = request_data.signers[0]
 
         # without these checks a hacker can skip past the validated signatures and insert their own keys
-        if self.db_data.signer + 1 != self.request_data.signer:
-            if self.request_data.signers[self.request_data.signer] is not None:
+        if db_data.signer + 1 != request_data.signer:
+            if request_data.signers[request_data.signer] is not None:
                 raise falcon.HTTPError(falcon.HTTP_400,
                                        'Validation Error',
                                        'signer field must be one greater than previous.')
             else:  # This patches a security exploit
-                sigs = self.req.signatures
-                signerIsValid = SignatureValidator(
-                    self.req,
-                    self.params,
-                    self.db_data.signers[self.db_data.signer],
-                    sigs,
-                    sigs.get("signer"),
-                    "signer"
-                )
-                rotationIsValid = SignatureValidator(
-                    self.req,
-                    self.params,
-                    self.db_data.signers[self.db_data.signer + 1],
-                    sigs,
-                    sigs.get("rotation"),
-                    "rotation"
-                )
+                self.rotationIsValid.validate(req, params)
+                self.signerIsValid.validate(req, params)
 
-                rotationIsValid.validate()
-                signerIsValid.validate()
 
+class RotationSigValidator(CompositeValidator):
+    def __init__(self):
+        CompositeValidator.__init__(self, [
+            HasSignatureValidator(),
+            SigExistsValidator("signer"),
+            SigExistsValidator("rotation"),
+            SignatureValidator("rotation", rotationKey),
+            SignatureValidator("signer", rotationSignerKey),
+            HistoryExistsValidator()
+        ])
 
-class RotationSigValidator(Validator):
-    def __init__(self, req, params):
-        Validator.__init__(self, req, params)
 
-    def validate(self):
-        sigs = self.req.signatures
-        hasSignature = HasSignatureValidator(self.req, self.params, sigs)
-        signerExists = SigExistsValidator(self.req, self.params, sigs, "signer")
-        rotationExists = SigExistsValidator(self.req, self.params, sigs, "rotation")
-        historyExists = HistoryExistsValidator(self.req, self.params)
+class DeletionSigValidator(CompositeValidator):
+    def __init__(self):
+        CompositeValidator.__init__(self, [
+            HistoryExistsValidator(),
+            SigValidator("signer", deletionKey, stored=True)
+        ])
 
-        if self.body["signers"][int(self.body["signer"])] is None:
-            index = self.body['signer'] - 1
-        else:
-            index = self.body['signer']
-
-        signerIsValid = SignatureValidator(
-            self.req,
-            self.params,
-            self.body["signers"][index - 1],
-            sigs,
-            sigs.get("signer"),
-            "signer"
-        )
-        rotationIsValid = SignatureValidator(
-            self.req,
-            self.params,
-            self.body["signers"][index],
-            sigs,
-            sigs.get("rotation"),
-            "rotation"
-        )
-
-        hasSignature.validate()
-        signerExists.validate()
-        rotationExists.validate()
-        rotationIsValid.validate()
-        signerIsValid.validate()
-        historyExists.validate()
-
-
-class DeletionSigValidator(Validator):
-    def __init__(self, req, params):
-        Validator.__init__(self, req, params)
-
-    def validate(self):
-        HistoryExistsValidator(self.req, self.params).validate()
-        history_to_delete = self.req.history
-        history_to_delete.selected = self.req.body["vk"]
-
-        index = int(history_to_delete.signer)
-        vk = history_to_delete.signers[index]
-        if vk is None:  # Key was revoked use old key
-            vk = history_to_delete.signers[index - 1]
-
-        sigs = self.req.signatures
-
-        hasSignature = HasSignatureValidator(self.req, self.params, sigs)
-        sigExists = SigExistsValidator(self.req, self.params, sigs, "signer")
-        sigIsValid = SignatureValidator(
-            self.req,
-            self.params,
-            vk,
-            sigs,
-            sigs.get("signer"),
-            "signer"
-        )
-
-        hasSignature.validate()
-        sigExists.validate()
-        sigIsValid.validate()
-
-
-class BlobSigValidator(Validator):
-    def __init__(self, req, params):
-        Validator.__init__(self, req, params)
-
-    def validate(self):
-        did = Dad(self.body['id'])
-        sigs = self.req.signatures
-        hasSignature = HasSignatureValidator(self.req, self.params, sigs)
-        sigExists = SigExistsValidator(self.req, self.params, sigs, "signer")
-        sigIsValid = SignatureValidator(
-            self.req,
-            self.params,
-            did.vk,
-            sigs,
-            sigs.get("signer"),
-            "signer"
-        )
-
-        hasSignature.validate()
-        sigExists.validate()
-        sigIsValid.validate()
-
-
-class DeleteBlobSigValidator(Validator):
-    def __init__(self, req, params):
-        Validator.__init__(self, req, params)
-
-    def validate(self):
-        BlobExistsValidator(self.req, self.params).validate()
-
-        did = Dad(self.body['id'])
-        sigs = self.req.signatures
-        hasSignature = HasSignatureValidator(self.req, self.params, sigs)
-        sigExists = SigExistsValidator(self.req, self.params, sigs, "signer")
-        sigIsValid = SignatureValidator(
-            self.req,
-            self.params,
-            did.vk,
-            sigs,
-            sigs.get("signer"),
-            "signer"
-        )
-
-        hasSignature.validate()
-        sigExists.validate()
-        sigIsValid.validate()
+
+class BlobSigValidator(SigValidator):
+    def __init__(self):
+        SigValidator.__init__(self, "signer", dadKey)
+
+
+class DeleteBlobSigValidator(CompositeValidator):
+    def __init__(self):
+        CompositeValidator.__init__(self, [
+            BlobExistsValidator(),
+            SigValidator("signer", dadKey)
+        ])
@@ -0,0 +1,405 @@
+import io
+import sys
+import signal
+import asyncio
+import urllib.parse
+
+from concurrent.futures import ThreadPoolExecutor
+
+from ioflo.aid import getConsole
+
+from didery.db import publishing
+from didery.core.deferring import callApp
+from didery.controllers.history import HEARTBEAT_INTERVAL
+
+console = getConsole()
+
+# asyncio.Task.current_task was replaced by asyncio.current_task in python 3.7
+currentTask = getattr(asyncio, "current_task", None) or asyncio.Task.current_task
+# asyncio.get_running_loop is new in python 3.7, get_event_loop returns the running loop inside coroutines
+runningLoop = getattr(asyncio, "get_running_loop", None) or asyncio.get_event_loop
+
+DEFAULT_EXECUTOR_SIZE = 16  # threads running request handlers, database I/O and inline signature checks
+KEEP_ALIVE_TIMEOUT = 5.0  # seconds an idle persistent connection is kept open
+MAX_HEAD_SIZE = 65536  # largest request line plus headers in bytes
+FOLLOW_INTERVAL = 0.1  # seconds between reads of the change log when other processes write to the database
+
+REASONS = {
+    400: "Bad Request",
+    411: "Length Required",
+    431: "Request Header Fields Too Large",
+    500: "Internal Server Error",
+}
+
+
+class HttpError(Exception):
+    """
+    Request that can't be handed to the app, answered with status and the
+    connection closed
+    """
+    def __init__(self, status):
+        super().__init__(status)
+        self.status = status
+
+
+class AsyncServer:
+    """
+    HTTP/1.1 server running on an asyncio event loop. Connections are
+    serviced as soon as they are readable instead of on a scheduler tick,
+    and idle ones only cost their socket. The WSGI app runs on an executor
+    thread so database I/O and signature verification never block the
+    loop. Response bodies that are async generators, like history streams,
+    are iterated on the loop itself.
+    """
+    def __init__(self, app, size=DEFAULT_EXECUTOR_SIZE, loop=None):
+        """
+        :param app: WSGI app
+        :param size: int number of threads running the app
+        :param loop: asyncio event loop, the one running open if None
+        """
+        self.app = app
+        self.loop = loop
+        self.executor = ThreadPoolExecutor(max_workers=size)
+        self.server = None
+        self.follower = None
+        self.connections = {}  # asyncio.StreamWriter to the task servicing its connection
+
+    async def open(self, host="", port=8080, reusePort=False):
+        """
+        Start listening
+
+        :param host: string interface to listen on, '' for every interface
+        :param port: int port to listen on, 0 picks a free port
+        :param reusePort: boolean bind with SO_REUSEPORT so other processes can listen on the port too
+        :return: tuple of the host and port listened on
+        """
+        if self.loop is None:
+            self.loop = runningLoop()
+
+        self.server = await asyncio.start_server(self.handle,
+                                                 host=host or None,
+                                                 port=port,
+                                                 reuse_port=reusePort or None,
+                                                 limit=MAX_HEAD_SIZE)
+
+        if publishing.historyChanges.log is not None:
+            self.follower = self.loop.create_task(self.follow())
+
+        return self.server.sockets[0].getsockname()[:2]
+
+    async def close(self):
+        """
+        Stop listening, cancel the tasks servicing open connections and stop
+        the executor threads
+        """
+        if self.follower is not None:
+            self.follower.cancel()
+            self.follower = None
+
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
+
+        tasks = list(self.connections.values())
+        for task in tasks:
+            task.cancel()
+
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        self.executor.shutdown(wait=True)
+
+    async def follow(self):
+        """
+        Publish the changes other processes record in the change log
+        """
+        while True:
+            await asyncio.sleep(FOLLOW_INTERVAL)
+            await self.loop.run_in_executor(self.executor, publishing.historyChanges.catchUp)
+
+    async def handle(self, reader, writer):
+        """
+        Service one connection until the client or the server closes it
+
+        :param reader: asyncio.StreamReader
+        :param writer: asyncio.StreamWriter
+        """
+        self.connections[writer] = currentTask()
+        environ = None
+
+        try:
+            keepAlive = True
+            while keepAlive:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), KEEP_ALIVE_TIMEOUT)
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+                    break  # client went away or stayed idle
+                except asyncio.LimitOverrunError:
+                    await self.reject(writer, 431)
+                    break
+
+                try:
+                    environ, keepAlive = await self.parseRequest(head, reader, writer)
+                except HttpError as ex:
+                    await self.reject(writer, ex.status)
+                    break
+
+                keepAlive = await self.respond(environ, writer, keepAlive)
+        except ConnectionError:
+            pass  # client went away mid response
+        except asyncio.CancelledError:
+            raise  # an Exception before python 3.8, the server is closing
+        except Exception as ex:
+            # like a response body failing half way, the client sees the connection close
+            console.terse("Error handling request {0} {1}: {2}\n".format(
+                environ["REQUEST_METHOD"] if environ else "", environ["PATH_INFO"] if environ else "", ex))
+        finally:
+            self.connections.pop(writer, None)
+            writer.close()
+
+    async def parseRequest(self, head, reader, writer):
+        """
+        Returns the WSGI environ of the request whose head was read
+
+        :param head: bytes request line and headers
+        :param reader: asyncio.StreamReader to read the body from
+        :param writer: asyncio.StreamWriter to answer Expect: 100-continue on
+        :return: tuple of the environ dict and boolean True if the connection is kept open
+        """
+        lines = head.decode("latin-1").split("\r\n")
+
+        try:
+            method, target, version = lines[0].split(" ")
+        except ValueError:
+            raise HttpError(400)
+
+        if not version.startswith("HTTP/1."):
+            raise HttpError(400)
+
+        path, _, query = target.partition("?")
+        host, port = writer.get_extra_info("sockname")[:2]
+        peer = writer.get_extra_info("peername")
+
+        environ = {
+            "REQUEST_METHOD": method,
+            "SCRIPT_NAME": "",
+            "PATH_INFO": urllib.parse.unquote_to_bytes(path).decode("latin-1"),
+            "QUERY_STRING": query,
+            "SERVER_NAME": host,
+            "SERVER_PORT": str(port),
+            "SERVER_PROTOCOL": version,
+            "REMOTE_ADDR": peer[0] if peer else "",
+            "wsgi.version": (1, 0),
+            "wsgi.url_scheme": "http",
+            "wsgi.errors": sys.stderr,
+            "wsgi.multithread": True,
+            "wsgi.multiprocess": False,
+            "wsgi.run_once": False,
+        }
+
+        for line in lines[1:]:
+            if not line:
+                continue
+
+            name, sep, value = line.partition(":")
+            if not sep:
+                raise HttpError(400)
+
+            name = name.strip().upper().replace("-", "_")
+            value = value.strip()
+
+            if name in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+                environ[name] = value
+            else:
+                key = "HTTP_" + name
+                environ[key] = environ[key] + "," + value if key in environ else value
+
+        if "chunked" in environ.get("HTTP_TRANSFER_ENCODING", "").lower():
+            raise HttpError(411)
+
+        try:
+            length = int(environ.get("CONTENT_LENGTH") or 0)
+        except ValueError:
+            raise HttpError(400)
+
+        if length and environ.get("HTTP_EXPECT", "").lower() == "100-continue":
+            writer.write(b"HTTP/1.1 100 Continue\r\n\r\n")
+
+        try:
+            body = await reader.readexactly(length) if length else b""
+        except asyncio.IncompleteReadError:
+            raise ConnectionResetError()
+
+        environ["wsgi.input"] = io.BytesIO(body)
+
+        connection = environ.get("HTTP_CONNECTION", "").lower()
+        keepAlive = version == "HTTP/1.1" and "close" not in connection
+
+        return environ, keepAlive
+
+    async def respond(self, environ, writer, keepAlive):
+        """
+        Run the app for environ and write its response
+
+        :param environ: WSGI environ dict
+        :param writer: asyncio.StreamWriter
+        :param keepAlive: boolean the client wants to keep the connection open
+        :return: boolean True if the connection can take another request
+        """
+        try:
+            status, headers, body = await self.loop.run_in_executor(self.executor, callApp, self.app, environ)
+        except Exception as ex:
+            console.terse("Error handling request {0} {1}: {2}\n".format(
+                environ["REQUEST_METHOD"], environ["PATH_INFO"], ex))
+            await self.reject(writer, 500)
+            return False
+
+        names = {name.lower() for name, value in headers}
+        bodiless = environ["REQUEST_METHOD"] == "HEAD" or status[:3] in ("204", "304")
+        # a body without a length is chunked, or ends when the connection does
+        chunked = not bodiless and "content-length" not in names and keepAlive
+
+        head = ["HTTP/1.1 {}\r\n".format(status)]
+        head.extend("{0}: {1}\r\n".format(name, value) for name, value in headers)
+        if chunked:
+            head.append("Transfer-Encoding: chunked\r\n")
+        if not keepAlive:
+            head.append("Connection: close\r\n")
+        head.append("\r\n")
+
+        writer.write("".join(head).encode("latin-1"))
+
+        try:
+            async for chunk in self.iterate(body):
+                if bodiless or not chunk:
+                    continue
+
+                if chunked:
+                    chunk = b"%x\r\n" % len(chunk) + chunk + b"\r\n"
+
+                writer.write(chunk)
+                await writer.drain()
+
+                if writer.transport.is_closing():
+                    return False
+        finally:
+            await self.closeBody(body)
+
+        if chunked:
+            writer.write(b"0\r\n\r\n")
+
+        await writer.drain()
+
+        return keepAlive
+
+    async def iterate(self, body):
+        """
+        Yields the chunks of a response body. Async generators are iterated on
+        the loop, other iterables that may block, like files, on the executor.
+
+        :param body: WSGI response body or async iterable
+        """
+        if hasattr(body, "__aiter__"):
+            async for chunk in body:
+                yield chunk
+        elif isinstance(body, (list, tuple)):
+            for chunk in body:
+                yield chunk
+        else:
+            chunks = iter(body)
+            while True:
+                chunk = await self.loop.run_in_executor(self.executor, next, chunks, None)
+                if chunk is None:
+                    break
+                yield chunk
+
+    async def closeBody(self, body):
+        """
+        Release a response body once it was written or the client went away
+
+        :param body: WSGI response body or async iterable
+        """
+        if hasattr(body, "aclose"):
+            await body.aclose()
+        elif hasattr(body, "close"):
+            body.close()
+
+    async def reject(self, writer, status):
+        """
+        Answer a request that never reached the app with an empty response
+
+        :param writer: asyncio.StreamWriter
+        :param status: int HTTP status code
+        """
+        writer.write("HTTP/1.1 {0} {1}\r\nContent-Length: 0\r\nConnection: close\r\n\r\n".format(
+            status, REASONS[status]).encode("latin-1"))
+
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+
+
+async def historyEvents(subscription, missed=b''):
+    """
+    Async generator yielding the server-sent events for the changes
+    subscription receives, the history stream body served by AsyncServer.
+    While there is nothing to send it waits on the event loop, so an idle
+    stream holds no thread.
+
+    :param subscription: publishing.Subscription
+    :param missed: bytes server-sent events to send before the live changes
+    """
+    loop = runningLoop()
+    ready = asyncio.Event()
+    subscription.notify = lambda: loop.call_soon_threadsafe(ready.set)
+
+    try:
+        if missed:
+            yield missed
+
+        while True:
+            ready.clear()
+            events = subscription.drain()
+
+            if not events:
+                try:
+                    await asyncio.wait_for(ready.wait(), HEARTBEAT_INTERVAL)
+                    continue
+                except asyncio.TimeoutError:
+                    events = b":\n\n"  # comment line, fails the write if the subscriber went away
+
+            yield events
+    finally:
+        subscription.notify = None
+        subscription.close()
+
+
+def runServer(app, host="", port=8080, reusePort=False, size=DEFAULT_EXECUTOR_SIZE):
+    """
+    Serve app on an asyncio event loop until interrupted
+
+    :param app: WSGI app
+    :param host: string interface to listen on, '' for every interface
+    :param port: int port to listen on
+    :param reusePort: boolean bind with SO_REUSEPORT so other worker processes can listen on the port too
+    :param size: int number of threads running the app
+    """
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    server = AsyncServer(app, size, loop)
+
+    ha = loop.run_until_complete(server.open(host, port, reusePort))
+    console.concise("Opened asyncio server at '{0}'\n".format(ha))
+
+    try:
+        loop.run_forever()
+    except KeyboardInterrupt:
+        console.terse("KeyboardInterrupt forcing shutdown of asyncio server ...\n")
+    finally:
+        # a terminal interrupts the whole process group and the supervisor passes it on too
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        loop.run_until_complete(server.close())
+        loop.close()
+        asyncio.set_event_loop(None)
+        console.concise("Closed asyncio server at '{0}'\n".format(ha))
@@ -0,0 +1,74 @@
+from concurrent.futures import ThreadPoolExecutor
+
+
+def callApp(app, environ):
+    """
+    Call a WSGI app and capture what it passes to start_response
+
+    :param app: WSGI app
+    :param environ: WSGI environ dict
+    :return: tuple of status, headers and body iterable
+    """
+    response = {}
+
+    def start(status, headers, exc_info=None):
+        response["status"] = status
+        response["headers"] = headers
+
+    body = app(environ, start)
+
+    return response["status"], response["headers"], body
+
+
+class DeferringApp:
+    """
+    WSGI app that handles each request on a worker thread. The server thread
+    gets a body generator that yields empty chunks until the response is
+    ready, which Valet treats as "not yet", so it keeps servicing other
+    connections while a request waits on signature verification.
+    """
+    def __init__(self, app, size):
+        """
+        :param app: WSGI app handling the requests
+        :param size: int number of requests handled at the same time
+        """
+        self.app = app
+        self.executor = ThreadPoolExecutor(max_workers=size)
+
+    def handle(self, environ):
+        """
+        Run the wrapped app on a worker thread
+
+        :param environ: WSGI environ dict
+        :return: tuple of status, headers and body iterable
+        """
+        return callApp(self.app, environ)
+
+    def respond(self, future, start_response):
+        """
+        Yield empty chunks until future is done then yield the response body
+
+        :param future: concurrent.futures.Future resolving to the result of handle
+        :param start_response: WSGI start_response function of the server
+        """
+        while not future.done():
+            yield b''
+
+        status, headers, body = future.result()
+        start_response(status, headers)
+
+        try:
+            for chunk in body:
+                yield chunk
+        finally:
+            if hasattr(body, "close"):
+                body.close()
+
+    def close(self):
+        """
+        Wait for the requests being handled and stop the worker threads
+        """
+        self.executor.shutdown(wait=True)
+
+    def __call__(self, environ, start_response):
+        return self.respond(self.executor.submit(self.handle, environ), start_response)
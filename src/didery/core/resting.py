@@ -1,12 +1,14 @@
-import falcon
-
 from ioflo.aid import getConsole
 from ioflo.aid import odict
 from ioflo.aio.http import Valet
 from ioflo.base import doify
 
-from didery import routing
-from didery.db import dbing
+from didery import wsgi
+from didery.db import publishing
+from didery.crypto import caching
+from didery.crypto import pooling
+from didery.core.deferring import DeferringApp
+from didery.core.supervising import ReusePortServer
 
 console = getConsole()
 
@@ -25,7 +27,11 @@ frame server
                                         test="",
                                         port=odict(ival=8080),
                                         db=odict(ival=""),
-                                        mode=odict(ival=""),
+                                        mode=odict(ival="method"),
+                                        lmdb=odict(ival=odict()),
+                                        sigCache=odict(ival=odict()),
+                                        verifyWorkers=odict(ival=0),
+                                        workers=odict(ival=1),
                                         ))
 def dideryServerOpen(self):
     """
@@ -34,6 +40,11 @@ def dideryServerOpen(self):
     Ioinit attributes
         valet is Valet instance (wsgi server)
         port is server port
+        mode is Didery's operating mode, method like wsgi.createApp if not set
+        lmdb is an odict of lmdb environment options for dbing.setupDbEnv
+        sigCache is an odict of size and ttl for the verified signature cache
+        verifyWorkers is the number of processes verifying signatures, 0 verifies in the server
+        workers is the number of server processes sharing the port and database
 
     Context: enter
 
@@ -41,10 +52,27 @@ def dideryServerOpen(self):
         do didery server open at enter
     """
     port = int(self.port.value)
-    dbing.setupDbEnv(self.db.value, self.port.value, mode=self.mode.value)
-
-    app = falcon.API(middleware=[routing.CORSMiddleware()])
-    routing.loadEndPoints(app, store=self.store, mode=self.mode.value)
+    verifyWorkers = int(self.verifyWorkers.value or 0)
+    shared = int(self.workers.value or 1) > 1  # other workers listen on the same port and write to the same database
+
+    # Valet services every connection from this thread so streams must never block it
+    app = wsgi.createApp(self.db.value,
+                         self.mode.value,
+                         port=self.port.value,
+                         lmdb=self.lmdb.value,
+                         sigCache=self.sigCache.value,
+                         verifyWorkers=verifyWorkers,
+                         shared=shared,
+                         streamWait=0,
+                         store=self.store)
+
+    if verifyWorkers:
+        # keep serving other connections while requests wait on the verifier pool
+        app = DeferringApp(app, verifyWorkers * 2)
+
+    servant = None
+    if shared:
+        servant = ReusePortServer(store=self.store, ha=("", port), bufsize=131072, wlog=None, timeout=0.5)
 
     self.valet.value = Valet(
                             port=port,
@@ -53,6 +81,7 @@ def dideryServerOpen(self):
                             store=self.store,
                             app=app,
                             timeout=0.5,
+                            servant=servant,
                             )
 
     console.terse("IP Address {}\n".format(self.valet.value.servant.ha))
@@ -86,6 +115,9 @@ def dideryServerService(self):
     if self.valet.value:
         self.valet.value.serviceAll()
 
+    # tell stream subscribers about changes other workers made
+    publishing.historyChanges.catchUp()
+
 
 @doify('DideryServerClose', ioinits=odict(valet="",))
 def dideryServerClose(self):
@@ -106,3 +138,12 @@ def dideryServerClose(self):
         console.concise("Closed server '{0}' at '{1}'\n".format(
                             self.valet.name,
                             self.valet.value.servant.eha))
+
+        if isinstance(self.valet.value.app, DeferringApp):
+            self.valet.value.app.close()
+
+    pooling.closeVerifierPool()
+    publishing.historyChanges.follow(None)
+
+    if caching.verifiedSignatures is not None:
+        console.concise("Verified signature cache {0}\n".format(caching.verifiedSignatures.stats()))
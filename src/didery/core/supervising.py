@@ -0,0 +1,156 @@
+import os
+import sys
+import time
+import errno
+import signal
+import socket
+import traceback
+
+from ioflo.aid import getConsole
+from ioflo.aio.tcp import Server
+
+console = getConsole()
+
+RESTART_DELAY = 1.0  # seconds a worker must stay up before it is restarted right away after dying
+
+
+class ReusePortServer(Server):
+    """
+    Nonblocking TCP server whose listen socket is bound with SO_REUSEPORT so
+    several worker processes can listen on the same port. The kernel spreads
+    incoming connections across them.
+    """
+    def open(self):
+        """
+        Opens and binds the listen socket in non blocking mode
+
+        :return: boolean True if the socket is listening
+        """
+        self.ss = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.ss.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.ss.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+
+        # Linux TCP allocates twice the requested size
+        bs = 2 * self.bs if sys.platform.startswith('linux') else self.bs
+
+        if self.ss.getsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF) < bs:
+            self.ss.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, self.bs)
+        if self.ss.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF) < bs:
+            self.ss.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.bs)
+
+        self.ss.setblocking(0)
+
+        try:
+            self.ss.bind(self.ha)
+            self.ss.listen(socket.SOMAXCONN)
+        except socket.error as ex:
+            console.terse("socket.error = {0}\n".format(ex))
+            return False
+
+        self.ha = self.ss.getsockname()  # get resolved ha after bind
+        self.opened = True
+        return True
+
+
+class Supervisor:
+    """
+    Forks worker processes and restarts the ones that die until it is told
+    to stop. A worker that dies shortly after starting is restarted after
+    RESTART_DELAY so a broken worker doesn't spin the host.
+    """
+    def __init__(self, workers, target, delay=RESTART_DELAY):
+        """
+        :param workers: int number of worker processes to keep running
+        :param target: function taking the int worker number, run in each worker process
+        :param delay: float seconds a worker must stay up before it is restarted right away
+        """
+        self.workers = workers
+        self.target = target
+        self.delay = delay
+        self.pids = {}  # pid to (worker number, start time)
+        self.stopping = False
+
+    def spawn(self, number):
+        """
+        Fork a worker process running target
+
+        :param number: int worker number passed to target
+        :return: int pid of the worker
+        """
+        pid = os.fork()
+
+        if pid == 0:
+            status = 0
+            try:
+                signal.signal(signal.SIGINT, signal.default_int_handler)
+                signal.signal(signal.SIGTERM, signal.SIG_DFL)
+                self.target(number)
+            except BaseException:
+                traceback.print_exc()
+                status = 1
+            finally:
+                os._exit(status)  # never return into the supervisor loop
+
+        self.pids[pid] = (number, time.monotonic())
+
+        return pid
+
+    def reap(self):
+        """
+        Wait for a worker process to exit
+
+        :return: tuple of the pid and int worker number of the worker that
+            exited or (None, None) if no worker is left
+        """
+        try:
+            pid, status = os.wait()
+        except OSError as ex:
+            if ex.errno == errno.ECHILD:
+                self.pids.clear()
+                return None, None
+            raise
+
+        number, started = self.pids.pop(pid, (None, None))
+
+        if number is not None and not self.stopping:
+            console.terse("Worker {0} (pid {1}) exited with status {2}\n".format(number, pid, status))
+            if time.monotonic() - started < self.delay:
+                time.sleep(self.delay)
+
+        return pid, number
+
+    def stop(self, signum=None, frame=None):
+        """
+        Stop restarting workers and tell the running ones to shut down the
+        way ioflo does on a keyboard interrupt
+
+        :param signum: int signal number when used as a signal handler
+        :param frame: stack frame when used as a signal handler
+        """
+        self.stopping = True
+
+        for pid in list(self.pids):
+            try:
+                os.kill(pid, signal.SIGINT)
+            except OSError:
+                pass  # already exited
+
+    def run(self):
+        """
+        Start the workers and keep them running until the supervisor is stopped
+        with SIGINT or SIGTERM and every worker exited
+        """
+        handlers = (signal.signal(signal.SIGINT, self.stop), signal.signal(signal.SIGTERM, self.stop))
+
+        try:
+            for number in range(self.workers):
+                self.spawn(number)
+
+            while self.pids:
+                pid, number = self.reap()
+
+                if number is not None and not self.stopping:
+                    self.spawn(number)
+        finally:
+            signal.signal(signal.SIGINT, handlers[0])
+            signal.signal(signal.SIGTERM, handlers[1])
@@ -0,0 +1,123 @@
+import hashlib
+import threading
+import time
+
+from collections import OrderedDict
+
+DEFAULT_CACHE_SIZE = 1024  # verified signatures remembered, 0 disables the cache
+DEFAULT_CACHE_TTL = 300    # seconds a verified signature is remembered
+
+verifiedSignatures = None  # cache has not been set up yet
+
+
+class VerifiedSignatureCache:
+    """
+    Bounded least recently used cache of signatures that verified successfully.
+    Entries are keyed by signature scheme, verification key, signature and a
+    sha256 digest of the signed message, so a hit means the exact same message
+    was already verified with the same key and signature. Failed
+    verifications are never cached.
+    """
+    def __init__(self, size=DEFAULT_CACHE_SIZE, ttl=DEFAULT_CACHE_TTL, clock=time.monotonic):
+        """
+        :param size: int maximum number of entries
+        :param ttl: float seconds an entry stays valid, 0 means forever
+        :param clock: function returning the current time in seconds
+        """
+        self.size = size
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def key(kind, verkey, signature, message):
+        """
+        Returns the cache key of a signature
+
+        :param kind: string name of the signature scheme
+        :param verkey: string verification key
+        :param signature: string signature
+        :param message: bytes signed message
+        :return: tuple
+        """
+        return kind, verkey, signature, hashlib.sha256(message).digest()
+
+    def verified(self, kind, verkey, signature, message):
+        """
+        Returns True if the signature was verified before and has not expired
+
+        :param kind: string name of the signature scheme
+        :param verkey: string verification key
+        :param signature: string signature
+        :param message: bytes signed message
+        :return: boolean
+        """
+        key = self.key(kind, verkey, signature, message)
+
+        with self.lock:
+            stamp = self.entries.get(key)
+
+            if stamp is not None and self.ttl and self.clock() - stamp > self.ttl:
+                del self.entries[key]
+                stamp = None
+
+            if stamp is None:
+                self.misses += 1
+                return False
+
+            self.entries.move_to_end(key)
+            self.hits += 1
+
+            return True
+
+    def add(self, kind, verkey, signature, message):
+        """
+        Remember a successfully verified signature, evicting the least
+        recently used entry when the cache is full
+
+        :param kind: string name of the signature scheme
+        :param verkey: string verification key
+        :param signature: string signature
+        :param message: bytes signed message
+        """
+        key = self.key(kind, verkey, signature, message)
+
+        with self.lock:
+            self.entries[key] = self.clock()
+            self.entries.move_to_end(key)
+
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+    def stats(self):
+        """
+        Returns the cache counters for monitoring
+
+        :return: dict
+        """
+        with self.lock:
+            return {
+                "size": len(self.entries),
+                "maxSize": self.size,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses
+            }
+
+
+def setupVerifiedSignatures(size=DEFAULT_CACHE_SIZE, ttl=DEFAULT_CACHE_TTL):
+    """
+    Setup the module global verifiedSignatures. A size of 0 disables caching.
+
+    :param size: int maximum number of entries
+    :param ttl: float seconds an entry stays valid, 0 means forever
+    :return: VerifiedSignatureCache or None
+    """
+    global verifiedSignatures
+
+    verifiedSignatures = VerifiedSignatureCache(size, ttl) if size > 0 else None
+
+    return verifiedSignatures
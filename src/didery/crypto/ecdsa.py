@@ -3,6 +3,7 @@ import ecdsa.util
 import ecdsa.keys
 import ecdsa.ellipticcurve
 
+from functools import lru_cache
 from hashlib import sha3_256
 from fastecdsa.keys import gen_keypair
 from fastecdsa import curve as fast_curve
@@ -19,6 +20,64 @@ except ImportError:
 from ..help.helping import str64uToBytes, bytesToStr64u, makeDid
 from didery import didering
 
+VERKEY_CACHE_SIZE = 1024  # decoded verification keys remembered
+COORDINATE_SIZE = 32  # bytes in one secp256k1 coordinate or signature component
+
+
+def bytesToPoint(vk):
+    """
+    Returns the fastecdsa point of a raw secp256k1 verification key.
+    Raises ValueError if vk is not a point on the curve.
+
+    :param vk: 64 byte string of the x and y coordinates
+    :return: fastecdsa.point.Point
+    """
+    if len(vk) != 2 * COORDINATE_SIZE:
+        raise ValueError("Invalid verification key length {}".format(len(vk)))
+
+    x = int.from_bytes(vk[:COORDINATE_SIZE], "big")
+    y = int.from_bytes(vk[COORDINATE_SIZE:], "big")
+
+    if x >= fast_curve.secp256k1.p or y >= fast_curve.secp256k1.p:
+        raise ValueError("Verification key coordinates out of range")
+
+    return fPoint(x, y, fast_curve.secp256k1)  # checks the point is on the curve
+
+
+@lru_cache(maxsize=VERKEY_CACHE_SIZE)
+def decodeVerkey(verkey):
+    """
+    Returns the fastecdsa point of a base64 url-file safe verification key.
+    Results are cached so repeated verifications for the same signer only pay
+    for the curve math. Invalid keys raise and are not cached.
+
+    :param verkey: base64 url-file safe string verification key
+    :return: fastecdsa.point.Point
+    """
+    return bytesToPoint(str64uToBytes(verkey))
+
+
+def verifyPoint(sig, msg, point):
+    """
+    Returns True if signature sig of message msg is verified with
+    the public key point Otherwise False
+
+    :param sig: byte string representation of signature
+    :param msg: byte string representation of message
+    :param point: fastecdsa.point.Point public key
+    :return: boolean
+    """
+    try:
+        if len(sig) != 2 * COORDINATE_SIZE:
+            return False
+
+        r = int.from_bytes(sig[:COORDINATE_SIZE], "big")
+        s = int.from_bytes(sig[COORDINATE_SIZE:], "big")
+        result = fast_verify((r, s), msg.decode(), point, fast_curve.secp256k1, hashfunc=sha3_256)
+    except Exception as ex:
+        return False
+    return True if result else False
+
 
 def verify(sig, msg, vk):
     """
@@ -31,15 +90,10 @@ def verify(sig, msg, vk):
     :return: boolean
     """
     try:
-        order = ecdsa.curves.SECP256k1.order
-        r, s = ecdsa.util.sigdecode_string(sig, order)
-        x = vk.pubkey.point.x()
-        y = vk.pubkey.point.y()
-        point = fPoint(x, y, fast_curve.secp256k1)  # fastecdsa public key
-        result = fast_verify((r, s), msg.decode(), point, fast_curve.secp256k1, hashfunc=sha3_256)
+        point = fPoint(vk.pubkey.point.x(), vk.pubkey.point.y(), fast_curve.secp256k1)  # fastecdsa public key
     except Exception as ex:
         return False
-    return True if result else False
+    return verifyPoint(sig, msg, point)
 
 
 def verify64u(signature, message, verkey):
@@ -48,19 +102,19 @@ def verify64u(signature, message, verkey):
     key verkey
 
     :param signature: base64 url-file safe string signature
-    :param message: utf-8 string
+    :param message: utf-8 bytes or string
     :param verkey: base64 url-file safe string verification key
     :return: boolean
 
     """
     sig = str64uToBytes(signature)
-    bytes_vk = str64uToBytes(verkey)
-    vk = ecdsa.keys.VerifyingKey.from_string(bytes_vk, ecdsa.curves.SECP256k1)
+    point = decodeVerkey(verkey)
+    msg = message if isinstance(message, bytes) else message.encode("utf-8")
 
-    return verify(sig, message.encode(), vk)
+    return verifyPoint(sig, msg, point)
 
 
-def validateSignedResource(signature, resource, verkey):
+def validateSignedResource(signature, resource, verkey, rsrc=None):
     """
         Returns dict of deserialized resource if signature verifies for resource given
     verification key verkey in base64 url safe unicode format
@@ -70,20 +124,24 @@ def validateSignedResource(signature, resource, verkey):
         by signing bytes version of resource with privated signing key associated with
         public verification key referenced by key indexed signer field in resource
 
-    :param resource: json encoded unicode string of resource record
+    :param resource: json encoded resource record as bytes or unicode string
 
     :param verkey: base64 url-file safe unicode string public verification key referenced
         by signer field in resource. This is looked up in database from signer's
         agent data resource
 
+    :param rsrc: dict deserialized resource if the caller already parsed it,
+        resource is then only verified and not parsed again
+
     :return: dict deserialized json resource
     """
 
     try:
-        try:
-            rsrc = json.loads(resource, object_pairs_hook=ODict)
-        except ValueError as ex:
-            raise didering.ValidationError("Invalid JSON")  # invalid json
+        if rsrc is None:
+            try:
+                rsrc = json.loads(resource, object_pairs_hook=ODict)
+            except ValueError as ex:
+                raise didering.ValidationError("Invalid JSON")  # invalid json
 
         if not verify64u(signature, resource, verkey):
             raise didering.ValidationError("Unverifiable signature")  # signature fails
@@ -20,11 +20,15 @@ def verify(sig, msg, vk):
     :param vk: utf-8 encoded byte string message
     :return: boolean True if valid False otherwise
     """
+    # the signature is checked detached so the message is never copied
+    if len(sig) != libnacl.crypto_sign_BYTES or len(vk) != libnacl.crypto_sign_PUBLICKEYBYTES:
+        return False  # libsodium reads fixed size buffers
+
     try:
-        result = libnacl.crypto_sign_open(sig + msg, vk)
+        libnacl.crypto_sign_verify_detached(sig, msg, vk)
     except Exception as ex:
         return False
-    return True if result else False
+    return True
 
 
 def verify64u(signature, message, verkey):
@@ -33,17 +37,17 @@ def verify64u(signature, message, verkey):
     key verkey
 
     :param signature: base64 url-file safe encoded signature string
-    :param message: json encoded unicode string of resource record
+    :param message: json encoded resource record as bytes or unicode string
     :param verkey: base64 url-file safe encoded public key string
     :return: boolean True if valid False otherwise
     """
     sig = str64uToBytes(signature)
     vk = str64uToBytes(verkey)
-    # msg = message.encode("utf-8")
-    return verify(sig, message.encode(), vk)
+    msg = message if isinstance(message, bytes) else message.encode("utf-8")
+    return verify(sig, msg, vk)
 
 
-def validateSignedResource(signature, resource, verkey):
+def validateSignedResource(signature, resource, verkey, rsrc=None):
     """
     Returns dict of deserialized resource if signature verifies for resource given
     verification key verkey in base64 url safe unicode format
@@ -53,20 +57,24 @@ def validateSignedResource(signature, resource, verkey):
         by signing bytes version of resource with privated signing key associated with
         public verification key referenced by key indexed signer field in resource
 
-    :param resource: json encoded unicode string of resource record
+    :param resource: json encoded resource record as bytes or unicode string
 
     :param verkey: base64 url-file safe unicode string public verification key referenced
         by signer field in resource. This is looked up in database from signer's
         agent data resource
 
+    :param rsrc: dict deserialized resource if the caller already parsed it,
+        resource is then only verified and not parsed again
+
     :return: dict deserialized json resource
     """
 
     try:
-        try:
-            rsrc = json.loads(resource, object_pairs_hook=ODict)
-        except ValueError as ex:
-            raise didering.ValidationError("Invalid JSON")  # invalid json
+        if rsrc is None:
+            try:
+                rsrc = json.loads(resource, object_pairs_hook=ODict)
+            except ValueError as ex:
+                raise didering.ValidationError("Invalid JSON")  # invalid json
 
         if not verify64u(signature, resource, verkey):
             raise didering.ValidationError("Unverifiable signature")  # signature fails
@@ -0,0 +1,103 @@
+from concurrent.futures import ProcessPoolExecutor
+
+from didery import didering
+from didery.crypto import factory as cryptoFactory
+
+DEFAULT_POOL_SIZE = 0  # worker processes verifying signatures, 0 verifies in the server process
+
+verifiers = None  # pool has not been set up yet
+
+
+def verifySignature(kind, signature, resource, verkey, rsrc=None):
+    """
+    Verify a signature in a worker process. Runs the same validation function
+    the server would pick for the signature scheme.
+
+    :param kind: string name of the signature scheme, None for EdDSA
+    :param signature: base64 url-file safe unicode string signature
+    :param resource: json encoded resource record as bytes or unicode string
+    :param verkey: base64 url-file safe unicode string public verification key
+    :param rsrc: dict already deserialized resource, skips parsing resource again
+    :return: string reason the signature failed or None if it verified
+    """
+    cryptoValidator = cryptoFactory.signatureValidationFactory({"name": kind})
+
+    try:
+        cryptoValidator(signature, resource, verkey, rsrc)
+    except didering.ValidationError as ex:
+        return str(ex)
+
+    return None
+
+
+class VerifierPool:
+    """
+    Pool of worker processes that verify signatures so slow verifications
+    use every core instead of the single server thread.
+    """
+    def __init__(self, size):
+        """
+        :param size: int number of worker processes
+        """
+        self.size = size
+        self.executor = ProcessPoolExecutor(max_workers=size)
+
+    def submit(self, kind, signature, resource, verkey, rsrc=None):
+        """
+        Queue a signature for verification
+
+        :param kind: string name of the signature scheme, None for EdDSA
+        :param signature: base64 url-file safe unicode string signature
+        :param resource: json encoded resource record as bytes or unicode string
+        :param verkey: base64 url-file safe unicode string public verification key
+        :param rsrc: dict already deserialized resource, skips parsing resource again
+        :return: concurrent.futures.Future resolving to the result of verifySignature
+        """
+        return self.executor.submit(verifySignature, kind, signature, resource, verkey, rsrc)
+
+    def verify(self, kind, signature, resource, verkey, rsrc=None):
+        """
+        Verify a signature in a worker process and wait for the result
+
+        :param kind: string name of the signature scheme, None for EdDSA
+        :param signature: base64 url-file safe unicode string signature
+        :param resource: json encoded resource record as bytes or unicode string
+        :param verkey: base64 url-file safe unicode string public verification key
+        :param rsrc: dict already deserialized resource, skips parsing resource again
+        :return: string reason the signature failed or None if it verified
+        """
+        return self.submit(kind, signature, resource, verkey, rsrc).result()
+
+    def close(self):
+        """
+        Stop the worker processes
+        """
+        self.executor.shutdown(wait=True)
+
+
+def setupVerifierPool(size=DEFAULT_POOL_SIZE):
+    """
+    Setup the module global verifiers. A size of 0 verifies signatures in the
+    server process.
+
+    :param size: int number of worker processes
+    :return: VerifierPool or None
+    """
+    global verifiers
+
+    closeVerifierPool()
+
+    verifiers = VerifierPool(size) if size > 0 else None
+
+    return verifiers
+
+
+def closeVerifierPool():
+    """
+    Stop the worker processes of the module global verifiers if there are any
+    """
+    global verifiers
+
+    if verifiers is not None:
+        verifiers.close()
+        verifiers = None
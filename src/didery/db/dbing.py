@@ -1,15 +1,27 @@
 import lmdb
 import os
+import threading
 try:
     import simplejson as json
 except ImportError:
     import json
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
 
 from ..models.models import ValidatedHistoryModel, ValidatedEventsModel
-from ..did.didering import Did
+from ..did.didering import parseDid
+from ..help import helping
+from . import publishing
 
 
 MAX_DB_COUNT = 8
+DEFAULT_MAP_SIZE = 10 * 1024 * 1024  # lmdb's own default of 10 MiB
+DEFAULT_MAX_READERS = 126
+MAP_GROWTH_FACTOR = 2
+STREAM_BATCH_SIZE = 100  # records read per transaction and sent per chunk by DB.streamAll
+MAX_CHANGE_LOG_SIZE = 10000  # history changes kept for stream subscribers to catch up on
 
 DATABASE_DIR_PATH = "/var/didery/db"
 ALT_DATABASE_DIR_PATH = os.path.join('~', '.consensys/didery/db')
@@ -17,15 +29,31 @@ ALT_DATABASE_DIR_PATH = os.path.join('~', '.consensys/didery/db')
 DB_EVENT_HISTORY_NAME = b'event_history'
 DB_KEY_HISTORY_NAME = b'key_history'
 DB_OTP_BLOB_NAME = b'otp_blob'
+DB_CHANGE_LOG_NAME = b'change_log'
 
 gDbDirPath = None   # database directory location has not been set up yet
+gMaxMapSize = 0     # upper bound for automatic map growth, 0 means unbounded
 dideryDB = None    # database environment has not been set up yet
+gUnitOfWork = threading.local()  # holds the write transaction of the running unit of work
+gCodec = None       # value codec has not been set up yet
+gCounts = {}        # cached (transaction id, entry count) keyed by sub database name, dropped on writes
 historyDB = None
 otpDB = None
 eventsDB = None
 
 
-def setupDbEnv(baseDirPath=None, port=8080, mode="method"):
+def setupDbEnv(baseDirPath=None,
+               port=8080,
+               mode="method",
+               mapSize=DEFAULT_MAP_SIZE,
+               maxMapSize=0,
+               writemap=False,
+               mapAsync=False,
+               readahead=True,
+               maxReaders=DEFAULT_MAX_READERS,
+               sync=True,
+               metasync=True,
+               codec="json"):
     """
     Setup the module globals gDbDirPath, and dideryDB using baseDirPath
     if provided otherwise use DATABASE_DIR_PATH
@@ -35,8 +63,28 @@ def setupDbEnv(baseDirPath=None, port=8080, mode="method"):
         used to differentiate dbs for multiple didery servers running on the same computer
     :param mode: string
         Didery's operating mode
+    :param mapSize: int
+        initial size of the lmdb memory map in bytes
+    :param maxMapSize: int
+        largest size in bytes the memory map may grow to when it fills up. 0 for no limit
+    :param writemap: boolean
+        use a writeable memory map
+    :param mapAsync: boolean
+        flush the writeable memory map asynchronously
+    :param readahead: boolean
+        allow the OS to read ahead when reading the memory map
+    :param maxReaders: int
+        maximum number of simultaneous read transactions
+    :param sync: boolean
+        flush buffers to disk on commit
+    :param metasync: boolean
+        flush the meta page to disk on commit
+    :param codec: string
+        name of the codec in CODECS used to encode stored values
     """
-    global gDbDirPath, dideryDB
+    global gDbDirPath, gMaxMapSize, gCodec, dideryDB
+
+    gCodec = getCodec(codec)
 
     if not baseDirPath:
         baseDirPath = "{}{}".format(DATABASE_DIR_PATH, port)
@@ -59,16 +107,308 @@ def setupDbEnv(baseDirPath=None, port=8080, mode="method"):
 
     gDbDirPath = baseDirPath  # set global
 
-    dideryDB = lmdb.open(gDbDirPath, max_dbs=MAX_DB_COUNT)
+    gMaxMapSize = maxMapSize
+
+    if dideryDB is not None:
+        # lmdb allows one open environment per database in a process, the
+        # DB wrappers re-bind to the new one on their next operation
+        dideryDB.close()
+
+    dideryDB = lmdb.open(gDbDirPath,
+                         max_dbs=MAX_DB_COUNT,
+                         map_size=mapSize,
+                         writemap=writemap,
+                         map_async=mapAsync,
+                         readahead=readahead,
+                         max_readers=maxReaders,
+                         sync=sync,
+                         metasync=metasync)
     dideryDB.open_db(DB_EVENT_HISTORY_NAME)
     dideryDB.open_db(DB_KEY_HISTORY_NAME)
     dideryDB.open_db(DB_OTP_BLOB_NAME)
+    dideryDB.open_db(DB_CHANGE_LOG_NAME)
+
+    gCounts.clear()  # counts belonged to the previous environment
 
     createDBWrappers(mode=mode)
 
     return dideryDB
 
 
+class JsonCodec:
+    """
+    Stores values as plain json text. Records are not tagged with a format
+    byte so databases written before codecs existed can still be read.
+    """
+    name = "json"
+    tag = b""
+
+    def encode(self, data):
+        return json.dumps(data).encode()
+
+    def decode(self, raw):
+        return json.loads(bytes(raw))
+
+
+class MsgpackCodec:
+    """
+    Stores values as msgpack prefixed with a format byte. More compact and
+    faster to encode and decode than json. Requires the msgpack package.
+    """
+    name = "msgpack"
+    tag = b"\x01"
+
+    def encode(self, data):
+        return self.tag + msgpack.packb(data, use_bin_type=True)
+
+    def decode(self, raw):
+        return msgpack.unpackb(memoryview(raw)[1:], raw=False)
+
+
+CODECS = {codec.name: codec for codec in (JsonCodec(), MsgpackCodec())}
+TAGGED_CODECS = {codec.tag: codec for codec in CODECS.values() if codec.tag}
+
+
+def getCodec(name):
+    """
+    Returns the codec registered in CODECS under name.
+    Raises ValueError if it does not exist or its package is not installed.
+
+    :param name: string codec name
+    :return: codec
+    """
+    if name not in CODECS:
+        raise ValueError("Unknown codec {}. Use one of {}.".format(name, ", ".join(sorted(CODECS))))
+
+    if name == MsgpackCodec.name and msgpack is None:
+        raise ValueError("The msgpack codec requires the msgpack package.")
+
+    return CODECS[name]
+
+
+def encodeValue(data):
+    """
+    Encode data for storage with the codec selected in setupDbEnv
+
+    :param data: dict
+    :return: bytes
+    """
+    return (gCodec or CODECS[JsonCodec.name]).encode(data)
+
+
+def decodeValue(raw):
+    """
+    Decode a stored value with the codec its format byte names.
+    Untagged values are json.
+
+    :param raw: bytes or buffer
+    :return: dict
+    """
+    return TAGGED_CODECS.get(bytes(raw[:1]), CODECS[JsonCodec.name]).decode(raw)
+
+
+def valueToJson(raw):
+    """
+    Returns the stored value raw as json encoded bytes. Values stored as
+    json are copied as they are, other formats are decoded and re-encoded.
+
+    :param raw: bytes or buffer
+    :return: bytes
+    """
+    if bytes(raw[:1]) in TAGGED_CODECS:
+        return json.dumps(decodeValue(raw)).encode()
+
+    return bytes(raw)  # copy out, buffers are only valid inside their transaction
+
+
+class MapLock:
+    """
+    Process wide reader/writer lock between the transactions of the database
+    environment and resizes of its memory map. LMDB must not resize the map
+    while any thread of the process has a transaction open, buffers handed
+    out by read transactions would point into the old map. Any number of
+    threads can hold transactions at once. A resize waits for them to end
+    and holds off new ones until it is done.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.condition = threading.Condition(self.lock)
+        self.holders = 0
+        self.resizing = False
+        self.generation = 0  # number of resizes so far
+
+    def acquire(self):
+        """
+        Wait until no resize is running and register a transaction about to begin
+
+        :return: int resize generation, passed to growMap if the map turns out to be full
+        """
+        with self.lock:  # the condition's lock, entered directly as it is on every transaction
+            while self.resizing:
+                self.condition.wait()
+
+            self.holders += 1
+
+            return self.generation
+
+    def release(self):
+        """
+        Register that a transaction ended
+        """
+        with self.lock:
+            self.holders -= 1
+
+            if not self.holders and self.resizing:
+                self.condition.notify_all()
+
+    def acquireResize(self):
+        """
+        Wait for every open transaction to end and hold off new ones.
+        Must not be called by a thread holding a transaction.
+        """
+        with self.condition:
+            while self.resizing:
+                self.condition.wait()
+
+            self.resizing = True
+
+            while self.holders:
+                self.condition.wait()
+
+    def releaseResize(self):
+        """
+        Let transactions begin again after a resize
+        """
+        with self.condition:
+            self.resizing = False
+            self.generation += 1
+            self.condition.notify_all()
+
+
+gMapLock = MapLock()
+
+
+def growMap(env, generation=None):
+    """
+    Grow the memory map of env by MAP_GROWTH_FACTOR, capped at gMaxMapSize.
+    Waits for the transactions other threads of this process have open, so
+    it must not be called while this thread has one open.
+    Raises lmdb.MapFullError if the map can not grow any further.
+
+    :param env: lmdb.Environment
+    :param generation: int resize generation returned by gMapLock.acquire for
+        the transaction that found the map full. If another thread resized
+        the map since, it is not grown again.
+    :return: int new map size in bytes
+    """
+    gMapLock.acquireResize()
+
+    try:
+        current = env.info()['map_size']
+
+        if generation is not None and generation != gMapLock.generation:
+            return current  # grown by another thread that found it full too
+
+        size = current * MAP_GROWTH_FACTOR
+
+        if gMaxMapSize:
+            size = min(size, gMaxMapSize)
+
+        if size <= current:
+            raise lmdb.MapFullError("Database map is full and reached its maximum size of {} bytes.".format(current))
+
+        env.set_mapsize(size)
+
+        return size
+    finally:
+        gMapLock.releaseResize()
+
+
+def adoptMapSize(env):
+    """
+    Adopt the map size another process grew the environment to. LMDB refuses
+    to begin transactions in this process until it does. Like growMap it
+    waits for the transactions other threads have open.
+
+    :param env: lmdb.Environment
+    :return: int new map size in bytes
+    """
+    gMapLock.acquireResize()
+
+    try:
+        env.set_mapsize(0)
+
+        return env.info()['map_size']
+    finally:
+        gMapLock.releaseResize()
+
+
+def currentTxn():
+    """
+    Returns the write transaction of the unit of work running in this
+    thread or None if there is none.
+
+    :return: lmdb.Transaction
+    """
+    return getattr(gUnitOfWork, "txn", None)
+
+
+def atomic(fn):
+    """
+    Run fn as a single unit of work. Every DB read and write made while fn
+    runs, in any table, shares one LMDB write transaction that is committed
+    once when fn returns and aborted if fn raises, so related tables never
+    diverge. If the map fills up the transaction is aborted, the map is grown
+    and fn is run again. Nested calls join the outer unit of work.
+
+    :param fn: function taking no arguments
+    :return: the result of fn
+    """
+    if currentTxn() is not None:
+        return fn()
+
+    while True:
+        gUnitOfWork.committed = []  # callbacks of an aborted attempt are dropped
+        generation = gMapLock.acquire()
+        try:
+            try:
+                with dideryDB.begin(write=True) as txn:
+                    gUnitOfWork.txn = txn
+                    try:
+                        result = fn()
+                    finally:
+                        gUnitOfWork.txn = None
+            finally:
+                gMapLock.release()
+            break
+        except lmdb.MapFullError:
+            growMap(dideryDB, generation)
+        except lmdb.MapResizedError:
+            adoptMapSize(dideryDB)
+        finally:
+            gCounts.clear()  # counts read while the unit of work ran may be stale
+
+    committed, gUnitOfWork.committed = gUnitOfWork.committed, []
+    for callback in committed:
+        callback()
+
+    return result
+
+
+def afterCommit(callback):
+    """
+    Run callback once the writes made so far are committed. Inside a unit of
+    work it runs after atomic() commits and never if the unit of work aborts,
+    otherwise every write has already been committed and it runs right away.
+
+    :param callback: function taking no arguments
+    """
+    if currentTxn() is not None:
+        gUnitOfWork.committed.append(callback)
+    else:
+        callback()
+
+
 def createDBWrappers(mode="method"):
     global historyDB, otpDB, eventsDB
 
@@ -88,6 +428,59 @@ def createDBWrappers(mode="method"):
     otpDB = BaseBlobDB()
 
 
+class StoredRecord:
+    """
+    Remembers the last decoded value of one stored record together with the
+    bytes it was decoded from. Passing the same StoredRecord to every DB.get
+    and DB.update made for a key while handling a request means the record
+    is only decoded once, as long as nothing else changes it in between.
+    """
+    def __init__(self):
+        self.raw = None
+        self.value = None
+
+    def decode(self, raw):
+        """
+        Returns the decoded value of raw, decoding it only if it differs from
+        the bytes that were decoded last.
+
+        :param raw: bytes or buffer stored value
+        :return: dict
+        """
+        if raw is None:
+            return None
+
+        raw = bytes(raw)
+        if raw != self.raw:
+            self.raw = raw
+            self.value = decodeValue(raw)
+
+        return self.value
+
+    def take(self, raw):
+        """
+        Like decode but forgets the value afterwards because the caller is
+        going to modify it.
+
+        :param raw: bytes or buffer stored value
+        :return: dict
+        """
+        value = self.decode(raw)
+        self.raw = self.value = None
+
+        return value
+
+    def keep(self, raw, value):
+        """
+        Remember value as the decoded form of raw.
+
+        :param raw: bytes stored value
+        :param value: dict
+        """
+        self.raw = bytes(raw)
+        self.value = value
+
+
 class DB:
     def __init__(self, namedDB):
         """
@@ -95,17 +488,67 @@ class DB:
             name of the table to be accessed
         """
         self.namedDB = namedDB
+        self.env = None
+        self._subDb = None
+
+        if dideryDB is not None:
+            self.bind(dideryDB)
+
+    def bind(self, env):
+        """
+            Resolve and keep the sub database handle for namedDB so that
+            individual operations only pay for their transaction.
+
+            :param env: lmdb.Environment the handle belongs to
+        """
+        gMapLock.acquire()
+        try:
+            self._subDb = env.open_db(self.namedDB)
+        finally:
+            gMapLock.release()
+
+        self.env = env
+
+    @property
+    def subDb(self):
+        """
+            Cached sub database handle. Re-binds when the database
+            environment has been reopened since the handle was resolved.
+
+            :return: lmdb._Database
+        """
+        if self.env is not dideryDB:
+            txn = currentTxn()
+            if txn is not None:
+                # open_db would wait on the write lock the unit of work already holds.
+                # Don't cache the handle, it is closed again if the unit of work aborts.
+                return dideryDB.open_db(self.namedDB, txn=txn)
+
+            self.bind(dideryDB)
+
+        return self._subDb
 
     def count(self):
         """
-            Gets a count of the number of entries in the table
+            Gets a count of the number of entries in the table. The count is
+            cached until the next write to the table, by this or any other
+            process sharing the database.
 
             :return: int count
         """
-        subDb = dideryDB.open_db(self.namedDB)
+        if currentTxn() is not None:
+            return self._read(lambda txn, subDb: txn.stat(subDb)['entries'])
 
-        with dideryDB.begin(db=subDb, write=False) as txn:
-            return txn.stat(subDb)['entries']
+        txnId = self.env.info()['last_txnid'] if self.env is not None else None
+        cached = gCounts.get(self.namedDB)
+
+        if cached is not None and cached[0] == txnId:
+            return cached[1]
+
+        count = self._read(lambda txn, subDb: txn.stat(subDb)['entries'])
+        gCounts[self.namedDB] = (txnId, count)
+
+        return count
 
     def save(self, key, data):
         """
@@ -119,57 +562,195 @@ class DB:
         """
         # TODO check if did length in bytes exceeds lmdb's max key length
         # TODO register an error in the error DB if it is
-        subDb = dideryDB.open_db(self.namedDB)
+        value = encodeValue(data)
 
-        with dideryDB.begin(db=subDb, write=True) as txn:
-            txn.put(
-                key.encode(),
-                json.dumps(data).encode()
-            )
+        self._write(lambda txn, subDb: txn.put(key.encode(), value, db=subDb))
+
+    def update(self, key, fn, record=None):
+        """
+            Read, modify and store the value of key in a single write transaction
+            so no other write can happen between the read and the write.
+
+            :param key: string
+                key to identify data
+            :param fn: function
+                takes the stored dict, or None if key does not exist yet, and
+                returns the dict to store. May be called again if the write
+                has to be retried.
+            :param record: StoredRecord
+                previously decoded value of key, reused if the stored value
+                has not changed since
+            :return: dict the data that was stored
+        """
+        def modify(txn, subDb):
+            raw_data = txn.get(key.encode(), db=subDb)
+
+            if record is None:
+                data = fn(None if raw_data is None else decodeValue(raw_data))
+                txn.put(key.encode(), encodeValue(data), db=subDb)
 
-    def get(self, key):
+                return data
+
+            data = fn(record.take(raw_data))  # fn may modify the value in place
+            raw_data = encodeValue(data)
+            txn.put(key.encode(), raw_data, db=subDb)
+            record.keep(raw_data, data)
+
+            return data
+
+        return self._write(modify)
+
+    def get(self, key, record=None):
         """
             Find and return a key value pair
 
             :param key: string
                 key to look up
+            :param record: StoredRecord
+                previously decoded value of key, reused if the stored value
+                has not changed since
             :return: dict
         """
-        subDb = dideryDB.open_db(self.namedDB)
+        def find(txn, subDb):
+            raw_data = txn.get(key.encode(), db=subDb)
 
-        with dideryDB.begin(db=subDb, write=False) as txn:
-            raw_data = txn.get(key.encode())
+            if raw_data is None:
+                return None
+
+            if record is not None:
+                return record.decode(raw_data)
+
+            return decodeValue(raw_data)
+
+        return self._read(find)
+
+    def getJson(self, key):
+        """
+            Find and return the value of key as json encoded bytes.
+            Values stored as json are copied straight out of the memory map
+            without being decoded and encoded again.
+
+            :param key: string
+                key to look up
+            :return: bytes
+        """
+        def find(txn, subDb):
+            raw_data = txn.get(key.encode(), db=subDb)
 
             if raw_data is None:
                 return None
 
-            return json.loads(raw_data)
+            return valueToJson(raw_data)
+
+        return self._read(find, buffers=True)
 
-    def getAll(self, offset=0, limit=10):
+    def getAll(self, offset=0, limit=10, cursor=None):
         """
-            Get all key value pairs in a range between the offset and offset+limit
+            Get all key value pairs in a range between the offset and offset+limit.
+            If cursor is supplied the range starts after the key it references
+            instead of at the first key in the table.
 
             :param offset: int starting point of the range
             :param limit: int maximum number of entries to return
+            :param cursor: string continuation token returned by a previous call
             :return: dict
         """
-        subDb = dideryDB.open_db(self.namedDB)
-        values = {"data": []}
+        after = None if cursor is None else helping.cursorToKey(cursor)
+
+        def page(txn, subDb):
+            data, lastKey, more = self._scan(txn, subDb, after, offset, limit, decodeValue)
+            values = {"data": data}
 
-        with dideryDB.begin(db=subDb, write=False) as txn:
-            cursor = txn.cursor()
+            # Only hand out a token when there is something left to read
+            if more and lastKey is not None:
+                values["next"] = helping.keyToCursor(lastKey)
 
-            count = 0
-            for key, value in cursor:
-                if count >= limit+offset:
-                    break
+            return values
 
-                if offset < count+1:
-                    values["data"].append(json.loads(value))
+        return self._read(page)
 
-                count += 1
+    def streamAll(self, offset=0, limit=10, cursor=None):
+        """
+            Generator version of getAll. Yields the json encoding of the dict
+            getAll would return in pieces of up to STREAM_BATCH_SIZE records.
+            Each piece is read in its own short read transaction so memory use
+            and time to first byte do not depend on limit or the table size.
+
+            :param offset: int starting point of the range
+            :param limit: int maximum number of entries to return
+            :param cursor: string continuation token returned by a previous call
+            :return: generator of bytes
+        """
+        after = None if cursor is None else helping.cursorToKey(cursor)
+        separator = b''
+        remaining = limit
+        lastKey = None
+        more = True
+        chunk = b'{"data": ['
+
+        while remaining > 0 and more:
+            size = min(remaining, STREAM_BATCH_SIZE)
+            data, key, more = self._read(
+                lambda txn, subDb: self._scan(txn, subDb, after, offset, size, valueToJson),
+                buffers=True
+            )
 
-        return values
+            if not data:
+                break
+
+            chunk += separator + b', '.join(data)
+            yield chunk
+
+            chunk = b''
+            separator = b', '
+            remaining -= len(data)
+            after = lastKey = key
+            offset = 0
+
+        chunk += b']'
+        if more and lastKey is not None:
+            chunk += ', "next": "{}"'.format(helping.keyToCursor(lastKey)).encode()
+
+        yield chunk + b'}'
+
+    def _scan(self, txn, subDb, after, offset, limit, convert):
+        """
+            Read up to limit values from txn in key order, starting after key
+            after, or at the first key if after is None, and skipping offset entries.
+
+            :param txn: lmdb.Transaction
+            :param subDb: lmdb._Database
+            :param after: bytes key to start after or None
+            :param offset: int number of entries to skip
+            :param limit: int maximum number of values to read
+            :param convert: function applied to each stored value
+            :return: list of converted values, bytes last key read or None,
+                boolean True if there are entries after the last key read
+        """
+        dbCursor = txn.cursor(db=subDb)
+
+        if after is None:
+            found = dbCursor.first()
+        else:
+            found = dbCursor.set_range(after)
+
+            if found and dbCursor.key() == after:
+                found = dbCursor.next()
+
+        for i in range(offset):
+            if not found:
+                break
+
+            found = dbCursor.next()
+
+        values = []
+        lastKey = None
+        while found and len(values) < limit:
+            lastKey = bytes(dbCursor.key())
+            values.append(convert(dbCursor.value()))
+            found = dbCursor.next()
+
+        return values, lastKey, found
 
     def delete(self, key):
         """
@@ -179,12 +760,72 @@ class DB:
                 key to delete
             :return: boolean
         """
-        subDb = dideryDB.open_db(self.namedDB)
+        return self._write(lambda txn, subDb: txn.delete(key.encode(), db=subDb))
+
+    def _read(self, op, buffers=False):
+        """
+            Run op in a read transaction, or in the current unit of work
+            if there is one so that it sees the writes made so far.
+
+            :param op: function taking an lmdb.Transaction and lmdb._Database
+            :param buffers: boolean
+                have the read transaction return memoryviews into the map
+                instead of copies
+            :return: the result of op
+        """
+        subDb = self.subDb
+        txn = currentTxn()
+
+        if txn is not None:
+            return op(txn, subDb)
+
+        while True:
+            gMapLock.acquire()
+            try:
+                with self.env.begin(db=subDb, write=False, buffers=buffers) as txn:
+                    return op(txn, subDb)
+            except lmdb.MapResizedError:
+                pass
+            finally:
+                gMapLock.release()
+
+            adoptMapSize(self.env)
+
+    def _write(self, op):
+        """
+            Run op in a write transaction. If the map fills up the transaction
+            is aborted, the map is grown and op is run again.
+            Inside a unit of work op joins its transaction instead and a full
+            map is left for atomic() to handle.
+
+            :param op: function taking an lmdb.Transaction and lmdb._Database
+            :return: the result of op
+        """
+        subDb = self.subDb
+        txn = currentTxn()
+
+        if txn is not None:
+            gCounts.pop(self.namedDB, None)
+            return op(txn, subDb)
 
-        with dideryDB.begin(db=subDb, write=True) as txn:
-            status = txn.delete(key.encode())
+        while True:
+            generation = gMapLock.acquire()
+            try:
+                with self.env.begin(db=subDb, write=True) as txn:
+                    return op(txn, subDb)
+            except lmdb.MapFullError:
+                full = True
+            except lmdb.MapResizedError:
+                full = False
+            finally:
+                gMapLock.release()
+                gCounts.pop(self.namedDB, None)
 
-            return status
+            # resize once the transaction is released, a resize waits for every open one
+            if full:
+                growMap(self.env, generation)
+            else:
+                adoptMapSize(self.env)
 
 
 class BaseEventsDB:
@@ -213,7 +854,7 @@ class BaseEventsDB:
             :param sigs: dict
                 A dict containing the rotation history signatures
         """
-        did = Did(did).did  # remove path, query, and fragment from did
+        did = parseDid(did).did  # remove path, query, and fragment from did
         db_entry = [
             [
                 {
@@ -235,19 +876,44 @@ class BaseEventsDB:
                 W3C DID identifier for rotation history events
             :return: dict
         """
-        did = Did(did).did  # remove path, query, and fragment from did
+        did = parseDid(did).did  # remove path, query, and fragment from did
         json = self.db.get(did)
         return None if json is None else ValidatedEventsModel(json)
 
-    def getAllEvents(self, offset=0, limit=10):
+    def getEventJson(self, did):
+        """
+            Find and return an event history matching the supplied did
+            as json encoded bytes.
+
+            :param did: string
+                W3C DID identifier for rotation history events
+            :return: bytes
+        """
+        did = parseDid(did).did  # remove path, query, and fragment from did
+        return self.db.getJson(did)
+
+    def getAllEvents(self, offset=0, limit=10, cursor=None):
         """
             Get all events in a range between the offset and offset+limit
 
             :param offset: int starting point of the range
             :param limit: int maximum number of entries to return
+            :param cursor: string continuation token from a previous page
             :return: dict
         """
-        return self.db.getAll(offset, limit)
+        return self.db.getAll(offset, limit, cursor)
+
+    def streamAllEvents(self, offset=0, limit=10, cursor=None):
+        """
+            Stream all events in a range between the offset and offset+limit
+            as json encoded chunks
+
+            :param offset: int starting point of the range
+            :param limit: int maximum number of entries to return
+            :param cursor: string continuation token from a previous page
+            :return: generator of bytes
+        """
+        return self.db.streamAll(offset, limit, cursor)
 
     def deleteEvent(self, did, vk=None):
         """
@@ -259,7 +925,7 @@ class BaseEventsDB:
             public key in data to be deleted
         :return: boolean
         """
-        did = Did(did).did  # remove path, query, and fragment from did
+        did = parseDid(did).did  # remove path, query, and fragment from did
         data = self.getEvent(did)
 
         if data is None:
@@ -304,28 +970,28 @@ class MethodEventsDB(BaseEventsDB):
             :param sigs: dict
                 A dict containing the rotation history signatures
         """
-        did = Did(did).did  # remove path, query, and fragment from did
+        did = parseDid(did).did  # remove path, query, and fragment from did
         root_vk = data['signers'][0]
-        event = self.getEvent(did)
 
-        db_entry = [
-            [
-                {
-                    "event": data,
-                    "signatures": sigs
-                },
+        def merge(existing):
+            db_entry = [
+                [
+                    {
+                        "event": data,
+                        "signatures": sigs
+                    },
+                ]
             ]
-        ]
 
-        # Make sure we grab, format, and append existing data
-        if event is not None:
-            for key, item in enumerate(event.to_list()):
-                if item[0]["event"]["signers"][0] == root_vk:
-                    db_entry[0].extend(item)
+            # Make sure we grab, format, and append existing data
+            if existing is not None:
+                for key, item in enumerate(existing):
+                    if item[0]["event"]["signers"][0] == root_vk:
+                        db_entry[0].extend(item)
 
-        self.db.save(did, db_entry)
+            return db_entry
 
-        return db_entry
+        return self.db.update(did, merge)
 
 
 class RaceEventsDB(BaseEventsDB):
@@ -346,29 +1012,30 @@ class RaceEventsDB(BaseEventsDB):
             :param sigs: dict
                 A dict containing the rotation history signatures
         """
-        did = Did(did).did  # remove path, query, and fragment from did
-        db_entry = []
-        event = self.getEvent(did)
+        did = parseDid(did).did  # remove path, query, and fragment from did
 
         update = {
             "event": data,
             "signatures": sigs
         }
 
-        # Make sure existing data is formatted correctly
-        if event is not None:
-            event = event.to_list()
-            temp = [update]
-            temp.extend(event[0])
-            event[0] = temp
+        def merge(existing):
+            db_entry = []
 
-            db_entry = event
-        else:
-            db_entry.append([update])
+            # Make sure existing data is formatted correctly
+            if existing is not None:
+                event = existing
+                temp = [update]
+                temp.extend(event[0])
+                event[0] = temp
 
-        self.db.save(did, db_entry)
+                db_entry = event
+            else:
+                db_entry.append([update])
 
-        return db_entry
+            return db_entry
+
+        return self.db.update(did, merge)
 
 
 class PromiscuousEventsDB(BaseEventsDB):
@@ -389,44 +1056,162 @@ class PromiscuousEventsDB(BaseEventsDB):
             :param sigs: dict
                 A dict containing the rotation history signatures
         """
-        did = Did(did).did  # remove path, query, and fragment from did
-        db_entry = []
+        did = parseDid(did).did  # remove path, query, and fragment from did
         root_vk = data['signers'][0]
-        event = self.getEvent(did)
 
-        update = [
-            {
-                "event": data,
-                "signatures": sigs
-            }
-        ]
+        def merge(existing):
+            db_entry = []
+            update = [
+                {
+                    "event": data,
+                    "signatures": sigs
+                }
+            ]
 
-        otherEvents = []
+            otherEvents = []
 
-        if event is not None:
-            for key, item in enumerate(event.to_list()):
-                if item[0]["event"]["signers"][0] == root_vk:
-                    update.extend(item)
-                else:
-                    otherEvents.append(item)
+            if existing is not None:
+                for key, item in enumerate(existing):
+                    if item[0]["event"]["signers"][0] == root_vk:
+                        update.extend(item)
+                    else:
+                        otherEvents.append(item)
 
-        db_entry.append(update)
-        db_entry.extend(otherEvents)
+            db_entry.append(update)
+            db_entry.extend(otherEvents)
 
-        self.db.save(did, db_entry)
+            return db_entry
 
-        return db_entry
+        return self.db.update(did, merge)
+
+
+class ChangeLogDB:
+    """
+    Bounded log of rotation history changes keyed by a durable, monotonically
+    increasing sequence number. Each entry holds the did and the json encoded
+    change so stream subscribers can catch up on what they missed.
+    """
+    def __init__(self, db=None, size=MAX_CHANGE_LOG_SIZE):
+        """
+            :param db: DB for interacting with lmdb
+            :param size: int maximum number of changes kept
+        """
+        if db is None:
+            self.db = DB(DB_CHANGE_LOG_NAME)
+        else:
+            self.db = db
+
+        self.size = size
+
+    @staticmethod
+    def sequenceToKey(sequence):
+        """
+            Returns the key of sequence, zero padded so keys sort in sequence order
+
+            :param sequence: int
+            :return: bytes
+        """
+        return "{:020d}".format(sequence).encode()
+
+    def record(self, did, data):
+        """
+            Append a change of did to the log, dropping the oldest change
+            once the log is full. Joins the current unit of work if there is one.
+
+            :param did: string
+                W3C did string without path, query, or fragment
+            :param data: bytes
+                json encoded change
+            :return: int sequence number of the change
+        """
+        def append(txn, subDb):
+            dbCursor = txn.cursor(db=subDb)
+            sequence = int(dbCursor.key()) + 1 if dbCursor.last() else 1
+
+            txn.put(self.sequenceToKey(sequence), did.encode() + b" " + data, db=subDb)
+
+            if txn.stat(subDb)['entries'] > self.size and dbCursor.first():
+                dbCursor.delete()
+
+            return sequence
+
+        return self.db._write(append)
+
+    def latest(self):
+        """
+            Returns the sequence number of the last recorded change or 0 if
+            nothing was recorded yet
+
+            :return: int
+        """
+        def last(txn, subDb):
+            dbCursor = txn.cursor(db=subDb)
+            return int(dbCursor.key()) if dbCursor.last() else 0
+
+        return self.db._read(last)
+
+    def oldest(self):
+        """
+            Returns the sequence number of the oldest change still in the log
+            or None if the log is empty
+
+            :return: int
+        """
+        def first(txn, subDb):
+            dbCursor = txn.cursor(db=subDb)
+            return int(dbCursor.key()) if dbCursor.first() else None
+
+        return self.db._read(first)
+
+    def entries(self, after):
+        """
+            Returns every change recorded after sequence number after along
+            with the did that changed
+
+            :param after: int sequence number of the last change already seen
+            :return: list of (int sequence, string did, bytes json encoded change) tuples
+        """
+        def scan(txn, subDb):
+            dbCursor = txn.cursor(db=subDb)
+            changes = []
+
+            if not dbCursor.set_range(self.sequenceToKey(after + 1)):
+                return changes
+
+            for key, value in dbCursor:
+                did, data = bytes(value).split(b" ", 1)
+                changes.append((int(key), did.decode(), data))
+
+            return changes
+
+        return self.db._read(scan)
+
+    def since(self, after, did=None):
+        """
+            Returns the changes recorded after sequence number after
+
+            :param after: int sequence number of the last change already seen
+            :param did: string
+                only return changes of this did, None for every did
+            :return: list of (int sequence, bytes json encoded change) tuples
+        """
+        return [(sequence, data) for sequence, changed, data in self.entries(after)
+                if did is None or changed == did]
 
 
 class BaseHistoryDB:
-    def __init__(self, db=None):
+    def __init__(self, db=None, changes=None):
         """
             :param db: DB for interacting with lmdb
+            :param changes: ChangeLogDB recording changes, only created
+                when db is not supplied
         """
         if db is None:
             self.db = DB(DB_KEY_HISTORY_NAME)
+            self.changes = ChangeLogDB() if changes is None else changes
         else:
             self.db = db
+            self.changes = changes
 
     def historyCount(self):
         """
@@ -436,7 +1221,46 @@ class BaseHistoryDB:
         """
         return self.db.count()
 
-    def saveHistory(self, did, data, sigs):
+    def change(self, fn):
+        """
+            Run fn, a write that records its change, so that the write and
+            the change log entry are committed together.
+
+            :param fn: function taking no arguments
+            :return: the result of fn
+        """
+        if self.changes is None:
+            return fn()
+
+        return atomic(fn)
+
+    def recordChange(self, did, value):
+        """
+            Record that the stored value of did changed in the change log and
+            tell history stream subscribers once the change is committed.
+            The change is json encoded once, the log entry and the events of
+            the subscribers share the encoding. The log always needs it, so
+            it is only skipped when there is no log and nobody subscribed to
+            changes of did.
+
+            :param did: string
+                W3C did string without path, query, or fragment
+            :param value: list
+                the stored rotation histories of did or None if they were deleted
+        """
+        hub = publishing.historyChanges
+
+        if self.changes is None and not hub.watched(did):
+            return
+
+        data = json.dumps({"id": did, "history": value}, ensure_ascii=False).encode()
+        sequence = None if self.changes is None else self.changes.record(did, data)
+
+        if hub.log is None:
+            afterCommit(lambda: hub.publish(did, data, sequence))
+        # otherwise the hub picks the change up from the log along with those of other processes
+
+    def saveHistory(self, did, data, sigs, record=None):
         """
             Store a rotation history and signatures
 
@@ -446,9 +1270,11 @@ class BaseHistoryDB:
                 A dict containing the rotation history
             :param sigs: dict
                 A dict containing the rotation history signatures
+            :param record: StoredRecord
+                request scoped cache of the decoded history
 
         """
-        did = Did(did).did  # remove path, query, and fragment from did
+        did = parseDid(did).did  # remove path, query, and fragment from did
         certifiable_data = [
             {
                 "history": data,
@@ -456,31 +1282,62 @@ class BaseHistoryDB:
             }
         ]
 
-        self.db.save(did, certifiable_data)
+        def save():
+            self.db.save(did, certifiable_data)
+            self.recordChange(did, certifiable_data)
 
-        return certifiable_data
+            return certifiable_data
 
-    def getHistory(self, did):
+        return self.change(save)
+
+    def getHistory(self, did, record=None):
         """
             Find and return a key rotation history matching the supplied did.
 
             :param did: string
                 W3C did identifier for history object
+            :param record: StoredRecord
+                request scoped cache of the decoded history
             :return: dict
         """
-        did = Did(did).did  # remove path, query, and fragment from did
-        json = self.db.get(did)
+        did = parseDid(did).did  # remove path, query, and fragment from did
+        json = self.db.get(did, record)
         return None if json is None else ValidatedHistoryModel(json)
 
-    def getAllHistories(self, offset=0, limit=10):
+    def getHistoryJson(self, did):
+        """
+            Find and return a key rotation history matching the supplied did
+            as json encoded bytes.
+
+            :param did: string
+                W3C did identifier for history object
+            :return: bytes
+        """
+        did = parseDid(did).did  # remove path, query, and fragment from did
+        return self.db.getJson(did)
+
+    def getAllHistories(self, offset=0, limit=10, cursor=None):
         """
             Get all rotation histories in a range between the offset and offset+limit
 
             :param offset: int starting point of the range
             :param limit: int maximum number of entries to return
+            :param cursor: string continuation token from a previous page
             :return: dict
         """
-        return self.db.getAll(offset, limit)
+        return self.db.getAll(offset, limit, cursor)
+
+    def streamAllHistories(self, offset=0, limit=10, cursor=None):
+        """
+            Stream all rotation histories in a range between the offset and offset+limit
+            as json encoded chunks
+
+            :param offset: int starting point of the range
+            :param limit: int maximum number of entries to return
+            :param cursor: string continuation token from a previous page
+            :return: generator of bytes
+        """
+        return self.db.streamAll(offset, limit, cursor)
 
     def deleteHistory(self, did, vk=None):
         """
@@ -492,38 +1349,48 @@ class BaseHistoryDB:
                 public key of data to be deleted
             :return: boolean
         """
-        did = Did(did).did  # remove path, query, and fragment from did
-        data = self.getHistory(did)
+        did = parseDid(did).did  # remove path, query, and fragment from did
 
-        if data is None:
-            return None
+        def delete():
+            data = self.getHistory(did)
 
-        length = len(data.data)
+            if data is None:
+                return None
 
-        if length == 1 or vk is None:
-            success = self.db.delete(did)
-            return data.data if success else None
+            length = len(data.data)
 
-        index = data.find(vk)
+            if length == 1 or vk is None:
+                success = self.db.delete(did)
 
-        if index is None:
-            return None
+                if success:
+                    self.recordChange(did, None)
 
-        removed = data.data.pop(index)
+                return data.data if success else None
 
-        self.db.save(did, data.data)
+            index = data.find(vk)
 
-        return removed
+            if index is None:
+                return None
+
+            removed = data.data.pop(index)
+
+            self.db.save(did, data.data)
+            self.recordChange(did, data.data)
+
+            return removed
+
+        return self.change(delete)
 
 
 class RaceHistoryDB(BaseHistoryDB):
-    def __init__(self, db=None):
+    def __init__(self, db=None, changes=None):
         """
         :param db: DB for interacting with lmdb
+        :param changes: ChangeLogDB recording changes
         """
-        BaseHistoryDB.__init__(self, db)
+        BaseHistoryDB.__init__(self, db, changes)
 
-    def saveHistory(self, did, data, sigs):
+    def saveHistory(self, did, data, sigs, record=None):
         """
             Store a rotation history and signatures
 
@@ -533,35 +1400,45 @@ class RaceHistoryDB(BaseHistoryDB):
                 A dict containing the rotation history
             :param sigs: dict
                 A dict containing the rotation history signatures
+            :param record: StoredRecord
+                request scoped cache of the decoded history
         """
-        did = Did(did).did  # remove path, query, and fragment from did
-        history = self.getHistory(did)
+        did = parseDid(did).did  # remove path, query, and fragment from did
 
-        update = [
-            {
-                "history": data,
-                "signatures": sigs
-            }
-        ]
+        def merge(existing):
+            update = [
+                {
+                    "history": data,
+                    "signatures": sigs
+                }
+            ]
+
+            # Make sure existing data is formatted correctly
+            if existing is not None:
+                history = ValidatedHistoryModel(existing)
+                history.update(0, update[0])
+                update = history.data
+
+            return update
 
-        # Make sure existing data is formatted correctly
-        if history is not None:
-            history.update(0, update[0])
-            update = history.data
+        def save():
+            stored = self.db.update(did, merge, record)
+            self.recordChange(did, stored)
 
-        self.db.save(did, update)
+            return stored
 
-        return update
+        return self.change(save)
 
 
 class PromiscuousHistoryDB(BaseHistoryDB):
-    def __init__(self, db=None):
+    def __init__(self, db=None, changes=None):
         """
         :param db: DB for interacting with lmdb
+        :param changes: ChangeLogDB recording changes
         """
-        BaseHistoryDB.__init__(self, db)
+        BaseHistoryDB.__init__(self, db, changes)
 
-    def saveHistory(self, did, data, sigs):
+    def saveHistory(self, did, data, sigs, record=None):
         """
             Store a rotation history and signatures
 
@@ -571,26 +1448,35 @@ class PromiscuousHistoryDB(BaseHistoryDB):
                 A dict containing the rotation history
             :param sigs: dict
                 A dict containing the rotation history signatures
+            :param record: StoredRecord
+                request scoped cache of the decoded history
         """
-        did = Did(did).did  # remove path, query, and fragment from did
+        did = parseDid(did).did  # remove path, query, and fragment from did
         root_vk = data['signers'][0]
-        histories = self.getHistory(did)
 
         update = {
             "history": data,
             "signatures": sigs
         }
-        db_entry = [update]
 
-        # Make sure existing data is formatted correctly
-        if histories is not None:
-            for key, history in enumerate(histories.data):
-                if history["history"]["signers"][0] != root_vk:
-                    db_entry.append(history)
+        def merge(existing):
+            db_entry = [update]
 
-        self.db.save(did, db_entry)
+            # Make sure existing data is formatted correctly
+            if existing is not None:
+                for key, history in enumerate(existing):
+                    if history["history"]["signers"][0] != root_vk:
+                        db_entry.append(history)
 
-        return db_entry
+            return db_entry
+
+        def save():
+            stored = self.db.update(did, merge, record)
+            self.recordChange(did, stored)
+
+            return stored
+
+        return self.change(save)
 
 
 class BaseBlobDB:
@@ -624,7 +1510,7 @@ class BaseBlobDB:
                 A dict containing the otp encrypted keys signatures
 
         """
-        did = Did(did).did  # remove path, query, and fragment from did
+        did = parseDid(did).did  # remove path, query, and fragment from did
         certifiable_data = {
             "otp_data": data,
             "signatures": sigs
@@ -642,18 +1528,43 @@ class BaseBlobDB:
                 W3C did identifier for history object
             :return: dict
         """
-        did = Did(did).did  # remove path, query, and fragment from did
+        did = parseDid(did).did  # remove path, query, and fragment from did
         return self.db.get(did)
 
-    def getAllOtpBlobs(self, offset=0, limit=10):
+    def getOtpBlobJson(self, did):
+        """
+            Find and return an otp encrypted key matching the supplied did
+            as json encoded bytes.
+
+            :param did: string
+                W3C did identifier for history object
+            :return: bytes
+        """
+        did = parseDid(did).did  # remove path, query, and fragment from did
+        return self.db.getJson(did)
+
+    def getAllOtpBlobs(self, offset=0, limit=10, cursor=None):
         """
             Get all otp encrypted keys in a range between the offset and offset+limit
 
             :param offset: int starting point of the range
             :param limit: int maximum number of entries to return
+            :param cursor: string continuation token from a previous page
             :return: dict
         """
-        return self.db.getAll(offset, limit)
+        return self.db.getAll(offset, limit, cursor)
+
+    def streamAllOtpBlobs(self, offset=0, limit=10, cursor=None):
+        """
+            Stream all otp encrypted keys in a range between the offset and offset+limit
+            as json encoded chunks
+
+            :param offset: int starting point of the range
+            :param limit: int maximum number of entries to return
+            :param cursor: string continuation token from a previous page
+            :return: generator of bytes
+        """
+        return self.db.streamAll(offset, limit, cursor)
 
     def deleteOtpBlob(self, did):
         """
@@ -663,5 +1574,5 @@ class BaseBlobDB:
                 W3C did identifier for history object
             :return: boolean
         """
-        did = Did(did).did  # remove path, query, and fragment from did
+        did = parseDid(did).did  # remove path, query, and fragment from did
         return self.db.delete(did)
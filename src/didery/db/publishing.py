@@ -0,0 +1,201 @@
+import threading
+
+from collections import deque
+
+SUBSCRIBER_QUEUE_SIZE = 1000  # undelivered events kept per subscriber, older ones are dropped
+
+
+def formatEvent(sequence, data, event=b"message"):
+    """
+    Returns a server-sent event
+
+    :param sequence: int event id
+    :param data: bytes json encoded event data
+    :param event: bytes event type
+    :return: bytes
+    """
+    return b"id:" + str(sequence).encode() + b"\nevent:" + event + b"\ndata:" + data + b"\n\n"
+
+
+class Subscription:
+    """
+    Queue of events waiting to be delivered to one subscriber
+    """
+    def __init__(self, hub, did=None, size=SUBSCRIBER_QUEUE_SIZE):
+        """
+        :param hub: ChangeHub the subscription belongs to
+        :param did: string did to receive changes for, None for every did
+        :param size: int maximum number of undelivered events
+        """
+        self.hub = hub
+        self.did = did
+        self.after = 0  # changes up to this sequence number were already sent some other way
+        self.events = deque(maxlen=size)
+        self.ready = threading.Event()  # set while events are queued
+        self.notify = None  # function called after an event is queued, from the publishing thread
+
+    def push(self, sequence, event):
+        """
+        Queue an event, dropping the oldest one if the queue is full
+
+        :param sequence: int sequence number of the change
+        :param event: bytes server-sent event
+        """
+        self.events.append((sequence, event))
+        self.ready.set()
+
+        if self.notify is not None:
+            self.notify()
+
+    def wait(self, timeout):
+        """
+        Block until an event is queued or timeout passed. Only for servers
+        that give every connection its own thread.
+
+        :param timeout: float seconds to wait
+        :return: boolean True if events are queued
+        """
+        return self.ready.wait(timeout)
+
+    def drain(self):
+        """
+        Returns and removes every queued event
+
+        :return: bytes
+        """
+        self.ready.clear()  # before popping so a concurrent push sets it again
+        events = []
+        while self.events:
+            sequence, event = self.events.popleft()
+
+            if sequence > self.after:
+                events.append(event)
+
+        return b''.join(events)
+
+    def close(self):
+        """
+        Stop receiving events
+        """
+        self.hub.unsubscribe(self)
+
+
+class ChangeHub:
+    """
+    In-process fan-out of stored changes to subscribers. Publishing only
+    queues events, subscribers pick them up whenever they are serviced, so
+    neither side ever waits on the other.
+    """
+    def __init__(self):
+        self.sequence = 0
+        self.subscribers = {}  # did, or None for every did, to set of Subscription
+        self.lock = threading.Lock()
+        self.catching = threading.Lock()  # held by the thread catching up on the log
+        self.log = None  # durable change log followed instead of publishing local writes
+
+    def follow(self, log):
+        """
+        Publish the changes recorded in log instead of the ones published by
+        this process. Used when several processes write to the same database
+        so subscribers see the changes of every process, in log order.
+
+        :param log: dbing.ChangeLogDB or None to publish local writes again
+        """
+        with self.lock:
+            self.log = log
+            self.sequence = log.latest() if log is not None else self.sequence
+
+    def catchUp(self):
+        """
+        Publish the changes recorded in the followed log since the last
+        change published
+
+        :return: int number of changes published
+        """
+        log = self.log
+
+        if log is None or not self.catching.acquire(blocking=False):
+            return 0  # not following or another thread is already at it
+
+        try:
+            if not self.subscribers:
+                # nobody to tell, subscribers skip everything recorded before they subscribe
+                self.sequence = max(self.sequence, log.latest())
+                return 0
+
+            changes = log.entries(self.sequence)
+
+            for sequence, did, data in changes:
+                self.publish(did, data, sequence)
+
+            return len(changes)
+        finally:
+            self.catching.release()
+
+    def subscribe(self, did=None):
+        """
+        Returns a new Subscription to changes of did
+
+        :param did: string did to receive changes for, None for every did
+        :return: Subscription
+        """
+        subscription = Subscription(self, did)
+
+        with self.lock:
+            self.subscribers.setdefault(did, set()).add(subscription)
+
+        return subscription
+
+    def unsubscribe(self, subscription):
+        """
+        Remove subscription from the hub
+
+        :param subscription: Subscription
+        """
+        with self.lock:
+            subscribers = self.subscribers.get(subscription.did)
+
+            if subscribers is not None:
+                subscribers.discard(subscription)
+
+                if not subscribers:
+                    del self.subscribers[subscription.did]
+
+    def watched(self, did):
+        """
+        Returns True if anybody subscribed to changes of did
+
+        :param did: string did
+        :return: boolean
+        """
+        return None in self.subscribers or did in self.subscribers
+
+    def publish(self, did, data, sequence=None):
+        """
+        Queue a change of did for its subscribers
+
+        :param did: string did that changed
+        :param data: bytes json encoded change
+        :param sequence: int durable sequence number of the change, None
+            numbers it after the last change published
+        :return: int sequence number of the change
+        """
+        with self.lock:
+            self.sequence = self.sequence + 1 if sequence is None else max(self.sequence, sequence)
+            sequence = self.sequence if sequence is None else sequence
+
+            if not self.watched(did):
+                return sequence  # nobody to format the event for
+
+            event = formatEvent(sequence, data)
+
+            for subscription in self.subscribers.get(None, ()):
+                subscription.push(sequence, event)
+
+            for subscription in self.subscribers.get(did, ()):
+                subscription.push(sequence, event)
+
+            return sequence
+
+
+historyChanges = ChangeHub()  # changes of the rotation history table
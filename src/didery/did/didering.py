@@ -1,6 +1,8 @@
 import re
 import importlib
 
+from functools import lru_cache
+
 """
 did-reference      = did [ "/" did-path ] [ "?" did-query ] [ "#" did-fragment ]
 did                = "did:" method ":" specific-idstring
@@ -17,6 +19,50 @@ found here https://tools.ietf.org/html/rfc3986#appendix-B
 """
 DID_RE = re.compile(r"""^((did):([a-z\d]+):([:\w.\-=]+))([^?#]*)(?:\?([^#]*))?(?:#(.*))?""")
 
+PARSE_CACHE_SIZE = 4096  # parsed did references remembered
+
+
+class ParsedDid:
+    """
+    Immutable parts of a parsed did reference. did holds the canonical
+    "scheme:method:idstring" form without path, query, or fragment.
+    """
+    __slots__ = ("did", "scheme", "method", "idString", "path", "query", "fragment")
+
+    def __init__(self, did, scheme, method, idString, path, query, fragment):
+        for name, value in zip(self.__slots__, (did, scheme, method, idString, path, query, fragment)):
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("ParsedDid is immutable.")
+
+    def __delattr__(self, name):
+        raise AttributeError("ParsedDid is immutable.")
+
+    def __repr__(self):
+        return "ParsedDid({!r})".format(self.did)
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def parseDid(did_reference):
+    """
+    Returns the ParsedDid of a did reference. Results are memoized so the
+    same did is only matched against DID_RE once.
+    raises ValueError if did_reference is not a valid did
+
+    :param did_reference: complete did string ie:
+        "did:dad:iy67FstqFl_a5e-sni6yAWoj60-1E2RtzmMGjrjHaSY=?color=blue&type=tshirt/customers/1234#test_did"
+    :return: ParsedDid
+    """
+    if not did_reference.startswith("did"):
+        raise ValueError("Invalid Scheme Value.")
+
+    matches = DID_RE.match(did_reference)
+    if not matches:
+        raise ValueError("Could not parse DID.")
+
+    return ParsedDid(*matches.groups())
+
 
 class Did:
     def __init__(self, did_reference):
@@ -37,18 +83,19 @@ class Did:
         Parses and saves DID parts from self.__did_reference
         raises ValueError if fails parsing
         """
-        matches = DID_RE.match(self.__did_reference)
-        if matches:
-            self.__did, self.scheme, self.method, self.idString, self.path, self.query, self.fragment = matches.groups()
-        else:
-            raise ValueError("Could not parse DID.")
+        parsed = parseDid(self.__did_reference)
+
+        self.__did = parsed.did
+        self.scheme = parsed.scheme
+        self.method = parsed.method
+        self.idString = parsed.idString
+        self.path = parsed.path
+        self.query = parsed.query
+        self.fragment = parsed.fragment
 
         return self
 
     def _validate(self):
-        if not self.__did_reference.startswith("did"):
-            raise ValueError("Invalid Scheme Value.")
-
         self._extractDidParts()
 
     @property
@@ -1,6 +1,7 @@
 from collections import OrderedDict as ODict
 import falcon
 import base64
+import binascii
 import base58
 import tempfile
 import os
@@ -144,9 +145,49 @@ def makeDid(vk, method="dad"):
     return did
 
 
+def keyToCursor(key):
+    """
+    Convert and return a database key as an opaque pagination cursor.
+    The cursor is base64 url-file safe without padding so it can be used
+    in a url query string as is.
+
+    :param key: byte string database key
+    :return: unicode string cursor
+    """
+    return base64.urlsafe_b64encode(key).decode("utf-8").rstrip("=")
+
+
+def cursorToKey(cursor):
+    """
+    Convert and return a pagination cursor as the database key it references.
+    Raises ValueError if the cursor cannot be decoded.
+
+    :param cursor: unicode string cursor created by keyToCursor
+    :return: byte string database key
+    """
+    if not cursor:
+        raise ValueError("Empty cursor.")
+
+    padding = "=" * (-len(cursor) % 4)
+
+    try:
+        key = base64.urlsafe_b64decode((cursor + padding).encode("utf-8"))
+    except (binascii.Error, UnicodeEncodeError) as ex:
+        raise ValueError("Invalid cursor.")
+
+    if not key:
+        raise ValueError("Invalid cursor.")
+
+    return key
+
+
+MAX_PAGE_LIMIT = 1000  # largest page a list endpoint will return, larger limits are clamped
+
+
 def parseQString(req, resp, resource, params):
     req.offset = 0
     req.limit = 10
+    req.cursor = None
 
     if req.query_string:
         queries = req.query_string.split('&')
@@ -155,7 +196,9 @@ def parseQString(req, resp, resource, params):
             if key == 'offset':
                 req.offset = val
             if key == 'limit':
-                req.limit = val
+                req.limit = min(val, MAX_PAGE_LIMIT)
+            if key == 'cursor':
+                req.cursor = val
 
 
 def qStringValidation(query):
@@ -169,6 +212,16 @@ def qStringValidation(query):
     key = keyval[0]
     val = keyval[1]
 
+    if key == 'cursor':
+        try:
+            cursorToKey(val)
+        except ValueError as ex:
+            raise falcon.HTTPError(falcon.HTTP_400,
+                                   'Malformed Query String',
+                                   'url query string cursor is invalid.')
+
+        return key, val
+
     try:
         val = int(val)
     except ValueError as ex:
@@ -4,6 +4,7 @@ from didery.controllers import relays
 from didery.controllers import errors
 from didery.controllers import static
 from didery.controllers import events
+from didery.controllers import status
 
 STATIC_BASE_PATH = "/static"
 DEFAULT_STATIC_BASE_PATH = "/"
@@ -13,11 +14,12 @@ BLOB_BASE_PATH = "/blob"
 RELAY_BASE_PATH = "/relay"
 ERRORS_BASE_PATH = "/errors"
 EVENTS_BASE_PATH = "/event"
+STATUS_BASE_PATH = "/status"
 
 
 class CORSMiddleware:
     def process_request(self, req, resp):
-        resp.set_header('Access-Control-Max-Age:', '3600')
+        resp.set_header('Access-Control-Max-Age', '3600')
         resp.set_header('Access-Control-Allow-Origin', '*')
         resp.set_header('Access-Control-Allow-Methods',
                                    'PUT, GET, POST, DELETE, HEAD, OPTIONS')
@@ -25,25 +27,38 @@ class CORSMiddleware:
                                    'Origin, Accept, Content-Type, X-Requested-With, X-CSRF-Token, X-Auth-Token, Signature')
 
 
-def loadEndPoints(app, store, mode):
+def loadEndPoints(app, store, mode, streamWait=0, streamGenerator=None):
     """
     Add Rest endpoints to a falcon.API object by mapping the API's routes.
     :param app: falcon.API object
     :param store: Store
         ioflo datastore
+    :param mode: string
+        Didery's operating mode
+    :param streamWait: float
+        seconds history streams block waiting for changes, 0 never blocks
+    :param streamGenerator: function
+        building history stream bodies, like didery.core.aioserving.historyEvents,
+        None for the blocking generator
     """
 
     sink = static.StaticSink()
     app.add_sink(sink, prefix=DEFAULT_STATIC_BASE_PATH)
 
+    historyBatch = histories.HistoryBatch(store, mode)
+    app.add_route('{}/batch'.format(HISTORY_BASE_PATH), historyBatch)
+
     history = histories.History(store, mode)
     app.add_route('{}/{{did}}'.format(HISTORY_BASE_PATH), history)
     app.add_route('{}'.format(HISTORY_BASE_PATH), history)
 
-    historyStream = histories.HistoryStream(store)
+    historyStream = histories.HistoryStream(store, streamWait, streamGenerator)
     app.add_route('{}{}/{{did}}'.format(STREAM_BASE_PATH, HISTORY_BASE_PATH), historyStream)
     app.add_route('{}{}'.format(STREAM_BASE_PATH, HISTORY_BASE_PATH), historyStream)
 
+    blobBatch = blobs.OtpBlobBatch(store, mode)
+    app.add_route('{}/batch'.format(BLOB_BASE_PATH), blobBatch)
+
     blob = blobs.OtpBlob(store, mode)
     app.add_route('{}/{{did}}'.format(BLOB_BASE_PATH), blob)
     app.add_route('{}'.format(BLOB_BASE_PATH), blob)
@@ -58,3 +73,6 @@ def loadEndPoints(app, store, mode):
     event = events.Event(store)
     app.add_route('{}/{{did}}'.format(EVENTS_BASE_PATH), event)
     app.add_route('{}'.format(EVENTS_BASE_PATH), event)
+
+    state = status.Status(store)
+    app.add_route('{}'.format(STATUS_BASE_PATH), state)
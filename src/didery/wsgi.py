@@ -0,0 +1,82 @@
+"""
+WSGI entry point for running didery under a standard WSGI server instead of
+the ioflo flo script, for example:
+
+    gunicorn --workers 4 --threads 8 'didery.wsgi:createApp("/var/didery/db", "method", shared=True)'
+
+The server's own worker model replaces ioflo's Valet. Every worker process
+has to call createApp itself, after it was forked, because lmdb environments
+and verifier pools can't be shared across a fork.
+"""
+import falcon
+
+from ioflo.base import storing
+
+from didery import routing
+from didery.db import dbing
+from didery.db import publishing
+from didery.crypto import caching
+from didery.crypto import pooling
+
+STREAM_WAIT = 1.0  # seconds a history stream thread blocks waiting for changes
+
+
+def createApp(dbPath=None,
+              mode="method",
+              port=8080,
+              lmdb=None,
+              sigCache=None,
+              verifyWorkers=0,
+              shared=False,
+              streamWait=STREAM_WAIT,
+              streamGenerator=None,
+              store=None):
+    """
+    Returns the didery falcon.API WSGI app after setting up the database,
+    verified signature cache and verifier pool it serves from
+
+    :param dbPath: string
+        directory where the database is located, None for the default of port
+    :param mode: string
+        Didery's operating mode
+    :param port: int
+        used to pick the default database directory
+    :param lmdb: dict
+        lmdb environment options passed on to dbing.setupDbEnv
+    :param sigCache: dict
+        size and ttl of the verified signature cache
+    :param verifyWorkers: int
+        number of processes verifying signatures, 0 verifies in the request thread
+    :param shared: boolean
+        other processes write to the same database, like the other workers
+        of a preforking server. History streams then follow the database
+        change log to see their changes.
+    :param streamWait: float
+        seconds history streams block waiting for changes, 0 never blocks
+    :param streamGenerator: function
+        building history stream bodies, didery.core.aioserving.historyEvents
+        for the asyncio server, None for the blocking generator
+    :param store: Store
+        ioflo datastore handed to the controllers, a new one if None
+    :return: falcon.API
+    """
+    dbing.setupDbEnv(dbPath, port, mode=mode, **(lmdb or {}))
+    caching.setupVerifiedSignatures(**(sigCache or {}))
+    pooling.setupVerifierPool(verifyWorkers)
+
+    if shared and dbing.historyDB.changes is not None:
+        publishing.historyChanges.follow(dbing.historyDB.changes)
+    else:
+        publishing.historyChanges.follow(None)
+
+    app = falcon.API(middleware=[routing.CORSMiddleware()])
+    routing.loadEndPoints(app,
+                          store=store if store is not None else storing.Store(stamp=0.0),
+                          mode=mode,
+                          streamWait=streamWait,
+                          streamGenerator=streamGenerator)
+
+    return app
+
+
+create_app = createApp  # conventional name of WSGI app factories
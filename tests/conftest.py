@@ -0,0 +1,20 @@
+import pytest
+
+
+def pytest_addoption(parser):
+    parser.addoption("--benchmarks", action="store_true", default=False,
+                     help="run the timing tests marked with benchmark")
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "benchmark: timing test, only run with --benchmarks")
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--benchmarks"):
+        return
+
+    skip = pytest.mark.skip(reason="timing test, run with --benchmarks")
+    for item in items:
+        if "benchmark" in item.keywords:
+            item.add_marker(skip)
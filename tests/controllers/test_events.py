@@ -211,7 +211,59 @@ class TestEventsMethodMode:
         response = client.simulate_get(EVENTS_BASE_PATH)
 
         assert response.status == falcon.HTTP_200
-        assert json.loads(response.content) == {"data": []}
+        assert json.loads(response.content) == {}
+
+
+    def testGetAllPaginated(self, client):
+        dids = []
+        for i in range(0, 3):
+            vk, sk, did, body = eddsa.genDidHistory(signer=0, numSigners=2)
+            db.eventsDB.saveEvent(did, json.loads(body), {"signer": eddsa.signResource(body, sk)})
+            dids.append(did)
+
+        dids.sort()
+
+        response = client.simulate_get(EVENTS_BASE_PATH, query_string="offset=1&limit=1")
+        result = json.loads(response.content)
+
+        assert response.status == falcon.HTTP_200
+        assert response.headers["X-Total-Count"] == "3"
+        assert [entry[0][0]["event"]["id"] for entry in result["data"]] == dids[1:2]
+
+        response = client.simulate_get(EVENTS_BASE_PATH, query_string="limit=2&cursor={}".format(result["next"]))
+        result = json.loads(response.content)
+
+        assert response.status == falcon.HTTP_200
+        assert [entry[0][0]["event"]["id"] for entry in result["data"]] == dids[2:]
+        assert "next" not in result
+
+    def testGetAllOffsetOutOfRange(self, client):
+        vk, sk, did, body = eddsa.genDidHistory(signer=0, numSigners=2)
+        db.eventsDB.saveEvent(did, json.loads(body), {"signer": eddsa.signResource(body, sk)})
+
+        response = client.simulate_get(EVENTS_BASE_PATH, query_string="offset=1&limit=1")
+
+        assert response.status == falcon.HTTP_200
+        assert json.loads(response.content) == {}
+
+    def testGetAllLimitIsCapped(self, client, monkeypatch):
+        monkeypatch.setattr(h, "MAX_PAGE_LIMIT", 2)
+
+        for i in range(0, 3):
+            vk, sk, did, body = eddsa.genDidHistory(signer=0, numSigners=2)
+            db.eventsDB.saveEvent(did, json.loads(body), {"signer": eddsa.signResource(body, sk)})
+
+        response = client.simulate_get(EVENTS_BASE_PATH, query_string="limit=100")
+        result = json.loads(response.content)
+
+        assert response.status == falcon.HTTP_200
+        assert len(result["data"]) == 2
+        assert "next" in result
+
+    def testGetAllInvalidQueryString(self, client):
+        response = client.simulate_get(EVENTS_BASE_PATH, query_string="offset=a&limit=10")
+
+        assert response.status == falcon.HTTP_400
 
 
 class TestEventsPromiscuousMode:
@@ -583,7 +635,7 @@ class TestEventsPromiscuousMode:
         response = promiscuous_client.simulate_get(EVENTS_BASE_PATH)
 
         assert response.status == falcon.HTTP_200
-        assert json.loads(response.content) == {"data": []}
+        assert json.loads(response.content) == {}
 
 
 class TestEventsRaceMode:
@@ -799,4 +851,4 @@ class TestEventsRaceMode:
         response = race_client.simulate_get(EVENTS_BASE_PATH)
 
         assert response.status == falcon.HTTP_200
-        assert json.loads(response.content) == {"data": []}
+        assert json.loads(response.content) == {}
@@ -0,0 +1,68 @@
+import didery.crypto.eddsa as eddsa
+import falcon
+
+from didery.controllers import history as histories
+from didery.controllers.validation import factory
+from didery.controllers.validation import validating as validation
+from didery.routing import *
+
+
+def testHistoryPipelines():
+    for mode in ("method", "race", "promiscuous"):
+        pipelines = factory.historyPipelines(mode)
+
+        assert sorted(pipelines) == ["DELETE", "POST", "PUT"]
+
+        for method, pipeline in pipelines.items():
+            assert isinstance(pipeline, validation.CompositeValidator)
+            assert isinstance(pipeline.validators[0], validation.RequiredFieldsValidator)
+
+    assert factory.historyFactory("method", "GET") is None
+    assert factory.blobFactory("method", "patch") is None
+
+
+def testPipelineOrderIsIntrospectable():
+    pipeline = factory.historyFactory("method", "post")
+    names = [type(validator).__name__ for validator in pipeline.validators]
+
+    assert names[0] == "RequiredFieldsValidator"
+    assert names[-3:] == ["DidHijackingValidator", "HistoryDoesntExistValidator", "SignatureValidator"]
+    assert "SignatureValidator('signer', inceptionKey)" in repr(pipeline)
+
+
+def testPipelinesRunCheapChecksFirst():
+    for mode in ("method", "race", "promiscuous"):
+        for pipelines in (factory.historyPipelines(mode), factory.blobPipelines(mode)):
+            for method, pipeline in pipelines.items():
+                costs = [validator.cost for validator in pipeline.validators]
+
+                assert costs == sorted(costs)
+                assert costs[-1] == validation.COST_CRYPTO
+                assert not any(isinstance(validator, validation.CompositeValidator)
+                               for validator in pipeline.validators)
+
+    put = factory.historyFactory("method", "PUT").validators
+    names = [type(validator).__name__ for validator in put]
+
+    assert names.index("HistoryExistsValidator") < names.index("SignatureValidator")
+
+
+def testPipelinesAreReused(client):
+    history = histories.History(mode="method")
+    pipelines = dict(history.validators)
+
+    app = falcon.API()
+    app.add_route(HISTORY_BASE_PATH, history)
+    app.add_route("{}/{{did}}".format(HISTORY_BASE_PATH), history)
+    simulate = falcon.testing.TestClient(app)
+
+    for i in range(2):
+        vk, sk, did, body = eddsa.genDidHistory(signer=0, numSigners=2)
+        headers = {"Signature": 'signer="{0}"'.format(eddsa.signResource(body, sk))}
+
+        response = simulate.simulate_post(HISTORY_BASE_PATH, body=body, headers=headers)
+
+        assert response.status == falcon.HTTP_201
+
+    for method, pipeline in pipelines.items():
+        assert history.validators[method] is pipeline
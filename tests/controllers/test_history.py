@@ -27,6 +27,10 @@ from ioflo.base import storing
 from didery.routing import *
 from didery.help import helping as h
 from didery.db import dbing as db
+from didery.crypto import caching
+from didery.crypto import pooling
+from didery.db import publishing
+from didery.controllers.validation import factory
 
 
 SK = b"\xb3\xd0\xbdL]\xcc\x08\x90\xa5\xbd\xc6\xa1 '\x82\x9c\x18\xecf\xa6x\xe2]Ux\xa5c\x0f\xe2\x86*\xa04\xe7\xfaf\x08o\x18\xd6\xc5s\xfc+\xdc \xb4\xb4\xa6G\xcfZ\x96\x01\x1e%\x0f\x96\x8c\xfa-3J<"
@@ -551,14 +555,58 @@ def testPostMissingSignerTag(client):
 
 def testPostInvalidSignature(client):
     body = deepcopy(postData)
-    body['signers'][0] = "Qt27fThWoNZsa88VrTkep6H-4HA8tr54sHON1vWl6FE="
+    vk, sk = libnacl.crypto_sign_keypair()  # not the key in the signers field
+
+    bbody = json.dumps(body, ensure_ascii=False).encode('utf-8')
+    headers = {
+        "Signature": 'signer="{0}"'.format(eddsa.signResource(bbody, sk))
+    }
 
     exp_result = {
         "title": "Authorization Error",
         "description": "Could not validate the request signature for signer field. Unverifiable signature."
     }
 
-    verifyRequest(client.simulate_post, HISTORY_BASE_PATH, body, exp_result=exp_result, exp_status=falcon.HTTP_401)
+    verifyRequest(client.simulate_post, HISTORY_BASE_PATH, body, headers=headers, exp_result=exp_result, exp_status=falcon.HTTP_401)
+
+
+def testPostVerifiesInPool(client):
+    pooling.setupVerifierPool(1)
+
+    try:
+        vk, sk, did, body = eddsa.genDidHistory(signer=0, numSigners=2)
+        otherVk, otherSk = libnacl.crypto_sign_keypair()
+
+        headers = {"Signature": 'signer="{0}"'.format(eddsa.signResource(body, otherSk))}
+        response = client.simulate_post(HISTORY_BASE_PATH, body=body, headers=headers)
+
+        assert response.status == falcon.HTTP_401
+        assert response.json["description"] == "Could not validate the request signature for signer field. " \
+                                                "Unverifiable signature."
+
+        headers = {"Signature": 'signer="{0}"'.format(eddsa.signResource(body, sk))}
+        response = client.simulate_post(HISTORY_BASE_PATH, body=body, headers=headers)
+
+        assert response.status == falcon.HTTP_201
+    finally:
+        pooling.closeVerifierPool()
+
+
+def testPostRejectsHijackBeforeSignature(client, monkeypatch):
+    body = deepcopy(postData)
+    body['signers'][0] = "Qt27fThWoNZsa88VrTkep6H-4HA8tr54sHON1vWl6FE="
+
+    def verify(*args, **kwargs):
+        raise AssertionError("signature verified before structural checks")
+
+    monkeypatch.setattr(eddsa, "validateSignedResource", verify)
+
+    exp_result = {
+        "title": "Validation Error",
+        "description": "The first key in the signers field does not belong to this DID."
+    }
+
+    verifyRequest(client.simulate_post, HISTORY_BASE_PATH, body, exp_result=exp_result, exp_status=falcon.HTTP_400)
 
 
 def testPostDIDAndPublicKeyMatch(client):
@@ -778,29 +826,82 @@ def testPutMissingSignerSignature(client):
     verifyRequest(client.simulate_put, PUT_URL, body, headers, exp_result, falcon.HTTP_401)
 
 
+def postRotatableHistory(client):
+    """
+    Store a history whose signer and pre-rotated keys differ and return the
+    rotation body with the secret keys of both.
+    """
+    vk, sk = libnacl.crypto_sign_keypair()
+    pvk, psk = libnacl.crypto_sign_keypair()
+    ppvk, ppsk = libnacl.crypto_sign_keypair()
+
+    did = h.makeDid(vk)
+    body = {
+        "id": did,
+        "changed": "2000-01-01T00:00:00+00:00",
+        "signer": 0,
+        "signers": [h.bytesToStr64u(vk), h.bytesToStr64u(pvk)]
+    }
+    bbody = json.dumps(body, ensure_ascii=False).encode('utf-8')
+    headers = {
+        "Signature": 'signer="{0}"'.format(eddsa.signResource(bbody, sk))
+    }
+
+    verifyRequest(client.simulate_post, HISTORY_BASE_PATH, body, headers=headers, exp_status=falcon.HTTP_201)
+
+    body['signer'] = 1
+    body['changed'] = "2000-01-01T00:00:01+00:00"
+    body['signers'].append(h.bytesToStr64u(ppvk))
+
+    return body, sk, psk
+
+
 def testPutInvalidSignerSignature(client):
-    body = deepcopy(putData)
-    body['signers'][1] = "Xq5YqaL6L48pf0fu7IUhL0JRaU2_RxFP0AL43wYn148="
+    body, sk, psk = postRotatableHistory(client)
+
+    bbody = json.dumps(body, ensure_ascii=False).encode('utf-8')
+    headers = {
+        "Signature": 'signer="{0}"; rotation="{1}"'.format(eddsa.signResource(bbody, sk),
+                                                           eddsa.signResource(bbody, sk))
+    }
 
     exp_result = {
         "title": "Authorization Error",
         "description": "Could not validate the request signature for rotation field. Unverifiable signature."
     }
 
-    verifyRequest(client.simulate_put, PUT_URL, body, exp_result=exp_result, exp_status=falcon.HTTP_401)
+    url = "{0}/{1}".format(HISTORY_BASE_PATH, body['id'])
+    verifyRequest(client.simulate_put, url, body, headers=headers, exp_result=exp_result, exp_status=falcon.HTTP_401)
 
 
 def testPutInvalidRotationSignature(client):
-    body = deepcopy(putData)
-    body['signers'][0] = "Qt27fThWoNZsa88VrTkep6H-4HA8tr54sHON1vWl6FE="
-    body['signers'][1] = "NOf6ZghvGNbFc_wr3CC0tKZHz1qWAR4lD5aM-i0zSjw="
+    body, sk, psk = postRotatableHistory(client)
+
+    bbody = json.dumps(body, ensure_ascii=False).encode('utf-8')
+    headers = {
+        "Signature": 'signer="{0}"; rotation="{1}"'.format(eddsa.signResource(bbody, psk),
+                                                           eddsa.signResource(bbody, psk))
+    }
 
     exp_result = {
         "title": "Authorization Error",
         "description": "Could not validate the request signature for signer field. Unverifiable signature."
     }
 
-    verifyRequest(client.simulate_put, PUT_URL, body, exp_result=exp_result, exp_status=falcon.HTTP_401)
+    url = "{0}/{1}".format(HISTORY_BASE_PATH, body['id'])
+    verifyRequest(client.simulate_put, url, body, headers=headers, exp_result=exp_result, exp_status=falcon.HTTP_401)
+
+
+def testPutRejectsUnknownDidBeforeSignature(client, monkeypatch):
+    body = deepcopy(putData)
+    body['signers'][1] = "Xq5YqaL6L48pf0fu7IUhL0JRaU2_RxFP0AL43wYn148="
+
+    def verify(*args, **kwargs):
+        raise AssertionError("signature verified before the history was looked up")
+
+    monkeypatch.setattr(eddsa, "validateSignedResource", verify)
+
+    verifyRequest(client.simulate_put, PUT_URL, body, exp_status=falcon.HTTP_404)
 
 
 def testPutCryptography(client):
@@ -1241,6 +1342,345 @@ def testValidPut(client):
                   exp_status=falcon.HTTP_200)
 
 
+def testPutReadsHistoryOnce(client, monkeypatch):
+    vk, sk, did, body = eddsa.genDidHistory(signer=0, numSigners=2)
+
+    headers = {
+        "Signature": 'signer="{0}"'.format(eddsa.signResource(body, sk))
+    }
+
+    client.simulate_post(HISTORY_BASE_PATH, body=body, headers=headers)
+
+    body = json.loads(body)
+    body['changed'] = "2000-01-01T00:00:01+00:00"
+    body['signer'] = 1
+    body['signers'].append(body['signers'][0])
+    body = json.dumps(body, ensure_ascii=False).encode('utf-8')
+
+    headers = {
+        "Signature": 'signer="{0}"; rotation="{0}"'.format(eddsa.signResource(body, sk))
+    }
+
+    reads = []
+    get = db.historyDB.db.get
+
+    def countingGet(*args, **kwargs):
+        reads.append(args[0])
+        return get(*args, **kwargs)
+
+    decodes = []
+    decodeValue = db.decodeValue
+
+    def countingDecodeValue(raw):
+        decodes.append(raw)
+        return decodeValue(raw)
+
+    monkeypatch.setattr(db.historyDB.db, "get", countingGet)
+    monkeypatch.setattr(db, "decodeValue", countingDecodeValue)
+
+    response = client.simulate_put("{0}/{1}".format(HISTORY_BASE_PATH, did), body=body, headers=headers)
+
+    assert response.status == falcon.HTTP_200
+    # read again inside the write transaction but only decoded once
+    assert reads == [did, did]
+    assert len([raw for raw in decodes if bytes(raw).startswith(b'[{"history"')]) == 1
+
+
+def batchItem(body, sk):
+    return {
+        "body": body.decode('utf-8'),
+        "signature": 'signer="{0}"'.format(eddsa.signResource(body, sk))
+    }
+
+
+def testBatchPost(client, monkeypatch):
+    vk, sk, did, body = eddsa.genDidHistory(signer=0, numSigners=2)
+    otherVk, otherSk, otherDid, otherBody = eddsa.genDidHistory(signer=0, numSigners=2)
+    badVk, badSk, badDid, badBody = eddsa.genDidHistory(signer=0, numSigners=2)
+
+    items = [
+        batchItem(body, sk),
+        batchItem(otherBody, otherSk),
+        batchItem(badBody, sk),  # signed by the wrong key
+        batchItem(body, sk),  # same did twice in one batch
+        {"body": "[]", "signature": 'signer="{0}"'.format(eddsa.signResource(b"[]", sk))}
+    ]
+
+    units = []
+    atomic = db.atomic
+
+    def countingAtomic(fn):
+        if db.currentTxn() is None:  # nested calls join the outer unit of work
+            units.append(fn)
+        return atomic(fn)
+
+    monkeypatch.setattr(db, "atomic", countingAtomic)
+
+    response = client.simulate_post("{0}/batch".format(HISTORY_BASE_PATH), body=json.dumps(items))
+
+    assert response.status == falcon.HTTP_200
+    assert len(units) == 1
+
+    statuses = response.json["data"]
+    assert statuses[0] == {"id": did, "status": falcon.HTTP_201}
+    assert statuses[1] == {"id": otherDid, "status": falcon.HTTP_201}
+    assert statuses[2]["status"] == falcon.HTTP_401
+    assert statuses[3]["status"] == falcon.HTTP_400
+    assert statuses[3]["title"] == "Resource Already Exists"
+    assert statuses[4]["status"] == falcon.HTTP_400
+
+    assert json.loads(db.historyDB.getHistoryJson(did))[0]["history"] == json.loads(body)
+    assert json.loads(db.historyDB.getHistoryJson(otherDid))[0]["history"] == json.loads(otherBody)
+    assert db.historyDB.getHistoryJson(badDid) is None
+    assert db.eventsDB.getEvent(did) is not None
+
+    # a second batch with the same record is rejected by the database check
+    response = client.simulate_post("{0}/batch".format(HISTORY_BASE_PATH), body=json.dumps(items[:1]))
+
+    assert response.json["data"][0]["status"] == falcon.HTTP_400
+
+
+def testBatchPostMalformedRecords(client):
+    vk, sk, did, body = eddsa.genDidHistory(signer=0, numSigners=2)
+
+    items = [
+        {"body": "5", "signature": 'signer="{0}"'.format(eddsa.signResource(b"5", sk))},
+        {"body": "null"},
+        dict(batchItem(body, sk), signature=5),
+        batchItem(body, sk)
+    ]
+
+    response = client.simulate_post("{0}/batch".format(HISTORY_BASE_PATH), body=json.dumps(items))
+
+    assert response.status == falcon.HTTP_200
+
+    statuses = response.json["data"]
+    assert statuses[0]["status"] == falcon.HTTP_400
+    assert statuses[1]["status"] == falcon.HTTP_400
+    assert statuses[2] == {
+        "status": falcon.HTTP_400,
+        "title": "Validation Error",
+        "description": "signature field must be a string."
+    }
+    assert statuses[3] == {"id": did, "status": falcon.HTTP_201}
+
+    assert json.loads(db.historyDB.getHistoryJson(did))[0]["history"] == json.loads(body)
+
+
+def testPostNonObjectBody(client):
+    response = client.simulate_post(HISTORY_BASE_PATH, body="5", headers={"Signature": 'signer="a"'})
+
+    assert response.status == falcon.HTTP_400
+    assert response.json["title"] == "Malformed JSON"
+
+
+def testBatchPostInvalidBody(client):
+    response = client.simulate_post("{0}/batch".format(HISTORY_BASE_PATH), body=json.dumps({"body": "{}"}))
+
+    assert response.status == falcon.HTTP_400
+
+    response = client.simulate_post("{0}/batch".format(HISTORY_BASE_PATH), body=json.dumps([{"signature": ""}]))
+
+    assert response.status == falcon.HTTP_400
+
+    items = [{"body": "{}"}] * (factory.MAX_BATCH_SIZE + 1)
+    response = client.simulate_post("{0}/batch".format(HISTORY_BASE_PATH), body=json.dumps(items))
+
+    assert response.status == falcon.HTTP_413
+
+
+def testPutParsesBodyOnce(client, monkeypatch):
+    vk, sk, did, body = eddsa.genDidHistory(signer=0, numSigners=2)
+
+    headers = {
+        "Signature": 'signer="{0}"'.format(eddsa.signResource(body, sk))
+    }
+
+    client.simulate_post(HISTORY_BASE_PATH, body=body, headers=headers)
+
+    body = json.loads(body)
+    body['changed'] = "2000-01-01T00:00:01+00:00"
+    body['signer'] = 1
+    body['signers'].append(body['signers'][0])
+    body = json.dumps(body, ensure_ascii=False).encode('utf-8')
+
+    headers = {
+        "Signature": 'signer="{0}"; rotation="{0}"'.format(eddsa.signResource(body, sk))
+    }
+
+    class NoParse:
+        def loads(self, *args, **kwargs):
+            raise AssertionError("signed body parsed again during verification")
+
+    monkeypatch.setattr(eddsa, "json", NoParse())
+
+    response = client.simulate_put("{0}/{1}".format(HISTORY_BASE_PATH, did), body=body, headers=headers)
+
+    assert response.status == falcon.HTTP_200
+
+
+class StreamRequest:
+    def __init__(self, headers=None):
+        self.headers = headers or {}
+
+    def get_header(self, name):
+        return self.headers.get(name)
+
+
+def openHistoryStream(did=None, lastEventId=None):
+    # the stream never ends so call the resource directly instead of through the test client
+    resp = falcon.Response()
+    headers = {} if lastEventId is None else {"Last-Event-ID": str(lastEventId)}
+
+    histories.HistoryStream().on_get(StreamRequest(headers), resp, did)
+
+    return resp
+
+
+def eventData(events):
+    # data of the first event
+    return json.loads(events.split(b"\n\n", 1)[0].split(b"data:", 1)[1])
+
+
+def eventIds(events):
+    return [int(line[3:]) for line in events.split(b"\n") if line.startswith(b"id:")]
+
+
+def testHistoryStream(client):
+    vk, sk, did, body = eddsa.genDidHistory(signer=0, numSigners=2)
+    headers = {"Signature": 'signer="{0}"'.format(eddsa.signResource(body, sk))}
+
+    resp = openHistoryStream()
+
+    assert resp.content_type == "text/event-stream"
+    assert next(resp.stream) == b''  # nothing happened, nothing waits
+
+    client.simulate_post(HISTORY_BASE_PATH, body=body, headers=headers)
+
+    event = next(resp.stream)
+    assert event.startswith(b"id:")
+
+    data = json.loads(event.split(b"data:", 1)[1])
+    assert data["id"] == did
+    assert data["history"][0]["history"] == json.loads(body)
+
+    assert next(resp.stream) == b''
+
+    resp.stream.close()
+
+    assert not publishing.historyChanges.watched(did)
+
+
+def testHistoryStreamOneDid(client):
+    vk, sk, did, body = eddsa.genDidHistory(signer=0, numSigners=2)
+    headers = {"Signature": 'signer="{0}"'.format(eddsa.signResource(body, sk))}
+
+    with pytest.raises(falcon.HTTPError) as ex:
+        openHistoryStream(did)
+
+    assert ex.value.status == falcon.HTTP_404
+    assert not publishing.historyChanges.watched(did)
+
+    client.simulate_post(HISTORY_BASE_PATH, body=body, headers=headers)
+
+    resp = openHistoryStream(did)
+
+    # current history first
+    data = json.loads(next(resp.stream).split(b"data:", 1)[1])
+    assert data["id"] == did
+    assert data["history"][0]["history"] == json.loads(body)
+
+    otherVk, otherSk, otherDid, otherBody = eddsa.genDidHistory(signer=0, numSigners=2)
+    headers = {"Signature": 'signer="{0}"'.format(eddsa.signResource(otherBody, otherSk))}
+    client.simulate_post(HISTORY_BASE_PATH, body=otherBody, headers=headers)
+
+    assert next(resp.stream) == b''  # other dids are filtered out
+
+    client.simulate_delete("{0}/{1}".format(HISTORY_BASE_PATH, did),
+                           body=json.dumps({"vk": h.bytesToStr64u(vk)}).encode(),
+                           headers={"Signature": 'signer="{0}"'.format(
+                               eddsa.signResource(json.dumps({"vk": h.bytesToStr64u(vk)}).encode(), sk))})
+
+    data = json.loads(next(resp.stream).split(b"data:", 1)[1])
+    assert data == {"id": did, "history": None}
+
+    resp.stream.close()
+
+
+def testHistoryStreamResume(client):
+    changes = db.historyDB.changes
+    start = changes.latest()
+    dids = []
+
+    for index in range(3):
+        vk, sk, did, body = eddsa.genDidHistory(signer=0, numSigners=2)
+        headers = {"Signature": 'signer="{0}"'.format(eddsa.signResource(body, sk))}
+        client.simulate_post(HISTORY_BASE_PATH, body=body, headers=headers)
+        dids.append(did)
+
+    # only the changes after the last event the client saw are replayed
+    resp = openHistoryStream(lastEventId=start + 1)
+    events = next(resp.stream)
+
+    assert eventIds(events) == [start + 2, start + 3]
+    assert eventData(events)["id"] == dids[1]
+    assert next(resp.stream) == b''
+
+    resp.stream.close()
+
+    # resuming one did only replays its own changes
+    resp = openHistoryStream(dids[2], lastEventId=start)
+    events = next(resp.stream)
+
+    assert eventIds(events) == [start + 3]
+    assert eventData(events)["id"] == dids[2]
+
+    resp.stream.close()
+
+    # nothing was missed
+    resp = openHistoryStream(lastEventId=start + 3)
+
+    assert next(resp.stream) == b''
+
+    resp.stream.close()
+
+
+def testHistoryStreamResumeAfterGap(client, monkeypatch):
+    vk, sk, did, body = eddsa.genDidHistory(signer=0, numSigners=2)
+    headers = {"Signature": 'signer="{0}"'.format(eddsa.signResource(body, sk))}
+    client.simulate_post(HISTORY_BASE_PATH, body=body, headers=headers)
+
+    changes = db.historyDB.changes
+    latest = changes.latest()
+    monkeypatch.setattr(changes, "oldest", lambda: latest)  # everything before was trimmed
+
+    resp = openHistoryStream(lastEventId=latest - 2)
+    event = next(resp.stream)
+
+    assert event.startswith("id:{}\nevent:reset\n".format(latest).encode())
+    assert eventData(event) == {"oldest": latest}
+
+    resp.stream.close()
+
+    # a single did stream falls back to the current history
+    resp = openHistoryStream(did, lastEventId=latest - 2)
+    event = next(resp.stream)
+
+    assert eventIds(event) == [latest]
+    assert eventData(event)["history"][0]["history"] == json.loads(body)
+
+    resp.stream.close()
+
+
+def testHistoryStreamMalformedLastEventId(client):
+    with pytest.raises(falcon.HTTPError) as ex:
+        openHistoryStream(lastEventId="abc")
+
+    assert ex.value.status == falcon.HTTP_400
+    assert ex.value.title == 'Malformed Header'
+    assert not publishing.historyChanges.watched(None)
+
+
 def testGetAllInvalidQueryString(client):
     # Test that query params have values
     response = client.simulate_get(HISTORY_BASE_PATH, query_string="offset&limit=10")
@@ -1421,6 +1861,47 @@ def testValidGetAll(client):
     assert json.loads(response.content) == exp_result
 
 
+def testGetAllWithCursor(client):
+    dids = []
+    for i in range(0, 3):
+        vk, sk, did, body = eddsa.genDidHistory(signer=0, numSigners=2)
+        db.historyDB.saveHistory(did, json.loads(body), {"signer": eddsa.signResource(body, sk)})
+        dids.append(did)
+
+    dids.sort()
+
+    response = client.simulate_get(HISTORY_BASE_PATH, query_string="limit=2")
+    result = json.loads(response.content)
+
+    assert response.status == falcon.HTTP_200
+    assert [entry[0]["history"]["id"] for entry in result["data"]] == dids[0:2]
+    assert response.headers["X-Total-Count"] == "3"
+
+    response = client.simulate_get(HISTORY_BASE_PATH, query_string="limit=2&cursor={}".format(result["next"]))
+    result = json.loads(response.content)
+
+    assert response.status == falcon.HTTP_200
+    assert [entry[0]["history"]["id"] for entry in result["data"]] == dids[2:]
+    assert "next" not in result
+
+
+def testGetAllInvalidCursor(client):
+    exp_result = {
+        "title": "Malformed Query String",
+        "description": "url query string cursor is invalid."
+    }
+
+    response = client.simulate_get(HISTORY_BASE_PATH, query_string="cursor=a")
+
+    assert response.status == falcon.HTTP_400
+    assert json.loads(response.content) == exp_result
+
+    response = client.simulate_get(HISTORY_BASE_PATH, query_string="cursor=")
+
+    assert response.status == falcon.HTTP_400
+    assert json.loads(response.content) == exp_result
+
+
 def testGetAllEmptyDB(client):
     response = client.simulate_get(HISTORY_BASE_PATH)
 
@@ -1466,6 +1947,16 @@ def testValidGetOne(client):
     assert json.loads(response.content) == exp_result
 
 
+def testGetOnePassesStoredJsonThrough(client):
+    vk, sk, did, body = setupBasicHistory(client)
+
+    response = client.simulate_get("{0}/{1}".format(HISTORY_BASE_PATH, did))
+
+    assert response.status == falcon.HTTP_200
+    assert response.content == db.historyDB.getHistoryJson(did)
+    assert json.loads(response.content) == db.historyDB.getHistory(did).data
+
+
 def testGetOneNonExistent(client):
     # Test GET with non existent resource
 
@@ -2422,6 +2913,29 @@ class TestHistoryPromiscuousMode:
                       exp_result=exp_result,
                       exp_status=falcon.HTTP_200)
 
+    def testRetriedPostSkipsVerification(self, promiscuous_client, monkeypatch):
+        monkeypatch.setattr(caching, "verifiedSignatures", caching.VerifiedSignatureCache())
+
+        vk, sk, did, body = eddsa.genDidHistory(signer=0, numSigners=2)
+        headers = {
+            "Signature": 'signer="{0}"'.format(eddsa.signResource(body, sk))
+        }
+
+        response = promiscuous_client.simulate_post(HISTORY_BASE_PATH, body=body, headers=headers)
+
+        assert response.status == falcon.HTTP_201
+        assert caching.verifiedSignatures.stats()["misses"] == 1
+
+        def verify(*args, **kwargs):
+            raise AssertionError("cached signature verified again")
+
+        monkeypatch.setattr(eddsa, "validateSignedResource", verify)
+
+        response = promiscuous_client.simulate_post(HISTORY_BASE_PATH, body=body, headers=headers)
+
+        assert response.status == falcon.HTTP_201
+        assert caching.verifiedSignatures.stats()["hits"] == 1
+
     def testDuplicatePut(self, promiscuous_client):
         seed = libnacl.randombytes(libnacl.crypto_sign_SEEDBYTES)
         vk, sk, did, body = eddsa.genDidHistory(seed, signer=0, numSigners=2, method="fake")
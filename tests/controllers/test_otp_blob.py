@@ -22,6 +22,7 @@ from copy import deepcopy
 
 from didery.routing import *
 from didery.help import helping as h
+from didery.db import dbing as db
 
 
 SK = b"\xb3\xd0\xbdL]\xcc\x08\x90\xa5\xbd\xc6\xa1 '\x82\x9c\x18\xecf\xa6x\xe2]Ux\xa5c\x0f\xe2\x86*\xa04\xe7\xfaf\x08o\x18\xd6\xc5s\xfc+\xdc \xb4\xb4\xa6G\xcfZ\x96\x01\x1e%\x0f\x96\x8c\xfa-3J<"
@@ -316,6 +317,50 @@ def testValidPost(client):
                   exp_result=exp_result)
 
 
+def testBatchPost(client):
+    vk, sk, did, body = genOtpBlob()
+    otherVk, otherSk, otherDid, otherBody = genOtpBlob()
+
+    items = [
+        {"body": body.decode(), "signature": 'signer="{0}"'.format(eddsa.signResource(body, sk))},
+        {"body": otherBody.decode(), "signature": 'signer="{0}"'.format(eddsa.signResource(otherBody, sk))},
+        {"body": body.decode()}
+    ]
+
+    response = client.simulate_post("{0}/batch".format(BLOB_BASE_PATH), body=json.dumps(items))
+
+    assert response.status == falcon.HTTP_200
+
+    statuses = response.json["data"]
+    assert statuses[0] == {"id": did, "status": falcon.HTTP_201}
+    assert statuses[1]["status"] == falcon.HTTP_401
+    assert statuses[2]["status"] == falcon.HTTP_400
+
+    assert db.otpDB.getOtpBlob(did)["otp_data"] == json.loads(body)
+    assert db.otpDB.getOtpBlob(otherDid) is None
+
+
+def testBatchPostMalformedRecords(client):
+    vk, sk, did, body = genOtpBlob()
+
+    items = [
+        {"body": "[]", "signature": 'signer="{0}"'.format(eddsa.signResource(b"[]", sk))},
+        {"body": body.decode(), "signature": 5},
+        {"body": body.decode(), "signature": 'signer="{0}"'.format(eddsa.signResource(body, sk))}
+    ]
+
+    response = client.simulate_post("{0}/batch".format(BLOB_BASE_PATH), body=json.dumps(items))
+
+    assert response.status == falcon.HTTP_200
+
+    statuses = response.json["data"]
+    assert statuses[0]["status"] == falcon.HTTP_400
+    assert statuses[1]["status"] == falcon.HTTP_400
+    assert statuses[2] == {"id": did, "status": falcon.HTTP_201}
+
+    assert db.otpDB.getOtpBlob(did)["otp_data"] == json.loads(body)
+
+
 def testPutSignValidation(client):
     signatureValidation(client.simulate_put, PUT_URL)
 
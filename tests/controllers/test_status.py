@@ -0,0 +1,34 @@
+import falcon
+
+try:
+    import simplejson as json
+except ImportError:
+    import json
+
+from didery.routing import *
+from didery.crypto import caching
+
+
+def testGetStatus(client, monkeypatch):
+    cache = caching.VerifiedSignatureCache(size=2, ttl=10)
+    monkeypatch.setattr(caching, "verifiedSignatures", cache)
+
+    cache.add("ed25519", "vk", "sig", b"message")
+    cache.verified("ed25519", "vk", "sig", b"message")
+    cache.verified("ed25519", "vk", "other", b"message")
+
+    response = client.simulate_get(STATUS_BASE_PATH)
+
+    assert response.status == falcon.HTTP_200
+    assert json.loads(response.content) == {
+        "verifiedSignatures": {"size": 1, "maxSize": 2, "ttl": 10, "hits": 1, "misses": 1}
+    }
+
+
+def testGetStatusCacheDisabled(client, monkeypatch):
+    monkeypatch.setattr(caching, "verifiedSignatures", None)
+
+    response = client.simulate_get(STATUS_BASE_PATH)
+
+    assert response.status == falcon.HTTP_200
+    assert json.loads(response.content) == {"verifiedSignatures": None}
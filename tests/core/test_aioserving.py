@@ -0,0 +1,196 @@
+import asyncio
+import pytest
+
+try:
+    import simplejson as json
+except ImportError:
+    import json
+
+import didery.crypto.eddsa as eddsa
+
+from didery import wsgi
+from didery.core import aioserving
+from didery.db import dbing
+from didery.db import publishing
+from didery.help import helping
+
+
+@pytest.fixture
+def loop():
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+
+    yield loop
+
+    loop.close()
+    asyncio.set_event_loop(None)
+
+
+@pytest.fixture
+def serve(loop):
+    path = helping.setupTmpBaseDir()
+    server = aioserving.AsyncServer(wsgi.createApp(path, streamWait=0, streamGenerator=aioserving.historyEvents), 4, loop)
+
+    def run(scenario):
+        async def main():
+            host, port = await server.open("127.0.0.1", 0)
+            try:
+                await asyncio.wait_for(scenario(port), 10)
+            finally:
+                await server.close()
+
+        loop.run_until_complete(main())
+
+    yield run
+
+    publishing.historyChanges.follow(None)
+    helping.cleanupTmpBaseDir(path)
+
+
+async def readResponse(reader):
+    head = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1").split("\r\n")
+    headers = {}
+
+    for line in head[1:]:
+        if line:
+            name, value = line.split(":", 1)
+            headers[name.strip().lower()] = value.strip()
+
+    if "content-length" in headers:
+        body = await reader.readexactly(int(headers["content-length"]))
+    else:
+        body = await reader.read()  # ends with the connection
+
+    return head[0], headers, body
+
+
+def request(method, path, body=b"", headers=None):
+    lines = ["{0} {1} HTTP/1.1".format(method, path), "Host: localhost", "Content-Length: {}".format(len(body))]
+    lines.extend("{0}: {1}".format(name, value) for name, value in (headers or {}).items())
+
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body
+
+
+def testAsyncServerKeepsConnectionsOpen(serve):
+    vk, sk, did, body = eddsa.genDidHistory(signer=0, numSigners=2)
+    signature = 'signer="{0}"'.format(eddsa.signResource(body, sk))
+
+    async def scenario(port):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+
+        writer.write(request("POST", "/history", body, {"Signature": signature}))
+        status, headers, content = await readResponse(reader)
+
+        assert status == "HTTP/1.1 201 Created"
+
+        # same connection
+        writer.write(request("GET", "/history/{}".format(did)))
+        status, headers, content = await readResponse(reader)
+
+        assert status == "HTTP/1.1 200 OK"
+        assert json.loads(content)[0]["history"] == json.loads(body)
+        assert "connection" not in headers
+
+        # streamed without a length
+        writer.write(request("GET", "/history", headers={"Connection": "close"}))
+        status, headers, content = await readResponse(reader)
+
+        assert status == "HTTP/1.1 200 OK"
+        assert headers["connection"] == "close"
+        assert json.loads(content)["data"][0][0]["history"] == json.loads(body)
+
+        writer.close()
+
+    serve(scenario)
+
+
+def testAsyncServerRejectsBadRequests(serve):
+    async def scenario(port):
+        for raw, status in ((b"garbage\r\n\r\n", "HTTP/1.1 400 Bad Request"),
+                            (b"POST /history HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\n",
+                             "HTTP/1.1 411 Length Required")):
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(raw)
+
+            assert (await readResponse(reader))[0] == status
+            assert await reader.read() == b""
+
+            writer.close()
+
+    serve(scenario)
+
+
+def testAsyncServerStreamsHistoryChanges(serve, loop):
+    vk, sk, did, body = eddsa.genDidHistory(signer=0, numSigners=2)
+
+    async def scenario(port):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(request("GET", "/stream/history"))
+
+        head = await reader.readuntil(b"\r\n\r\n")
+
+        assert head.startswith(b"HTTP/1.1 200 OK")
+        assert b"Transfer-Encoding: chunked" in head
+        assert publishing.historyChanges.watched(did)
+
+        # written by a request thread while the stream waits on the loop
+        await loop.run_in_executor(None, dbing.historyDB.saveHistory,
+                                   did, json.loads(body), {"signer": eddsa.signResource(body, sk)})
+
+        size = int(await reader.readline(), 16)
+        event = await reader.readexactly(size)
+
+        assert event.startswith(b"id:")
+        assert json.loads(event.split(b"data:", 1)[1])["id"] == did
+
+        writer.close()
+
+    serve(scenario)
+
+    assert not publishing.historyChanges.watched(did)  # closing the server ended the stream
+
+
+def testAsyncServerClosesConnectionWhenBodyFails(loop, monkeypatch):
+    logged = []
+    unhandled = []
+    monkeypatch.setattr(aioserving.console, "terse", logged.append)
+    loop.set_exception_handler(lambda loop, context: unhandled.append(context))
+
+    def app(environ, start_response):
+        def body():
+            yield b"partial"
+            if environ["PATH_INFO"] == "/broken":
+                raise ValueError("body failed")
+
+        start_response("200 OK", [("Content-Type", "text/plain")])
+        return body()
+
+    server = aioserving.AsyncServer(app, 2)  # picks up the loop open runs on
+
+    async def scenario(port):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(request("GET", "/broken"))
+
+        assert b"partial" in await reader.read()  # closed instead of hanging
+        writer.close()
+
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(request("GET", "/fine", headers={"Connection": "close"}))
+
+        status, headers, body = await readResponse(reader)
+
+        assert status == "HTTP/1.1 200 OK"
+        assert b"partial" in body
+        writer.close()
+
+    async def main():
+        host, port = await server.open("127.0.0.1", 0)
+        try:
+            await asyncio.wait_for(scenario(port), 10)
+        finally:
+            await server.close()
+
+    loop.run_until_complete(main())
+
+    assert logged == ["Error handling request GET /broken: body failed\n"]
+    assert not unhandled
@@ -0,0 +1,86 @@
+import threading
+
+try:
+    import simplejson as json
+except ImportError:
+    import json
+
+from falcon import testing
+
+import didery.crypto.eddsa as eddsa
+
+from didery import wsgi
+from didery.core.deferring import DeferringApp
+from didery.db import dbing
+from didery.db import publishing
+from didery.help import helping
+
+
+def testDeferringApp():
+    release = threading.Event()
+
+    def app(environ, start_response):
+        release.wait(5)
+        start_response("201 Created", [("Content-Type", "text/plain")])
+        return [b"hello ", environ["PATH_INFO"].encode()]
+
+    deferring = DeferringApp(app, 2)
+    started = []
+
+    def start_response(status, headers, exc_info=None):
+        started.append((status, headers))
+
+    body = deferring({"PATH_INFO": "/history"}, start_response)
+
+    # the server thread is not blocked while the request is handled
+    assert next(body) == b''
+    assert next(body) == b''
+    assert started == []
+
+    release.set()
+
+    chunks = [chunk for chunk in body if chunk]
+
+    assert chunks == [b"hello ", b"/history"]
+    assert started == [("201 Created", [("Content-Type", "text/plain")])]
+
+    deferring.close()
+
+
+def testDeferringAppConcurrentPostsOfOneDid(monkeypatch):
+    path = helping.setupTmpBaseDir()
+    deferring = DeferringApp(wsgi.createApp(path), 2)
+
+    try:
+        vk, sk, did, body = eddsa.genDidHistory(signer=0, numSigners=2)
+        headers = {"Signature": 'signer="{0}"'.format(eddsa.signResource(body, sk))}
+
+        # both requests are validated before either of them is saved
+        validated = threading.Barrier(2, timeout=5)
+        atomic = dbing.atomic
+
+        def waitingAtomic(fn):
+            if dbing.currentTxn() is None:  # nested calls join the outer unit of work
+                validated.wait()
+            return atomic(fn)
+
+        monkeypatch.setattr(dbing, "atomic", waitingAtomic)
+
+        statuses = []
+
+        def start_response(status, headers, exc_info=None):
+            statuses.append(status)
+
+        bodies = [deferring(testing.create_environ("/history", method="POST", body=body, headers=headers),
+                            start_response)
+                  for i in range(2)]
+
+        results = [json.loads(b"".join(chunks)) for chunks in bodies]
+
+        assert sorted(statuses) == ["201 Created", "400 Bad Request"]
+        assert results[statuses.index("400 Bad Request")]["title"] == "Resource Already Exists"
+        assert json.loads(dbing.historyDB.getHistoryJson(did))[0]["history"] == json.loads(body)
+    finally:
+        deferring.close()
+        publishing.historyChanges.follow(None)
+        helping.cleanupTmpBaseDir(path)
@@ -0,0 +1,60 @@
+import os
+import time
+import signal
+import socket
+
+from ioflo.aio.tcp import Server
+
+from didery.core.supervising import ReusePortServer, Supervisor
+
+
+def testReusePortServer():
+    first = ReusePortServer(ha=("127.0.0.1", 0))
+    assert first.reopen()
+
+    port = first.ha[1]
+    second = ReusePortServer(ha=("127.0.0.1", port))
+    plain = Server(ha=("127.0.0.1", port))
+
+    try:
+        assert second.reopen()
+        assert second.ha == first.ha
+        assert not plain.reopen()  # only sockets that all ask for SO_REUSEPORT share the port
+    finally:
+        first.close()
+        second.close()
+        plain.close()
+
+
+def testSupervisorRestartsWorkers(tmpdir):
+    log = tmpdir.join("starts")
+    log.write("")
+
+    def worker(number):
+        with open(str(log), "a") as f:
+            f.write("{}\n".format(number))
+
+        if len(log.read().split()) >= 4:
+            os.kill(os.getppid(), signal.SIGTERM)
+            time.sleep(30)  # the supervisor interrupts us
+
+    supervisor = Supervisor(2, worker, delay=0)
+    supervisor.run()
+
+    starts = log.read().split()
+
+    assert len(starts) >= 4
+    assert set(starts) == {"0", "1"}
+    assert supervisor.stopping
+    assert supervisor.pids == {}
+
+
+def testSupervisorDelaysCrashingWorkers():
+    supervisor = Supervisor(1, lambda number: None, delay=0.2)
+    pid = supervisor.spawn(0)
+
+    start = time.monotonic()
+
+    assert supervisor.reap() == (pid, 0)
+    assert time.monotonic() - start >= 0.2
+    assert supervisor.reap() == (None, None)
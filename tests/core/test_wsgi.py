@@ -0,0 +1,96 @@
+import threading
+import falcon
+import pytest
+
+try:
+    import simplejson as json
+except ImportError:
+    import json
+
+from falcon import testing
+from wsgiref.simple_server import make_server, WSGIServer, WSGIRequestHandler
+from socketserver import ThreadingMixIn
+from urllib.request import urlopen
+
+import didery.crypto.eddsa as eddsa
+
+from didery import wsgi
+from didery.db import dbing
+from didery.db import publishing
+from didery.help import helping
+
+
+class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def dbPath():
+    path = helping.setupTmpBaseDir()
+
+    yield path
+
+    publishing.historyChanges.follow(None)
+    helping.cleanupTmpBaseDir(path)
+
+
+def testCreateApp(dbPath):
+    app = wsgi.createApp(dbPath, "method", lmdb={"mapSize": 1024 * 1024})
+
+    assert isinstance(app, falcon.API)
+    assert dbing.gDbDirPath == dbPath
+    assert dbing.dideryDB.info()['map_size'] == 1024 * 1024
+    assert publishing.historyChanges.log is None
+
+    client = testing.TestClient(app)
+    vk, sk, did, body = eddsa.genDidHistory(signer=0, numSigners=2)
+    headers = {"Signature": 'signer="{0}"'.format(eddsa.signResource(body, sk))}
+
+    response = client.simulate_post("/history", body=body, headers=headers)
+
+    assert response.status == falcon.HTTP_201
+    assert response.headers['Access-Control-Allow-Origin'] == '*'
+
+    response = client.simulate_get("/history/{}".format(did))
+
+    assert response.status == falcon.HTTP_200
+    assert response.json[0]["history"] == json.loads(body)
+
+    assert wsgi.create_app is wsgi.createApp
+
+
+def testCreateAppShared(dbPath):
+    wsgi.createApp(dbPath, "method", shared=True)
+
+    assert publishing.historyChanges.log is dbing.historyDB.changes
+
+
+def testCreateAppUnderWsgiServer(dbPath):
+    app = wsgi.createApp(dbPath, "method", streamWait=0.05)
+    server = make_server("127.0.0.1", 0, app, server_class=ThreadingWSGIServer, handler_class=QuietHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    try:
+        base = "http://127.0.0.1:{}".format(server.server_port)
+        stream = urlopen(base + "/stream/history", timeout=5)
+
+        vk, sk, did, body = eddsa.genDidHistory(signer=0, numSigners=2)
+        dbing.historyDB.saveHistory(did, json.loads(body), {"signer": eddsa.signResource(body, sk)})
+
+        assert stream.readline().startswith(b"id:")
+        assert stream.readline() == b"event:message\n"
+        assert json.loads(stream.readline()[5:])["id"] == did
+
+        stream.close()
+
+        with urlopen(base + "/history", timeout=5) as response:
+            assert response.status == 200
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,69 @@
+from didery.crypto import caching
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def testVerifiedSignatureCache():
+    cache = caching.VerifiedSignatureCache(size=2, ttl=10)
+
+    assert not cache.verified(None, "vk", "sig", b"message")
+
+    cache.add(None, "vk", "sig", b"message")
+
+    assert cache.verified(None, "vk", "sig", b"message")
+    assert not cache.verified(None, "vk", "sig", b"other message")
+    assert not cache.verified(None, "other vk", "sig", b"message")
+    assert not cache.verified(None, "vk", "other sig", b"message")
+    assert not cache.verified("ECDSA", "vk", "sig", b"message")
+
+    assert cache.stats() == {"size": 1, "maxSize": 2, "ttl": 10, "hits": 1, "misses": 5}
+
+
+def testVerifiedSignatureCacheEvictsLeastRecentlyUsed():
+    cache = caching.VerifiedSignatureCache(size=2, ttl=0)
+
+    cache.add(None, "vk", "sig1", b"message")
+    cache.add(None, "vk", "sig2", b"message")
+
+    assert cache.verified(None, "vk", "sig1", b"message")
+
+    cache.add(None, "vk", "sig3", b"message")
+
+    assert cache.verified(None, "vk", "sig1", b"message")
+    assert not cache.verified(None, "vk", "sig2", b"message")
+    assert cache.verified(None, "vk", "sig3", b"message")
+
+
+def testVerifiedSignatureCacheExpires():
+    clock = FakeClock()
+    cache = caching.VerifiedSignatureCache(size=2, ttl=10, clock=clock)
+
+    cache.add(None, "vk", "sig", b"message")
+    clock.now = 10
+
+    assert cache.verified(None, "vk", "sig", b"message")
+
+    clock.now = 10.5
+
+    assert not cache.verified(None, "vk", "sig", b"message")
+    assert cache.stats()["size"] == 0
+
+
+def testSetupVerifiedSignatures():
+    try:
+        assert caching.setupVerifiedSignatures(size=0) is None
+        assert caching.verifiedSignatures is None
+
+        cache = caching.setupVerifiedSignatures(size=5, ttl=1)
+
+        assert caching.verifiedSignatures is cache
+        assert cache.size == 5
+        assert cache.ttl == 1
+    finally:
+        caching.verifiedSignatures = None
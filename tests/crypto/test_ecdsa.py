@@ -73,6 +73,47 @@ def testVerify64u():
     assert ecdsa.verify64u(signature, resource, vk)
 
 
+def testBytesToPoint():
+    vk, sk = ecdsa.generateByteKeys()
+    point = ecdsa.bytesToPoint(vk)
+    pyecPoint = keys.VerifyingKey.from_string(vk, curves.SECP256k1).pubkey.point
+
+    assert (point.x, point.y) == (pyecPoint.x(), pyecPoint.y())
+
+    with pytest.raises(ValueError):
+        ecdsa.bytesToPoint(vk[:-1])
+
+    with pytest.raises(ValueError):
+        ecdsa.bytesToPoint(vk[:-1] + bytes([vk[-1] ^ 1]))  # not on the curve
+
+
+def testDecodeVerkeyIsCached():
+    resource = "message"
+    vk, sk = ecdsa.generate64uKeys()
+    signature = ecdsa.signResource64u(resource, sk)
+
+    ecdsa.decodeVerkey.cache_clear()
+
+    assert ecdsa.verify64u(signature, resource, vk)
+    assert ecdsa.verify64u(signature, resource, vk)
+    assert not ecdsa.verify64u(signature, "other message", vk)
+
+    info = ecdsa.decodeVerkey.cache_info()
+    assert info.misses == 1
+    assert info.hits == 2
+
+
+def testVerifyPointInvalidSignature():
+    resource = b"message"
+    vk, sk = ecdsa.generateByteKeys()
+    point = ecdsa.bytesToPoint(vk)
+    signature = str64uToBytes(ecdsa.signResource(resource, sk))
+
+    assert ecdsa.verifyPoint(signature, resource, point)
+    assert not ecdsa.verifyPoint(signature[:-1], resource, point)
+    assert not ecdsa.verifyPoint(bytes(64), resource, point)
+
+
 def testValidateSignedResourceInvalidJson():
     resource = "message"
     vk, sk = ecdsa.generate64uKeys()
@@ -126,3 +167,15 @@ def testGenDidHistoryChanged():
 
     assert json.loads(body.decode())['changed'] == changed
 
+
+def testValidateSignedResourceParsed():
+    resource = b'{"1":"test"}'
+    vk, sk = ecdsa.generate64uKeys()
+    signature = ecdsa.signResource64u(resource.decode(), sk)
+    parsed = {"1": "test"}
+
+    # verifies the raw bytes and hands back the already parsed resource
+    assert ecdsa.validateSignedResource(signature, resource, vk, parsed) is parsed
+
+    with pytest.raises(didering.ValidationError):
+        ecdsa.validateSignedResource(signature, b'{"1":"tes"}', vk, parsed)
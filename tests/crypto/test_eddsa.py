@@ -61,6 +61,19 @@ def testVerify():
     assert eddsa.verify(signature, resource, vk)
 
 
+def testVerifyRejectsInvalidSignatures():
+    resource = b"message"
+    vk, sk = eddsa.generateByteKeys()
+    signature = str64uToBytes(eddsa.signResource(resource, sk))
+    otherVk, otherSk = eddsa.generateByteKeys()
+
+    assert not eddsa.verify(signature, b"other message", vk)
+    assert not eddsa.verify(signature, resource, otherVk)
+    assert not eddsa.verify(signature[:-1], resource, vk)
+    assert not eddsa.verify(signature, resource, vk[:-1])
+    assert not eddsa.verify(bytes(64), resource, vk)
+
+
 def testVerify64u():
     resource = "message"
     vk, sk = eddsa.generate64uKeys()
@@ -122,3 +135,15 @@ def testGenDidHistoryChanged():
 
     assert json.loads(body.decode())['changed'] == changed
 
+
+def testValidateSignedResourceParsed():
+    resource = b'{"1":"test"}'
+    vk, sk = eddsa.generate64uKeys()
+    signature = eddsa.signResource64u(resource.decode(), sk)
+    parsed = {"1": "test"}
+
+    # verifies the raw bytes and hands back the already parsed resource
+    assert eddsa.validateSignedResource(signature, resource, vk, parsed) is parsed
+
+    with pytest.raises(didering.ValidationError):
+        eddsa.validateSignedResource(signature, b'{"1":"tes"}', vk, parsed)
@@ -0,0 +1,54 @@
+import pytest
+
+from didery.crypto import ecdsa
+from didery.crypto import eddsa
+from didery.crypto import pooling
+
+RESOURCE = '{"id": "did:dad:test"}'
+
+
+@pytest.fixture
+def pool():
+    yield pooling.setupVerifierPool(2)
+
+    pooling.closeVerifierPool()
+
+
+def testVerifySignature():
+    vk, sk = eddsa.generate64uKeys()
+    signature = eddsa.signResource64u(RESOURCE, sk)
+
+    assert pooling.verifySignature(None, signature, RESOURCE, vk) is None
+    assert pooling.verifySignature(None, signature, '{"id": "other"}', vk) == "Unverifiable signature"
+
+    vk, sk = ecdsa.generate64uKeys()
+    signature = ecdsa.signResource64u(RESOURCE, sk)
+
+    assert pooling.verifySignature("ECDSA", signature, RESOURCE, vk) is None
+    assert pooling.verifySignature("ECDSA", signature, '{"id": "other"}', vk) == "Unverifiable signature"
+
+
+def testVerifierPool(pool):
+    assert pooling.verifiers is pool
+
+    vk, sk = eddsa.generate64uKeys()
+    eddsaSig = eddsa.signResource64u(RESOURCE, sk)
+    eddsaVk = vk
+
+    vk, sk = ecdsa.generate64uKeys()
+    ecdsaSig = ecdsa.signResource64u(RESOURCE, sk)
+    ecdsaVk = vk
+
+    futures = [
+        pool.submit(None, eddsaSig, RESOURCE, eddsaVk),
+        pool.submit("secp256k1", ecdsaSig, RESOURCE, ecdsaVk),
+        pool.submit(None, ecdsaSig, RESOURCE, eddsaVk),
+    ]
+
+    assert [future.result() for future in futures] == [None, None, "Unverifiable signature"]
+    assert pool.verify(None, eddsaSig, RESOURCE, eddsaVk) is None
+
+
+def testSetupVerifierPoolDisabled():
+    assert pooling.setupVerifierPool(0) is None
+    assert pooling.verifiers is None
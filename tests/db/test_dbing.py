@@ -1,4 +1,9 @@
 import libnacl
+import lmdb
+import multiprocessing
+import pytest
+import threading
+import timeit
 import didery.crypto.eddsa
 
 try:
@@ -26,6 +31,123 @@ def testSetupDbEnvWithPath():
     assert dbing.dideryDB is env
 
 
+def testSetupDbEnvWithOptions():
+    env = dbing.setupDbEnv(DB_DIR_PATH, mapSize=1024 * 1024, maxReaders=10, sync=False)
+
+    assert env.info()['map_size'] == 1024 * 1024
+    assert env.info()['max_readers'] == 10
+    assert env.flags()['sync'] is False
+
+
+def testSaveGrowsFullMap():
+    env = dbing.setupDbEnv(DB_DIR_PATH, mapSize=256 * 1024)
+    db = dbing.DB(dbing.DB_KEY_HISTORY_NAME)
+    data = {"blob": "a" * 64 * 1024}
+
+    for i in range(0, 20):
+        db.save("did:dad:{}".format(i), data)
+
+    assert db.count() == 20
+    assert env.info()['map_size'] > 256 * 1024
+    assert db.get("did:dad:19") == data
+
+
+def testSaveStopsGrowingAtMaxMapSize():
+    env = dbing.setupDbEnv(DB_DIR_PATH, mapSize=256 * 1024, maxMapSize=512 * 1024)
+    db = dbing.DB(dbing.DB_KEY_HISTORY_NAME)
+    data = {"blob": "a" * 64 * 1024}
+
+    with pytest.raises(lmdb.MapFullError):
+        for i in range(0, 20):
+            db.save("did:dad:{}".format(i), data)
+
+    assert env.info()['map_size'] == 512 * 1024
+
+
+def testGrowMapWaitsForOpenTransactions():
+    env = dbing.setupDbEnv(DB_DIR_PATH, mapSize=256 * 1024)
+    db = dbing.DB(dbing.DB_KEY_HISTORY_NAME)
+    db.save(DID, {"id": DID})
+    stored = db.getJson(DID)
+
+    reading = threading.Event()
+    release = threading.Event()
+    results = []
+
+    def read(txn, subDb):
+        value = txn.get(DID.encode(), db=subDb)  # buffer into the memory map
+        reading.set()
+        release.wait(10)
+        return bytes(value)
+
+    def fill():
+        for i in range(0, 20):
+            db.save("did:dad:{}".format(i), {"blob": "a" * 64 * 1024})
+
+    reader = threading.Thread(target=lambda: results.append(db._read(read, buffers=True)))
+    writer = threading.Thread(target=fill)
+
+    reader.start()
+    assert reading.wait(10)
+    writer.start()
+
+    # the map filled up but is not resized under the open read transaction
+    writer.join(0.5)
+    assert writer.is_alive()
+    assert env.info()['map_size'] == 256 * 1024
+
+    release.set()
+    reader.join(10)
+    writer.join(10)
+
+    assert results == [stored]
+    assert env.info()['map_size'] > 256 * 1024
+    assert db.count() == 21
+
+
+def saveInOtherProcess(path, count, size, mapSize=dbing.DEFAULT_MAP_SIZE):
+    # runs in a spawned process, lmdb environments can't be shared across a fork
+    dbing.setupDbEnv(path, mapSize=mapSize)
+    db = dbing.DB(dbing.DB_KEY_HISTORY_NAME)
+
+    for i in range(0, count):
+        db.save("did:dad:{}".format(i), {"blob": "a" * size})
+
+
+def runInOtherProcess(*args):
+    process = multiprocessing.get_context("spawn").Process(target=saveInOtherProcess, args=args)
+    process.start()
+    process.join(60)
+
+    assert process.exitcode == 0
+
+
+def testCountSeesWritesOfOtherProcesses():
+    dbing.setupDbEnv(DB_DIR_PATH)
+    db = dbing.DB(dbing.DB_KEY_HISTORY_NAME)
+
+    assert db.count() == 0
+
+    runInOtherProcess(DB_DIR_PATH, 3, 1)
+
+    assert db.count() == 3
+
+
+def testAdoptsMapGrownByOtherProcess():
+    env = dbing.setupDbEnv(DB_DIR_PATH, mapSize=256 * 1024)
+    db = dbing.DB(dbing.DB_KEY_HISTORY_NAME)
+
+    runInOtherProcess(DB_DIR_PATH, 20, 64 * 1024, 256 * 1024)
+
+    assert db.get("did:dad:19") == {"blob": "a" * 64 * 1024}
+    assert db.count() == 20
+    assert env.info()['map_size'] > 256 * 1024
+
+    db.save(DID, {"id": DID})
+
+    assert db.get(DID) == {"id": DID}
+
+
 def testSetupDbEnvWithOutPath():
     # Cant test this without potentially deleting production databases
     pass
@@ -36,6 +158,363 @@ def testSetupDbEnvWithPort():
     pass
 
 
+class CountingEnv:
+    """
+    Wraps an lmdb environment and counts how often sub databases are resolved
+    """
+    def __init__(self, env):
+        self.env = env
+        self.opened = 0
+        self.begun = 0
+
+    def open_db(self, *args, **kwargs):
+        self.opened += 1
+        return self.env.open_db(*args, **kwargs)
+
+    def begin(self, *args, **kwargs):
+        self.begun += 1
+        return self.env.begin(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.env, name)
+
+
+def testDBCachesSubDbHandle(historyDB, monkeypatch):
+    env = CountingEnv(dbing.dideryDB)
+    monkeypatch.setattr(dbing, "dideryDB", env)
+
+    db = historyDB.db
+    db.count()
+
+    assert env.opened == 1  # re-bound once because the environment changed
+
+    db.save(DID, {"id": DID})
+    db.get(DID)
+    db.getAll()
+    db.count()
+    db.delete(DID)
+
+    assert env.opened == 1
+
+
+def testDBRebindsOnReopen():
+    old = dbing.setupDbEnv(DB_DIR_PATH)
+    db = dbing.DB(dbing.DB_KEY_HISTORY_NAME)
+    db.save(DID, {"id": DID})
+
+    assert db.env is dbing.dideryDB
+
+    env = dbing.setupDbEnv(DB_DIR_PATH)
+
+    with pytest.raises(lmdb.Error):
+        old.begin()  # the previous environment was closed
+
+    assert db.get(DID) == {"id": DID}
+    assert db.env is env
+
+
+@pytest.mark.benchmark
+def testDBSubDbHandleBenchmark(historyDB):
+    """
+    Resolving the cached handle must be cheaper than asking lmdb for it
+    on every operation which is what DB did before handles were cached.
+    Timing dependent so it only runs with --benchmarks.
+    """
+    db = historyDB.db
+
+    uncached = min(timeit.repeat(lambda: dbing.dideryDB.open_db(dbing.DB_KEY_HISTORY_NAME), number=20000, repeat=5))
+    cached = min(timeit.repeat(lambda: db.subDb, number=20000, repeat=5))
+
+    assert cached < uncached
+
+
+def testDBUpdate():
+    dbing.setupDbEnv(DB_DIR_PATH)
+    db = dbing.DB(dbing.DB_KEY_HISTORY_NAME)
+    seen = []
+
+    def append(existing):
+        seen.append(existing)
+        return (existing or []) + [len(seen)]
+
+    assert db.update(DID, append) == [1]
+    assert db.update(DID, append) == [1, 2]
+    assert seen == [None, [1]]
+    assert db.get(DID) == [1, 2]
+
+
+def testSaveEventUsesOneTransaction(methodEventsDB, monkeypatch):
+    env = CountingEnv(dbing.dideryDB)
+    monkeypatch.setattr(dbing, "dideryDB", env)
+
+    vk, sk, did, body = didery.crypto.eddsa.genDidHistory(signer=0, numSigners=2)
+    data = json.loads(body)
+    sigs = {"signer": didery.crypto.eddsa.signResource(body, sk)}
+
+    methodEventsDB.saveEvent(did, data, sigs)
+    data["signer"] = 1
+    methodEventsDB.saveEvent(did, data, sigs)
+
+    assert env.begun == 2
+    assert len(methodEventsDB.getEvent(did).data[0]) == 2
+
+
+def testStoredRecordDecodesOnce(raceHistoryDB, monkeypatch):
+    vk, sk, did, body = didery.crypto.eddsa.genDidHistory(signer=0, numSigners=2)
+    data = json.loads(body)
+    sigs = {"signer": didery.crypto.eddsa.signResource(body, sk)}
+
+    raceHistoryDB.saveHistory(did, data, sigs)
+
+    decoded = []
+    decodeValue = dbing.decodeValue
+
+    def countingDecode(raw):
+        decoded.append(raw)
+        return decodeValue(raw)
+
+    monkeypatch.setattr(dbing, "decodeValue", countingDecode)
+
+    record = dbing.StoredRecord()
+
+    assert raceHistoryDB.getHistory(did, record).data == raceHistoryDB.getHistory(did, record).data
+
+    data["signer"] = 1
+    saved = raceHistoryDB.saveHistory(did, data, sigs, record)
+
+    assert len(decoded) == 1
+    assert raceHistoryDB.getHistory(did, record).data == saved
+    assert len(decoded) == 1  # the record was refreshed by the save
+
+    raceHistoryDB.db.save(did, [])  # changed behind the record's back
+
+    assert raceHistoryDB.getHistory(did, record).data == []
+    assert len(decoded) == 2
+
+
+def testCountIsCachedUntilWrite(historyDB, monkeypatch):
+    env = CountingEnv(dbing.dideryDB)
+    monkeypatch.setattr(dbing, "dideryDB", env)
+
+    db = historyDB.db
+
+    assert db.count() == 0
+    begun = env.begun
+
+    assert db.count() == 0
+    assert env.begun == begun  # served from the cache
+
+    db.save(DID, {"id": DID})
+
+    assert db.count() == 1
+
+    db.delete(DID)
+
+    assert db.count() == 0
+
+
+def testCountAfterAtomic():
+    dbing.setupDbEnv(DB_DIR_PATH)
+
+    assert dbing.historyDB.historyCount() == 0
+
+    def save():
+        dbing.historyDB.db.save(DID, {"id": DID})
+
+        assert dbing.historyDB.historyCount() == 1
+
+        raise ValueError("crashed after write")
+
+    with pytest.raises(ValueError):
+        dbing.atomic(save)
+
+    assert dbing.historyDB.historyCount() == 0
+
+    dbing.atomic(lambda: dbing.historyDB.db.save(DID, {"id": DID}))
+
+    assert dbing.historyDB.historyCount() == 1
+
+
+def testAtomicCommitsAllTables(monkeypatch):
+    dbing.setupDbEnv(DB_DIR_PATH)
+    env = CountingEnv(dbing.dideryDB)
+    monkeypatch.setattr(dbing, "dideryDB", env)
+
+    vk, sk, did, body = didery.crypto.eddsa.genDidHistory(signer=0, numSigners=2)
+    data = json.loads(body)
+    sigs = {"signer": didery.crypto.eddsa.signResource(body, sk)}
+
+    def save():
+        history = dbing.historyDB.saveHistory(did, data, sigs)
+        dbing.eventsDB.saveEvent(did, data, sigs)
+
+        assert dbing.historyDB.getHistory(did).data == history  # sees its own writes
+
+        return history
+
+    history = dbing.atomic(save)
+
+    assert env.begun == 1
+    assert dbing.currentTxn() is None
+    assert dbing.historyDB.getHistory(did).data == history
+    assert dbing.eventsDB.getEvent(did) is not None
+
+
+def testAtomicAbortsAllTables():
+    dbing.setupDbEnv(DB_DIR_PATH)
+
+    vk, sk, did, body = didery.crypto.eddsa.genDidHistory(signer=0, numSigners=2)
+    data = json.loads(body)
+    sigs = {"signer": didery.crypto.eddsa.signResource(body, sk)}
+
+    def save():
+        dbing.historyDB.saveHistory(did, data, sigs)
+        dbing.eventsDB.saveEvent(did, data, sigs)
+
+        raise ValueError("crashed between writes")
+
+    with pytest.raises(ValueError):
+        dbing.atomic(save)
+
+    assert dbing.currentTxn() is None
+    assert dbing.historyDB.getHistory(did) is None
+    assert dbing.eventsDB.getEvent(did) is None
+
+
+def testAtomicNestedJoinsOuter():
+    dbing.setupDbEnv(DB_DIR_PATH)
+
+    def inner():
+        dbing.otpDB.saveOtpBlob(DID, {"id": DID}, {})
+        return dbing.currentTxn()
+
+    def outer():
+        return dbing.currentTxn(), dbing.atomic(inner)
+
+    outerTxn, innerTxn = dbing.atomic(outer)
+
+    assert outerTxn is innerTxn
+    assert dbing.otpDB.getOtpBlob(DID) is not None
+
+
+def testAtomicGrowsFullMap():
+    env = dbing.setupDbEnv(DB_DIR_PATH, mapSize=256 * 1024)
+    data = {"blob": "a" * 64 * 1024}
+
+    def save():
+        for i in range(0, 10):
+            dbing.otpDB.db.save("did:dad:{}".format(i), data)
+            dbing.historyDB.db.save("did:dad:{}".format(i), data)
+
+    dbing.atomic(save)
+
+    assert env.info()['map_size'] > 256 * 1024
+    assert dbing.otpDB.otpBlobCount() == 10
+    assert dbing.historyDB.historyCount() == 10
+
+
+def testJsonCodecIsUntagged():
+    dbing.setupDbEnv(DB_DIR_PATH)
+    db = dbing.DB(dbing.DB_KEY_HISTORY_NAME)
+    db.save(DID, {"id": DID})
+
+    with dbing.dideryDB.begin(db=db.subDb) as txn:
+        assert txn.get(DID.encode()) == json.dumps({"id": DID}).encode()
+
+
+def testMsgpackCodec():
+    pytest.importorskip("msgpack")
+
+    dbing.setupDbEnv(DB_DIR_PATH, codec="msgpack")
+    db = dbing.DB(dbing.DB_KEY_HISTORY_NAME)
+    data = [{"history": {"id": DID, "signer": 0, "signers": [VK.decode(), None]}, "signatures": {"signer": "sig"}}]
+
+    db.save(DID, data)
+
+    with dbing.dideryDB.begin(db=db.subDb) as txn:
+        assert txn.get(DID.encode())[:1] == dbing.MsgpackCodec.tag
+
+    assert db.get(DID) == data
+    assert db.getAll() == {"data": [data]}
+
+
+def testCodecsReadEachOthersRecords():
+    pytest.importorskip("msgpack")
+
+    dbing.setupDbEnv(DB_DIR_PATH, codec="json")
+    db = dbing.DB(dbing.DB_KEY_HISTORY_NAME)
+    db.save("did:dad:a", {"codec": "json"})
+
+    dbing.setupDbEnv(DB_DIR_PATH, codec="msgpack")
+    db.save("did:dad:b", {"codec": "msgpack"})
+
+    assert db.get("did:dad:a") == {"codec": "json"}
+    assert db.getAll()["data"] == [{"codec": "json"}, {"codec": "msgpack"}]
+
+    dbing.setupDbEnv(DB_DIR_PATH, codec="json")
+
+    assert db.get("did:dad:b") == {"codec": "msgpack"}
+    assert db.update("did:dad:b", lambda data: dict(data, updated=True)) == {"codec": "msgpack", "updated": True}
+
+
+def testGetJson():
+    dbing.setupDbEnv(DB_DIR_PATH)
+    db = dbing.DB(dbing.DB_KEY_HISTORY_NAME)
+    data = [{"history": {"id": DID}, "signatures": {"signer": "sig"}}]
+
+    db.save(DID, data)
+
+    assert db.getJson(DID) == json.dumps(data).encode()
+    assert db.getJson("did:dad:missing") is None
+
+
+def testGetJsonFromMsgpack():
+    pytest.importorskip("msgpack")
+
+    dbing.setupDbEnv(DB_DIR_PATH, codec="msgpack")
+    db = dbing.DB(dbing.DB_KEY_HISTORY_NAME)
+    data = [{"history": {"id": DID}, "signatures": {"signer": "sig"}}]
+
+    db.save(DID, data)
+
+    assert json.loads(db.getJson(DID)) == data
+
+
+def testUnknownCodec():
+    with pytest.raises(ValueError):
+        dbing.setupDbEnv(DB_DIR_PATH, codec="xml")
+
+
+def testCodecSize():
+    """
+    msgpack stores a rotation history with a long event list in fewer
+    bytes than json. Timings are in benchmarks/codecs.py.
+    """
+    pytest.importorskip("msgpack")
+
+    signers = [h.bytesToStr64u(libnacl.randombytes(32)) for i in range(0, 20)]
+    record = [
+        [
+            {
+                "event": {"id": DID, "changed": "2000-01-01T00:00:00+00:00", "signer": i, "signers": signers[:i + 2]},
+                "signatures": {"signer": h.bytesToStr64u(libnacl.randombytes(64)),
+                               "rotation": h.bytesToStr64u(libnacl.randombytes(64))}
+            }
+            for i in range(0, 18)
+        ]
+    ]
+
+    results = {}
+    for name, codec in dbing.CODECS.items():
+        raw = codec.encode(record)
+
+        assert dbing.decodeValue(raw) == record
+
+        results[name] = len(raw)
+
+    assert results["msgpack"] < results["json"]
+
+
 def testEmptyHistoryCount(historyDB):
     count = historyDB.historyCount()
 
@@ -168,6 +647,74 @@ def testGetAllHistoriesOnEmptyDB(historyDB):
     assert actual_data == {'data': []}
 
 
+def testGetAllHistoriesWithCursor(historyDB):
+    histories = []
+    for i in range(0, 5):
+        vk, sk, did, body = didery.crypto.eddsa.genDidHistory(signer=0, numSigners=2)
+        data = json.loads(body)
+        sigs = [didery.crypto.eddsa.signResource(body, sk)]
+
+        histories.append((did, historyDB.saveHistory(did, data, sigs)))
+
+    exp_data = [history for did, history in sorted(histories)]
+
+    page = historyDB.getAllHistories(limit=2)
+
+    assert page["data"] == exp_data[0:2]
+    assert "next" in page
+
+    page = historyDB.getAllHistories(limit=2, cursor=page["next"])
+
+    assert page["data"] == exp_data[2:4]
+    assert "next" in page
+
+    page = historyDB.getAllHistories(limit=2, cursor=page["next"])
+
+    assert page["data"] == exp_data[4:]
+    assert "next" not in page
+
+
+def testGetAllHistoriesWithCursorAndOffset(historyDB):
+    histories = []
+    for i in range(0, 4):
+        vk, sk, did, body = didery.crypto.eddsa.genDidHistory(signer=0, numSigners=2)
+        data = json.loads(body)
+        sigs = [didery.crypto.eddsa.signResource(body, sk)]
+
+        histories.append((did, historyDB.saveHistory(did, data, sigs)))
+
+    exp_data = [history for did, history in sorted(histories)]
+
+    first = sorted(histories)[0][0]
+    page = historyDB.getAllHistories(offset=1, limit=10, cursor=h.keyToCursor(first.encode()))
+
+    assert page == {"data": exp_data[2:]}
+
+
+def testStreamAllHistories(historyDB, monkeypatch):
+    monkeypatch.setattr(dbing, "STREAM_BATCH_SIZE", 2)
+
+    for i in range(0, 5):
+        vk, sk, did, body = didery.crypto.eddsa.genDidHistory(signer=0, numSigners=2)
+        data = json.loads(body)
+        sigs = [didery.crypto.eddsa.signResource(body, sk)]
+
+        historyDB.saveHistory(did, data, sigs)
+
+    for offset, limit in [(0, 10), (0, 5), (0, 3), (1, 2), (4, 10), (5, 10)]:
+        chunks = list(historyDB.streamAllHistories(offset, limit))
+
+        assert json.loads(b''.join(chunks).decode()) == historyDB.getAllHistories(offset, limit)
+
+    # one chunk per batch plus the closing bracket
+    assert len(list(historyDB.streamAllHistories(limit=5))) == 4
+
+    page = historyDB.getAllHistories(limit=2)
+    chunks = list(historyDB.streamAllHistories(limit=2, cursor=page["next"]))
+
+    assert json.loads(b''.join(chunks).decode()) == historyDB.getAllHistories(limit=2, cursor=page["next"])
+
+
 def testDeleteHistory(historyDB):
     seed = b'\x92[\xcb\xf4\xee5+\xcf\xd4b*%/\xabw8\xd4d\xa2\xf8\xad\xa7U\x19,\xcfS\x12\xa6l\xba"'
 
@@ -1884,7 +2431,11 @@ class DBMockDidAssertions(DBMock):
     def save(self, key, data):
         assert key == DID
 
-    def get(self, key):
+    def update(self, key, fn, record=None):
+        assert key == DID
+        return fn(self.db_data.get(key))
+
+    def get(self, key, record=None):
         assert key == DID
         if key in self.db_data:
             return self.db_data[key]
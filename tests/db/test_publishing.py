@@ -0,0 +1,246 @@
+import pytest
+
+try:
+    import simplejson as json
+except ImportError:
+    import json
+
+from didery.db import dbing
+from didery.db import publishing
+
+DB_DIR_PATH = "/tmp/db_setup_test"
+DID = "did:dad:NOf6ZghvGNbFc_wr3CC0tKZHz1qWAR4lD5aM-i0zSjw="
+OTHER_DID = "did:dad:Xq5YqaL6L48pf0fu7IUhL0JRaU2_RxFP0AL43wYn148="
+DATA = {
+    "id": DID,
+    "changed": "2000-01-01T00:00:00+00:00",
+    "signer": 0,
+    "signers": ["NOf6ZghvGNbFc_wr3CC0tKZHz1qWAR4lD5aM-i0zSjw=", "Xq5YqaL6L48pf0fu7IUhL0JRaU2_RxFP0AL43wYn148="]
+}
+
+
+def testChangeHub():
+    hub = publishing.ChangeHub()
+    everything = hub.subscribe()
+    one = hub.subscribe(DID)
+    other = hub.subscribe(OTHER_DID)
+
+    assert hub.publish(DID, b'{"a": 1}') == 1
+    assert hub.publish(OTHER_DID, b'{"b": 2}') == 2
+
+    assert everything.drain() == b'id:1\nevent:message\ndata:{"a": 1}\n\nid:2\nevent:message\ndata:{"b": 2}\n\n'
+    assert one.drain() == b'id:1\nevent:message\ndata:{"a": 1}\n\n'
+    assert other.drain() == b'id:2\nevent:message\ndata:{"b": 2}\n\n'
+    assert one.drain() == b''
+
+    one.close()
+    other.close()
+
+    assert hub.watched(DID)  # everything is still subscribed
+
+    everything.close()
+
+    assert not hub.watched(DID)
+    assert hub.subscribers == {}
+
+
+def testSubscriptionDropsOldestEvents():
+    hub = publishing.ChangeHub()
+    subscription = publishing.Subscription(hub, size=2)
+
+    for index in range(3):
+        subscription.push(index, str(index).encode())
+
+    assert subscription.drain() == b'12'
+
+
+def testSubscriptionSkipsChangesAlreadySent():
+    hub = publishing.ChangeHub()
+    subscription = hub.subscribe()
+    subscription.after = 2
+
+    for sequence in (1, 2, 3):
+        hub.publish(DID, b'{}', sequence)
+
+    assert subscription.drain() == b'id:3\nevent:message\ndata:{}\n\n'
+    assert hub.publish(DID, b'{}') == 4
+
+
+def testManySubscribers():
+    hub = publishing.ChangeHub()
+    subscriptions = [hub.subscribe(DID) for index in range(5000)]
+
+    hub.publish(DID, b'{}')
+
+    assert all(subscription.drain() == b'id:1\nevent:message\ndata:{}\n\n' for subscription in subscriptions)
+
+
+def testSaveHistoryPublishesAfterCommit():
+    dbing.setupDbEnv(DB_DIR_PATH)
+    subscription = publishing.historyChanges.subscribe(DID)
+
+    try:
+        def save():
+            dbing.historyDB.saveHistory(DID, DATA, {"signer": "sig"})
+
+            assert subscription.drain() == b''  # not committed yet
+
+            raise ValueError("crashed after write")
+
+        with pytest.raises(ValueError):
+            dbing.atomic(save)
+
+        assert subscription.drain() == b''  # aborted writes are never published
+
+        dbing.atomic(lambda: dbing.historyDB.saveHistory(DID, DATA, {"signer": "sig"}))
+
+        event = subscription.drain()
+        data = json.loads(event.split(b"data:", 1)[1])
+
+        assert data == {"id": DID, "history": [{"history": DATA, "signatures": {"signer": "sig"}}]}
+
+        dbing.historyDB.deleteHistory(DID)
+
+        data = json.loads(subscription.drain().split(b"data:", 1)[1])
+
+        assert data == {"id": DID, "history": None}
+    finally:
+        subscription.close()
+
+
+def testChangeIsOnlyEncodedForSubscribersWithoutLog(monkeypatch):
+    dbing.setupDbEnv(DB_DIR_PATH)
+    historyDB = dbing.BaseHistoryDB(dbing.DB(dbing.DB_KEY_HISTORY_NAME))  # records no change log
+    encoded = []
+    dumps = dbing.json.dumps
+
+    def countingDumps(obj, *args, **kwargs):
+        if isinstance(obj, dict) and set(obj) == {"id", "history"}:
+            encoded.append(obj["id"])
+        return dumps(obj, *args, **kwargs)
+
+    monkeypatch.setattr(dbing.json, "dumps", countingDumps)
+
+    historyDB.saveHistory(DID, DATA, {"signer": "sig"})
+
+    assert encoded == []
+
+    subscription = publishing.historyChanges.subscribe(DID)
+
+    try:
+        historyDB.saveHistory(DID, DATA, {"signer": "sig"})
+
+        assert encoded == [DID]
+        assert subscription.drain().startswith(b"id:")
+    finally:
+        subscription.close()
+
+
+def testChangeLog():
+    dbing.setupDbEnv(DB_DIR_PATH)
+    changes = dbing.ChangeLogDB(size=3)
+
+    assert changes.latest() == 0
+    assert changes.oldest() is None
+    assert changes.since(0) == []
+
+    for index in range(4):
+        did = DID if index % 2 == 0 else OTHER_DID
+        assert changes.record(did, str(index).encode()) == index + 1
+
+    # the oldest change was dropped
+    assert changes.oldest() == 2
+    assert changes.latest() == 4
+    assert changes.since(0) == [(2, b'1'), (3, b'2'), (4, b'3')]
+    assert changes.since(2) == [(3, b'2'), (4, b'3')]
+    assert changes.since(0, DID) == [(3, b'2')]
+
+    # sequence numbers survive reopening the database
+    dbing.setupDbEnv(DB_DIR_PATH)
+
+    assert dbing.ChangeLogDB().record(DID, b'4') == 5
+
+
+def testChangeIsRecordedWithWrite():
+    dbing.setupDbEnv(DB_DIR_PATH)
+    changes = dbing.historyDB.changes
+
+    def save():
+        dbing.historyDB.saveHistory(DID, DATA, {"signer": "sig"})
+
+        raise ValueError("crashed after write")
+
+    with pytest.raises(ValueError):
+        dbing.atomic(save)
+
+    assert changes.latest() == 0
+
+    dbing.historyDB.saveHistory(DID, DATA, {"signer": "sig"})
+    dbing.historyDB.deleteHistory(DID)
+
+    assert [sequence for sequence, data in changes.since(0, DID)] == [1, 2]
+    assert json.loads(changes.since(1)[0][1]) == {"id": DID, "history": None}
+
+
+def testChangeHubFollowsChangeLog():
+    dbing.setupDbEnv(DB_DIR_PATH)
+    changes = dbing.historyDB.changes
+    hub = publishing.ChangeHub()
+
+    changes.record(OTHER_DID, b'{"old": 0}')
+    hub.follow(changes)
+
+    assert hub.sequence == 1
+
+    # with nobody subscribed catching up only moves past the recorded changes
+    changes.record(OTHER_DID, b'{"old": 1}')
+
+    assert hub.catchUp() == 0
+    assert hub.sequence == 2
+
+    everything = hub.subscribe()
+    one = hub.subscribe(DID)
+
+    # written by another process
+    changes.record(DID, b'{"a": 1}')
+    changes.record(OTHER_DID, b'{"b": 2}')
+
+    assert hub.catchUp() == 2
+    assert hub.catchUp() == 0
+    assert everything.drain() == b'id:3\nevent:message\ndata:{"a": 1}\n\nid:4\nevent:message\ndata:{"b": 2}\n\n'
+    assert one.drain() == b'id:3\nevent:message\ndata:{"a": 1}\n\n'
+
+    hub.follow(None)
+
+    assert hub.catchUp() == 0
+
+
+def testFollowedHubPublishesLocalWritesFromLog(monkeypatch):
+    dbing.setupDbEnv(DB_DIR_PATH)
+    hub = publishing.ChangeHub()
+    monkeypatch.setattr(publishing, "historyChanges", hub)
+    hub.follow(dbing.historyDB.changes)
+    subscription = hub.subscribe(DID)
+
+    dbing.historyDB.saveHistory(DID, DATA, {"signer": "sig"})
+
+    assert subscription.drain() == b''  # not published twice
+
+    hub.catchUp()
+
+    assert json.loads(subscription.drain().split(b"data:", 1)[1])["id"] == DID
+
+
+def testSubscriptionWait():
+    hub = publishing.ChangeHub()
+    subscription = hub.subscribe(DID)
+
+    assert not subscription.wait(0.01)
+
+    hub.publish(DID, b'{}')
+
+    assert subscription.wait(0.01)
+
+    subscription.drain()
+
+    assert not subscription.wait(0.01)
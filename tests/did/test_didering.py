@@ -280,3 +280,40 @@ def testGetNonExistentDIDModel():
 
     assert did is None
 
+
+
+def testParseDid():
+    did_reference = "did:dad:iy67FstqFl_a5e-sni6yAWoj60-1E2RtzmMGjrjHaSY=/customers/1234?color=blue#test_did"
+
+    didering.parseDid.cache_clear()
+    parsed = didering.parseDid(did_reference)
+
+    assert parsed.did == "did:dad:iy67FstqFl_a5e-sni6yAWoj60-1E2RtzmMGjrjHaSY="
+    assert parsed.scheme == "did"
+    assert parsed.method == "dad"
+    assert parsed.idString == "iy67FstqFl_a5e-sni6yAWoj60-1E2RtzmMGjrjHaSY="
+    assert parsed.path == "/customers/1234"
+    assert parsed.query == "color=blue"
+    assert parsed.fragment == "test_did"
+
+    # memoized
+    assert didering.parseDid(did_reference) is parsed
+    assert didering.parseDid.cache_info().hits == 1
+
+    # immutable
+    with pytest.raises(AttributeError):
+        parsed.did = "did:dad:other"
+
+    with pytest.raises(AttributeError):
+        parsed.extra = "value"
+
+
+def testParseInvalidDid():
+    with pytest.raises(ValueError):
+        didering.parseDid("")
+
+    with pytest.raises(ValueError):
+        didering.parseDid("did:dad")
+
+    with pytest.raises(ValueError):
+        didering.parseDid("dad:dad:iy67FstqFl_a5e-sni6yAWoj60-1E2RtzmMGjrjHaSY=")
@@ -1,3 +1,9 @@
+try:
+    import simplejson as json
+except ImportError:
+    import json
+
+
 class DBMock:
     def __init__(self, db_data):
         """
@@ -25,22 +31,48 @@ class DBMock:
 
         """
 
-    def get(self, key):
+    def update(self, key, fn, record=None):
+        """
+            Read, modify and store the value of key
+
+            :param key: string
+                key to identify data
+            :param fn: function
+                takes the stored dict or None and returns the dict to store
+            :param record: StoredRecord ignored by the mock
+            :return: dict
+        """
+        return fn(self.db_data.get(key))
+
+    def get(self, key, record=None):
         """
             Find and return a key value pair
 
             :param key: string
                 key to look up
+            :param record: StoredRecord ignored by the mock
             :return: dict
         """
         return self.db_data[key]
 
-    def getAll(self, offset=0, limit=10):
+    def getJson(self, key):
+        """
+            Find and return a key value pair as json encoded bytes
+
+            :param key: string
+                key to look up
+            :return: bytes
+        """
+        value = self.get(key)
+        return None if value is None else json.dumps(value).encode()
+
+    def getAll(self, offset=0, limit=10, cursor=None):
         """
             Get all key value pairs in a range between the offset and offset+limit
 
             :param offset: int starting point of the range
             :param limit: int maximum number of entries to return
+            :param cursor: string continuation token from a previous page
             :return: dict
         """
         values = {"data": []}
@@ -49,6 +81,17 @@ class DBMock:
 
         return values
 
+    def streamAll(self, offset=0, limit=10, cursor=None):
+        """
+            Stream all key value pairs in a range between the offset and offset+limit
+
+            :param offset: int starting point of the range
+            :param limit: int maximum number of entries to return
+            :param cursor: string continuation token from a previous page
+            :return: generator of bytes
+        """
+        yield json.dumps(self.getAll(offset, limit, cursor)).encode()
+
     def delete(self, key):
         """
             Find and delete a key value pair matching the supplied key.